@@ -5,18 +5,152 @@
 """
 
 import streamlit as st
+import inspect
 import math
 from datetime import datetime
-from energy_basin import cbrt, solve_cubic
+import metrics
+from formulas import BASIN_OUTPUTS, evaluate
 
 # 页面配置
 st.set_page_config(
     page_title="消力池计算器",
-    page_icon="",
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def _report_queue():
+    """全部会话共享的报告生成队列"""
+    from report_queue import from_env
+    return from_env()
+
+
+@st.cache_resource
+def _metrics_exporter():
+    """按环境变量启动指标导出（每个进程一次，见 metrics.from_env）"""
+    return metrics.from_env(_report_queue())
+
+
+_metrics_exporter()
+
+
+@st.cache_resource
+def _default_soil_catalog():
+    """河床土质参数表（XLC_SOIL_CATALOG 指定文件或内置表，见 soil_catalog）"""
+    from soil_catalog import from_env
+    return from_env()
+
+
+def _soil_catalog():
+    """当前会话使用的土质参数表：侧边栏上传的优先"""
+    return st.session_state.get("soil_catalog") or _default_soil_catalog()
+
+
+# 按需展开的工具面板中需要保留取值的控件（面板折叠时控件不渲染，Streamlit 会清除其状态）
+_PANEL_INPUTS = (
+    "soils_e",
+    "Q_g", "n_g", "b0_g", "dc_g", "db_g", "mode_g", "text_g", "key_g",
+    "b2_o", "Ls_o", "dH_o", "k1_o", "w_ex_o", "w_co_o",
+    "page_size_b", "page_b", "batch_fmt",
+    "n_r", "b0_r", "dc_r", "db_r", "m_r", "phi_r", "hs_r", "Hmax_r", "emax_r", "H_q", "e_q", "H_o", "Q_o",
+    "n_w", "n_apron_w", "Lp_w",
+    "x_key_v", "x_rng_v", "y_key_v", "y_rng_v", "field_v", "how_v", "n_v",
+)
+
+
+# 按需渲染的面板需要 st.expander 的 key / on_change 与 .open（新版 Streamlit）；旧版回退为始终渲染
+_LAZY_PANELS = "on_change" in inspect.signature(st.expander).parameters
+
+
+def _lazy_expander(label: str, key: str):
+    """展开时才渲染内容的折叠面板（配合 _is_open 使用）"""
+    if _LAZY_PANELS:
+        return st.expander(label, key=key, on_change="rerun")
+    return st.expander(label, expanded=False)
+
+
+def _is_open(expander) -> bool:
+    """面板是否展开；旧版 Streamlit 无法得知，按展开处理"""
+    return getattr(expander, "open", True) if _LAZY_PANELS else True
+
+
+def _remember_inputs():
+    """把工具面板控件的当前取值存入普通会话键 panel_inputs（不随控件清除）"""
+    saved = st.session_state.setdefault("panel_inputs", {})
+    for key in _PANEL_INPUTS:
+        if key in st.session_state:
+            saved[key] = st.session_state[key]
+
+
+def _recall(key: str, default):
+    """工具面板控件的初值：面板重新展开时沿用折叠前的取值"""
+    return st.session_state.get("panel_inputs", {}).get(key, default)
+
+
+def _recall_index(key: str, options, default: int = 0) -> int:
+    """selectbox / radio 的初始序号（见 _recall）"""
+    value = _recall(key, None)
+    return list(options).index(value) if value in options else default
+
+
+def _session_id() -> str:
+    """当前会话标识，用于报告队列的每用户并发限制"""
+    if "session_id" not in st.session_state:
+        import uuid
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+def _report_status_panel(prefix: str = "report"):
+    """显示报告生成状态，完成后提供下载
+
+    任务状态存放在 session_state 的 {prefix}_job / _data / _name / _mime 中，
+    单工况报告与批量汇总表各用一个前缀。
+    """
+    from report_queue import DONE, ERROR, QUEUED, STATUS_TEXT
+    
+    rq = _report_queue()
+    job_key, data_key = f"{prefix}_job", f"{prefix}_data"
+    job_id = st.session_state.get(job_key)
+    if job_id is not None:
+        status = rq.status(job_id)
+        if status is None:
+            del st.session_state[job_key]
+            st.warning("⚠️ 报告任务已过期，请重新生成")
+            return
+        if status not in (DONE, ERROR):
+            text = STATUS_TEXT[status]
+            if status == QUEUED:
+                text += f"（前面还有 {rq.position(job_id)} 个任务）"
+            st.info(f"⏳ 报告{text}…")
+            if not hasattr(st, "fragment"):
+                st.button("🔄 刷新状态", key=f"refresh_{prefix}")
+            return
+        
+        error = rq.error(job_id)
+        data = rq.pop_result(job_id)
+        del st.session_state[job_key]
+        if status == ERROR:
+            if "python-docx" in error:
+                st.warning("⚠️ Word导出功能需要安装 python-docx 库")
+            else:
+                st.error(f"❌ 导出失败：{error}")
+            return
+        st.session_state[data_key] = data
+    
+    st.download_button(
+        label=f"💾 点击下载 {st.session_state[f'{prefix}_name']}",
+        data=st.session_state[data_key],
+        file_name=st.session_state[f"{prefix}_name"],
+        mime=st.session_state[f"{prefix}_mime"],
+        use_container_width=True,
+        key=f"dl_{prefix}",
+    )
+
+
+# 新版 Streamlit 用片段定时刷新状态，旧版回退为手动刷新
+_report_panel = st.fragment(run_every=1.0)(_report_status_panel) if hasattr(st, "fragment") else _report_status_panel
+
 # 自定义CSS样式
 st.markdown('''
     <style>
@@ -64,6 +198,23 @@ with st.sidebar:
     4. 查看详细结果
     ''')
     
+    st.markdown("---")
+    soil_file = st.file_uploader("河床土质参数表（CSV / JSON，可选）", type=["csv", "json"], key="soil_file")
+    if soil_file is not None:
+        soil_key = (soil_file.name, soil_file.size)
+        if st.session_state.get("soil_key") != soil_key:
+            try:
+                from soil_catalog import parse_catalog
+                st.session_state.soil_catalog = parse_catalog(soil_file.getvalue(), soil_file.name)
+                st.session_state.soil_key = soil_key
+            except Exception as e:
+                st.error(f"❌ 参数表读取失败：{str(e)}")
+    else:
+        st.session_state.pop("soil_catalog", None)
+        st.session_state.pop("soil_key", None)
+    st.download_button("📄 下载当前参数表", data=_soil_catalog().to_csv_bytes(), file_name="河床土质参数表.csv",
+                       mime="text/csv", key="dl_soil")
+
     st.markdown("---")
     st.markdown(f"**当前时间：** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
@@ -103,78 +254,31 @@ with col2:
     
     if st.button(" 开始计算", type="primary", use_container_width=True):
         try:
-            # 求解收缩水深 hc: T0 = hc + alpha * q^2 / (2*g*hc^2)
-            # 整理为三次方程: hc^3 - T0*hc^2 + (alpha*q^2)/(2*g) = 0
-            # 标准形式: x^3 + a*x^2 + b*x + d = 0
-            a_coef = -T0
-            b_coef = 0.0
-            c_coef = 0.0
-            d_coef = (alpha * q**2) / (2.0 * g)
+            # 公式见 formulas 注册表（B.1.1、B.1.1-2、B.1.1-4、B.1.1-1、B.1.2），与批量计算、桌面版一致
+            # 收缩水深 hc: T0 = hc + alpha * q^2 / (2*g*hc^2) 的急流根
+            params = {
+                'sigma0': sigma0, 'alpha': alpha, 'q': q, 'b1': b1, 'b2': b2,
+                'T0': T0, 'p': p, 'hs': hs, 'Ls': Ls, 'beta': beta, 'g': g
+            }
+            with metrics.track('basin'):
+                res = evaluate(params, outputs=BASIN_OUTPUTS, backend='scalar')
             
-            roots = solve_cubic(a_coef, b_coef, c_coef, d_coef)
-            valid_hc = [r for r in roots if r > 0 and r < T0]
-            
-            if not valid_hc:
+            if math.isnan(res['hc']):
+                metrics.error('basin')
                 st.error(" 无法求解收缩水深 hc，请检查输入参数")
             else:
-                hc = min(valid_hc)
-                
-                # 计算后续值
-                vc = q / hc  # 收缩流速
-                Frc = vc / math.sqrt(g * hc)  # 弗劳德数
-                
-                # 跃后水深 h''c: B.1.1-2公式
-                # h''c = (hc/2) * (√(1 + 8αq²/(ghc³)) - 1) * (b₁/b₂)^0.25
-                width_ratio = (b1 / b2) ** 0.25
-                sqrt_term = math.sqrt(1.0 + 8.0 * alpha * q**2 / (g * hc**3))
-                hc_double_prime = (hc / 2.0) * (sqrt_term - 1.0) * width_ratio
-                
-                # 保持向后兼容的变量名
-                hc_prime = hc_double_prime / sigma0  # 未校正值
-                hc_prime_adj = hc_double_prime
-                
-                # ΔZ: B.1.1-4公式
-                # ΔZ = αq²/(2gφ²h′s²) - αq²/(2gh″c²)
-                # 注：这里φ=p作为流速系数使用
-                phi = p if p > 0 else 1.0  # 流速系数
-                delta_Z = (alpha * q**2) / (2.0 * g * phi**2 * hs**2) - (alpha * q**2) / (2.0 * g * hc_double_prime**2)
-                
-                # 消力池深度 d: B.1.1-1公式
-                # d = σ₀h″c - h′s - ΔZ
-                d = sigma0 * hc_double_prime - hs - delta_Z
-                
-                # 消能: ΔE = (h''c - hc)^3 / (4*hc*h''c)
-                delta_E = ((hc_prime_adj - hc)**3) / (4.0 * hc * hc_prime_adj)
-                
-                # 水跃长度: Lⱼ = 6.9(h″c - hc)
-                Lj = 6.9 * (hc_double_prime - hc)
-                
-                # 护坦长度: Lsj = Ls + βLj
-                Lsj = Ls + beta * Lj
-                Lsj = Lj + Ls
-                
                 # 保存到session_state
-                st.session_state.result = {
-                    'hc': hc,
-                    'vc': vc,
-                    'Frc': Frc,
-                    'hc_prime': hc_prime,
-                    'hc_prime_adj': hc_prime_adj,
-                    'hc_double_prime': hc_double_prime,
-                    'delta_Z': delta_Z,
-                    'd': d,
-                    'delta_E': delta_E,
-                    'Lj': Lj,
-                    'Lsj': Lsj
-                }
-                st.session_state.input_params = {
-                    'sigma0': sigma0, 'alpha': alpha, 'q': q, 'b1': b1, 'b2': b2,
-                    'T0': T0, 'p': p, 'hs': hs, 'Ls': Ls, 'beta': beta, 'g': g
-                }
+                st.session_state.result = res
+                st.session_state.input_params = params
                 st.session_state.project_name = project_name
                 
                 st.success(" 计算完成！")
                 
+                # 规范推荐范围提示
+                from validation import messages, validate_basin_inputs
+                for msg in messages(validate_basin_inputs(**st.session_state.input_params)):
+                    st.warning(f"⚠️ {msg}")
+                
         except Exception as e:
             st.error(f" 计算错误：{str(e)}")
             import traceback
@@ -196,13 +300,16 @@ with col2:
             st.metric("Frc - 弗劳德数", f"{result['Frc']:.4f}")
         
         # 消力池结构示意图
-        with st.expander("📐 消力池结构示意图（图 B.1.1）", expanded=False):
+        exp_diagram = _lazy_expander("📐 消力池结构示意图（图 B.1.1）", key="exp_diagram")
+        with exp_diagram:
             import os
             diagram_path = "images/diagram_b11.png"
             
             if os.path.exists(diagram_path):
-                st.image(diagram_path, caption="图 B.1.1 消力池结构示意图", use_container_width=True)
-                st.markdown("---")
+                # 示意图（及 PIL）仅在展开时加载
+                if _is_open(exp_diagram):
+                    st.image(diagram_path, caption="图 B.1.1 消力池结构示意图", use_container_width=True)
+                    st.markdown("---")
             else:
                 # 备用文本图示
                 st.markdown("""
@@ -282,60 +389,48 @@ with col2:
             st.markdown("**弗劳德数：**")
             st.latex(r"Fr_c = \frac{v_c}{\sqrt{g h_c}}")
 
-        # Word导出
+        # Word导出（提交到共享报告队列，避免导出高峰拖慢其他用户的计算）
         st.markdown("---")
         st.markdown("### 📄 导出报告")
         
-        if st.button("📥 下载 Word 报告", type="secondary", use_container_width=True):
+        from report_render import FORMATS
+        report_fmt = st.radio("报告格式", list(FORMATS), format_func=lambda k: FORMATS[k][0],
+                              horizontal=True, key="report_fmt")
+        
+        if st.button(f"📥 生成 {FORMATS[report_fmt][0]} 报告", type="secondary", use_container_width=True):
+            from report_queue import ReportQueueFull
+            from report_render import render_report_bytes
+            
+            # 准备结果数据
+            results_data = {
+                'hc': result['hc'],
+                'hc_double_prime': result['hc_double_prime'],
+                'delta_Z': result['delta_Z'],
+                'd': result['d'],
+                'Lj': result['Lj'],
+                'Lsj': result['Lsj'],
+                'v': result['vc'],
+                'Fr': result['Frc']
+            }
+            
             try:
-                import tempfile
-                import os
-                from word_export import export_energy_basin_to_word
-                
-                # 准备结果数据
-                results_data = {
-                    'hc': result['hc'],
-                    'hc_double_prime': result['hc_double_prime'],
-                    'delta_Z': result['delta_Z'],
-                    'd': result['d'],
-                    'Lj': result['Lj'],
-                    'Lsj': result['Lsj'],
-                    'v': result['vc'],
-                    'Fr': result['Frc']
-                }
-                
-                # 创建临时文件
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-                    output_path = export_energy_basin_to_word(
-                        results=results_data,
-                        output_path=tmp.name,
-                        project_name=st.session_state.project_name,
-                        input_params=st.session_state.input_params
-                    )
-                    
-                    # 读取文件内容
-                    with open(output_path, "rb") as f:
-                        docx_data = f.read()
-                    
-                    # 删除临时文件
-                    try:
-                        os.unlink(output_path)
-                    except:
-                        pass
-                    
-                    # 提供下载
-                    st.download_button(
-                        label="💾 点击下载 Word 文档",
-                        data=docx_data,
-                        file_name=f"{st.session_state.project_name}_消力池计算报告.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                        use_container_width=True
-                    )
-                    
-            except ImportError:
-                st.warning("⚠️ Word导出功能需要安装 python-docx 库")
-            except Exception as e:
-                st.error(f"❌ 导出失败：{str(e)}")
+                st.session_state.report_job = _report_queue().submit(
+                    _session_id(),
+                    metrics.timed_report(render_report_bytes, report_fmt),
+                    results=results_data,
+                    project_name=st.session_state.project_name,
+                    input_params=dict(st.session_state.input_params),
+                    fmt=report_fmt,
+                )
+                st.session_state.report_name = f"{st.session_state.project_name}_消力池计算报告{FORMATS[report_fmt][1]}"
+                st.session_state.report_mime = FORMATS[report_fmt][2]
+                st.session_state.pop("report_data", None)
+            except ReportQueueFull as e:
+                metrics.REPORTS.inc(report_fmt, "rejected")
+                st.warning(f"⚠️ {e}")
+        
+        if "report_job" in st.session_state or "report_data" in st.session_state:
+            _report_panel()
 
 # 添加新的计算功能页面
 st.markdown("---")
@@ -368,24 +463,16 @@ with st.expander(" B.1.3 消力池底板厚度计算", expanded=False):
         st.markdown("#### 计算结果")
         if st.button(" 计算厚度", key="calc_thickness", use_container_width=True):
             try:
-                # B.1.3-1: 抗冲厚度
-                t_impact = k1_t * math.sqrt(q_t * math.sqrt(delta_H_t))
-                
-                # B.1.3-2: 抗浮厚度
-                if use_plus_t == "前半部（+）":
-                    t_float = k2_t * (U_t - gamma_t * hd_t + Pm_t) / gamma_b_t
-                else:
-                    t_float = k2_t * (U_t - gamma_t * hd_t - Pm_t) / gamma_b_t
-                
-                t_design = max(t_impact, t_float)
-                t_final = max(t_design, 0.5)
+                # B.1.3-1 抗冲厚度、B.1.3-2 抗浮厚度（公式见 formulas 注册表）
+                sign_t = 1.0 if use_plus_t == "前半部（+）" else -1.0
+                with metrics.track('thickness'):
+                    tr = evaluate(
+                        {'q': q_t, 'delta_H': delta_H_t, 'U': U_t, 'gamma': gamma_t, 'hd': hd_t,
+                         'Pm': Pm_t, 'gamma_b': gamma_b_t, 'k1': k1_t, 'k2': k2_t, 'sign': sign_t},
+                        outputs=('t_impact', 't_float', 't_design', 't_final'), backend='scalar',
+                    )
                 
-                st.session_state.thickness_result = {
-                    't_impact': t_impact,
-                    't_float': t_float,
-                    't_design': t_design,
-                    't_final': t_final
-                }
+                st.session_state.thickness_result = tr
                 st.success(" 计算完成！")
             except Exception as e:
                 st.error(f" 计算错误：{str(e)}")
@@ -414,35 +501,26 @@ with st.expander(" B.2.1 海漫长度计算", expanded=False):
         qs_m = st.number_input("qs - 消力池末端单宽流量 (m³/(s·m))", min_value=0.01, value=10.0, step=0.5, key="qs_m")
         delta_H_m = st.number_input("ΔH' - 上下游水位差 (m)", min_value=0.01, value=5.0, step=0.1, key="dH_m")
         
-        check_val = math.sqrt(qs_m * math.sqrt(delta_H_m))
+        check_val = evaluate({'qs': qs_m, 'delta_H': delta_H_m}, outputs=('check',), backend='scalar')['check']
         if check_val < 1 or check_val > 9:
             st.warning(f"⚠️ √(qs·√ΔH') = {check_val:.2f}，超出适用范围 [1, 9]")
         else:
             st.info(f"✓ √(qs·√ΔH') = {check_val:.2f}，在适用范围内")
         
-        riverbed_type_m = st.selectbox(
-            "河床土质类型",
-            ["粉砂、细砂", "中砂、粗砂、粉质黏土", "粉质黏土", "坚硬黏土"],
-            key="riverbed_m"
-        )
-        
-        Ks_ranges = {
-            "粉砂、细砂": (14.0, 13.0),
-            "中砂、粗砂、粉质黏土": (12.0, 11.0),
-            "粉质黏土": (10.0, 9.0),
-            "坚硬黏土": (8.0, 7.0)
-        }
-        ks_min, ks_max = Ks_ranges[riverbed_type_m]
-        st.info(f"该土质 Ks 范围：{ks_max} ~ {ks_min}")
+        soils_m = _soil_catalog()
+        riverbed_type_m = st.selectbox("河床土质类型", soils_m.names, key="riverbed_m")
+        soil_m = soils_m[riverbed_type_m]
+        st.info(f"该土质 Ks 范围：{soil_m.Ks_min:g} ~ {soil_m.Ks_max:g}")
         
-        Ks_m = st.number_input("Ks - 海漫长度计算系数", min_value=1.0, value=(ks_min + ks_max)/2, step=0.5, key="Ks_m")
+        Ks_m = st.number_input("Ks - 海漫长度计算系数", min_value=1.0, value=soil_m.Ks_mid, step=0.5, key=f"Ks_m_{riverbed_type_m}")
     
     with col_m2:
         st.markdown("#### 计算结果")
         if st.button(" 计算海漫长度", key="calc_apron", use_container_width=True):
             try:
                 # B.2.1: Lp = Ks·√(qs·√ΔH')
-                Lp = Ks_m * math.sqrt(qs_m * math.sqrt(delta_H_m))
+                with metrics.track('apron'):
+                    Lp = evaluate({'qs': qs_m, 'delta_H': delta_H_m, 'Ks': Ks_m}, outputs=('Lp',), backend='scalar')['Lp']
                 
                 st.session_state.apron_result = {
                     'Lp': Lp,
@@ -467,27 +545,33 @@ with st.expander(" B.3 河床冲刷深度计算", expanded=False):
     
     with col_s1:
         st.markdown("#### 输入参数")
+        soils_s = _soil_catalog()
+        riverbed_type_s = st.selectbox("河床土质类型（确定 [v0] 默认值）", soils_s.names, key="riverbed_s")
+        soil_s = soils_s[riverbed_type_s]
+        st.info(f"该土质 [v0] 范围：{soil_s.v0_min:g} ~ {soil_s.v0_max:g} m/s")
         
         st.markdown("##### B.3.1 海漫末端冲刷深度")
         qm_s1 = st.number_input("qm - 海漫末端单宽流量 (m³/(s·m))", min_value=0.01, value=10.0, step=0.5, key="qm_s1")
-        v0_s1 = st.number_input("[v0] - 河床土质允许不冲流速 (m/s)", min_value=0.01, value=2.0, step=0.1, key="v0_s1")
+        v0_s1 = st.number_input("[v0] - 河床土质允许不冲流速 (m/s)", min_value=0.01, value=soil_s.v0_mid, step=0.1, key=f"v0_s1_{riverbed_type_s}")
         hm_s1 = st.number_input("hm - 海漫末端河床水深 (m)", min_value=0.01, value=3.0, step=0.1, key="hm_s1")
         
         st.markdown("---")
         st.markdown("##### B.3.2 上游护底首端冲刷深度")
         qm_s2 = st.number_input("q'm - 上游护底首端单宽流量 (m³/(s·m))", min_value=0.01, value=10.0, step=0.5, key="qm_s2")
-        v0_s2 = st.number_input("[v0] - 河床土质允许不冲流速 (m/s)", min_value=0.01, value=2.0, step=0.1, key="v0_s2")
+        v0_s2 = st.number_input("[v0] - 河床土质允许不冲流速 (m/s)", min_value=0.01, value=soil_s.v0_mid, step=0.1, key=f"v0_s2_{riverbed_type_s}")
         hm_s2 = st.number_input("h'm - 上游护底首端河床水深 (m)", min_value=0.01, value=3.0, step=0.1, key="hm_s2")
     
     with col_s2:
         st.markdown("#### 计算结果")
         if st.button(" 计算冲刷深度", key="calc_scour", use_container_width=True):
             try:
-                # B.3.1: 海漫末端河床冲刷深度
-                dm = 1.1 * (qm_s1 / v0_s1) - hm_s1
-                
-                # B.3.2: 上游护底首端河床冲刷深度
-                dm_prime = 0.8 * (qm_s2 / v0_s2) - hm_s2
+                # B.3.1 海漫末端、B.3.2 上游护底首端河床冲刷深度
+                with metrics.track('scour'):
+                    scour = evaluate(
+                        {'qm': qm_s1, 'v0': v0_s1, 'hm': hm_s1, 'qm_up': qm_s2, 'v0_up': v0_s2, 'hm_up': hm_s2},
+                        outputs=('dm', 'dm_prime'), backend='scalar',
+                    )
+                dm, dm_prime = scour['dm'], scour['dm_prime']
                 
                 st.session_state.scour_result = {
                     'dm': dm,
@@ -520,6 +604,498 @@ with st.expander(" B.3 河床冲刷深度计算", expanded=False):
                 st.markdown("**B.3.2 上游护底首端河床冲刷深度：**")
                 st.latex(r"d'_m = 0.8\frac{q_m}{[v_0]} - h'_m")
                 st.markdown(f"计算：d'm = 0.8 × ({sr['qm_s2']:.2f}/{sr['v0_s2']:.2f}) - {sr['hm_s2']:.2f} = {sr['dm_prime']:.3f} m")
+
+# 以下工具面板按需执行：展开时才运行其内容（含 pandas / numpy / altair 的导入与计算），
+# 首屏只渲染标题，折叠后不再重复计算
+_exp_soils = _lazy_expander(" 多土质对比（海漫长度与冲刷深度包络）", key="exp_soils")
+with _exp_soils:
+    if _is_open(_exp_soils):
+        st.markdown("### 候选河床土质 × 工况")
+        st.markdown("按土质参数表中的 Ks、[v0] 范围，对所选土质与下表全部工况一次计算海漫长度 Lp（B.2.1）"
+                    "与冲刷深度 dm、d'm（B.3），给出最小 / 中值 / 最大包络。工况默认取上方 B.2.1、B.3 的输入。")
+        import pandas as pd
+
+        soils_e = _soil_catalog()
+        names_e = st.multiselect("候选土质", soils_e.names, key="soils_e",
+                                 default=[n for n in _recall("soils_e", soils_e.names) if n in soils_e.names])
+        # 表格编辑器的取值不能经 Session State 设置：重建时以折叠前保存的工况表作为初始数据
+        if "scen_e" not in st.session_state:
+            st.session_state.scen_e_base = st.session_state.get("scen_e_saved")
+        base_e = st.session_state.scen_e_base
+        scen_e = st.data_editor(
+            base_e if base_e is not None else
+            pd.DataFrame({'qs': [qs_m], 'delta_H': [delta_H_m], 'qm': [qm_s1], 'hm': [hm_s1],
+                          'qm_up': [qm_s2], 'hm_up': [hm_s2]}),
+            num_rows="dynamic", use_container_width=True, key="scen_e",
+        )
+        if base_e is not None or any(st.session_state.scen_e.values()):
+            st.session_state.scen_e_saved = scen_e
+        if st.button(" 计算包络", key="calc_env", use_container_width=True):
+            scen_e = scen_e.apply(pd.to_numeric, errors='coerce').dropna()
+            if not names_e or scen_e.empty:
+                st.warning("⚠️ 请至少选择一种土质并填写一个完整工况")
+            else:
+                try:
+                    from soil_catalog import envelope_table
+
+                    with metrics.track('soil_envelope'):
+                        st.session_state.envelope_result = envelope_table(
+                            soils_e.subset(names_e), *(scen_e[k].to_numpy() for k in
+                                                       ('qs', 'delta_H', 'qm', 'hm', 'qm_up', 'hm_up')))
+                    metrics.CALC_ROWS.inc('soil_envelope', amount=len(st.session_state.envelope_result['soil']))
+                except Exception as e:
+                    st.error(f" 计算错误：{str(e)}")
+
+        if "envelope_result" in st.session_state:
+            from soil_catalog import governing
+
+            table_e = st.session_state.envelope_result
+            col_e1, col_e2 = st.columns(2)
+            for col, key, label in ((col_e1, 'Lp_max', "海漫长度 Lp"), (col_e2, 'dm_max', "海漫末端冲刷深度 dm")):
+                g_e = governing(table_e, key)
+                if g_e is not None:
+                    col.metric(f"{label} 最大值", f"{g_e[key]:.2f} m")
+                    col.caption(f"控制组合：{g_e['soil']}，工况 {g_e['scenario']}")
+            st.dataframe(pd.DataFrame(table_e), use_container_width=True)
+
+_exp_bays = _lazy_expander(" 多孔闸消力池（闸门开启组合）", key="exp_bays")
+with _exp_bays:
+    if _is_open(_exp_bays):
+        st.markdown("### 按开启组合分配各孔单宽流量")
+        st.markdown("输入总流量与闸孔布置，按边孔 / 中孔侧收缩系数与开启度分配各孔单宽流量，"
+                    "对全部开启组合与闸孔一次计算 B.1，给出控制孔与控制组合。其余参数取上方输入（q 除外）。")
+
+        col_g1, col_g2 = st.columns([1, 1])
+        with col_g1:
+            Q_g = st.number_input("Q - 过闸总流量 (m³/s)", min_value=0.01, value=_recall("Q_g", float(q * b1)), step=10.0, key="Q_g")
+            n_g = st.number_input("N - 孔数", min_value=1, max_value=12, value=_recall("n_g", 4), step=1, key="n_g")
+            b0_g = st.number_input("b0 - 单孔净宽 (m)", min_value=0.1, value=_recall("b0_g", max(float(b1) / 4.0, 0.1)), step=0.5, key="b0_g")
+            dc_g = st.number_input("d_c - 中间墩厚 (m)", min_value=0.0, value=_recall("dc_g", 1.0), step=0.1, key="dc_g")
+            db_g = st.number_input("d_b - 边墩厚 (m)", min_value=0.0, value=_recall("db_g", 1.0), step=0.1, key="db_g")
+        with col_g2:
+            mode_g = st.radio("开启组合", ["all", "symmetric", "custom"], horizontal=True, key="mode_g",
+                              index=_recall_index("mode_g", ["all", "symmetric", "custom"]),
+                              format_func=lambda k: {"all": "全部组合", "symmetric": "对称组合", "custom": "自定义"}[k])
+            if mode_g == "custom":
+                text_g = st.text_area("每行一个组合（1 开启，0 关闭，0~1 为部分开启）",
+                                      value=_recall("text_g", "1 " * int(n_g) + "\n" + "1 0 " * (int(n_g) // 2) + "1" * (int(n_g) % 2)),
+                                      key="text_g")
+            key_g = st.selectbox("控制指标", ["d", "Lsj"], index=_recall_index("key_g", ["d", "Lsj"]), format_func=lambda k: {"d": "池深 d", "Lsj": "护坦长度 Lsj"}[k],
+                                 key="key_g")
+
+        if st.button(" 计算全部组合", key="calc_g", use_container_width=True):
+            try:
+                from multi_bay import all_schedules, evaluate_schedules, parse_schedules, schedule_table
+
+                if mode_g == "custom":
+                    openings_g = parse_schedules(text_g, int(n_g))
+                else:
+                    openings_g = all_schedules(int(n_g), symmetric=(mode_g == "symmetric"))
+                with metrics.track('multi_bay'):
+                    eval_g = evaluate_schedules(
+                        Q_g, openings_g, b0_g, dc_g, db_g, key=key_g,
+                        base={'sigma0': sigma0, 'alpha': alpha, 'b1': b1, 'b2': b2, 'T0': T0,
+                              'p': p, 'hs': hs, 'Ls': Ls, 'beta': beta, 'g': g},
+                    )
+                metrics.CALC_ROWS.inc('multi_bay', amount=eval_g['q'].size)
+                st.session_state.multi_bay_result = (key_g, eval_g, schedule_table(eval_g, openings_g, key_g))
+            except Exception as e:
+                st.error(f" 计算错误：{str(e)}")
+
+        if "multi_bay_result" in st.session_state:
+            import pandas as pd
+
+            key_g, eval_g, table_g = st.session_state.multi_bay_result
+            gov = eval_g['governing']
+            n_bad_g = int(eval_g['infeasible'].sum())
+            if n_bad_g:
+                st.error(f" {n_bad_g} / {len(table_g['openings'])} 个组合有开启闸孔无法求解收缩水深"
+                         f"（单宽流量过大），控制组合取其中单宽流量最大者")
+            if gov is None:
+                st.error(" 全部组合均无开启闸孔，请检查开启组合")
+            else:
+                col_h1, col_h2, col_h3, col_h4 = st.columns(4)
+                col_h1.metric("控制组合", "".join("1" if v >= 1 else ("0" if v <= 0 else "◐") for v in gov['openings']))
+                col_h2.metric("控制孔", f"第 {gov['bay'] + 1} 孔")
+                col_h3.metric("q - 单宽流量", f"{gov['q']:.3f} m³/(s·m)")
+                col_h4.metric({"d": "d - 消力池深度", "Lsj": "Lsj - 护坦长度"}[key_g],
+                              "无解" if gov['infeasible'] else f"{gov[key_g]:.4f} m")
+                if not gov['infeasible']:
+                    st.caption(f"共 {len(table_g['openings'])} 个组合；控制孔 hc = {gov['hc']:.4f} m，"
+                               f"h''c = {gov['hc_double_prime']:.4f} m，d = {gov['d']:.4f} m，Lsj = {gov['Lsj']:.4f} m")
+            st.dataframe(pd.DataFrame(table_g).rename(columns={
+                'openings': '开启组合', 'n_open': '开启孔数', 'infeasible': '不可行', 'governing_bay': '控制孔',
+                'q_max': '最大单宽流量'}),
+                use_container_width=True)
+
+_exp_opt = _lazy_expander(" 消力池尺寸优化（σ₀、β、b₂、Lₛ）", key="exp_opt")
+with _exp_opt:
+    if _is_open(_exp_opt):
+        st.markdown("### 开挖量与底板混凝土量最小化")
+        st.markdown("以上方输入的 q、T₀、h′ₛ 等为固定参数，在规范范围内搜索 σ₀、β，并在给定范围内搜索 b₂、Lₛ。")
+
+        col_o1, col_o2 = st.columns([1, 1])
+
+        with col_o1:
+            st.markdown("#### 优化范围")
+            b2_lo_o, b2_hi_o = st.slider("b₂ 范围 (m)", min_value=0.1, max_value=100.0,
+                                         value=_recall("b2_o", (min(float(b1), 100.0), min(float(max(b2, b1) * 1.5), 100.0))),
+                                         step=0.1, key="b2_o")
+            Ls_lo_o, Ls_hi_o = st.slider("Lₛ 范围 (m)", min_value=0.0, max_value=100.0,
+                                         value=_recall("Ls_o", (min(float(Ls), 100.0), min(float(Ls), 100.0))),
+                                         step=0.1, key="Ls_o")
+            dH_o = st.number_input("ΔH' - 上下游水位差 (m)", min_value=0.01, value=_recall("dH_o", max(T0 - hs, 0.01)), step=0.1, key="dH_o")
+            k1_o = st.number_input("k₁ - 底板计算系数", min_value=0.1, value=_recall("k1_o", 0.175), step=0.005, format="%.3f", key="k1_o")
+            w_ex_o = st.number_input("开挖量权重", min_value=0.0, value=_recall("w_ex_o", 1.0), step=0.1, key="w_ex_o")
+            w_co_o = st.number_input("混凝土量权重", min_value=0.0, value=_recall("w_co_o", 1.0), step=0.1, key="w_co_o")
+
+        with col_o2:
+            st.markdown("#### 优化结果")
+            if st.button(" 开始优化", key="calc_opt", use_container_width=True):
+                try:
+                    from basin_optimizer import make_excavation_cost, optimize_basin
+
+                    with metrics.track('optimize'):
+                        opt = optimize_basin(
+                            base={'alpha': alpha, 'q': q, 'b1': b1, 'T0': T0, 'p': p, 'hs': hs, 'g': g},
+                            b2_range=(b2_lo_o, b2_hi_o),
+                            Ls_range=(Ls_lo_o, Ls_hi_o),
+                            cost=make_excavation_cost(delta_H=dH_o, k1=k1_o,
+                                                      unit_excavation=w_ex_o, unit_concrete=w_co_o),
+                        )
+                    if opt['best'] is None:
+                        st.error(" 给定范围内无可行方案，请检查输入参数")
+                    else:
+                        st.session_state.opt_result = opt
+                        st.success(f" 优化完成！共计算 {opt['n_evaluated']} 个方案")
+                except Exception as e:
+                    st.error(f" 优化错误：{str(e)}")
+
+            if "opt_result" in st.session_state:
+                best = st.session_state.opt_result['best']
+                col_a, col_b = st.columns(2)
+                with col_a:
+                    st.metric("σ₀", f"{best['inputs']['sigma0']:.3f}")
+                    st.metric("β", f"{best['inputs']['beta']:.3f}")
+                    st.metric("d - 消力池深度", f"{best['results']['d']:.4f} m")
+                with col_b:
+                    st.metric("b₂ - 末槛宽度", f"{best['inputs']['b2']:.3f} m")
+                    st.metric("Lₛ - 斜坡水平投影", f"{best['inputs']['Ls']:.3f} m")
+                    st.metric("Lsj - 护坦长度", f"{best['results']['Lsj']:.4f} m")
+                st.metric("造价指标", f"{best['cost']:.2f}")
+
+                with st.expander("池深-池长 Pareto 前沿"):
+                    st.dataframe(st.session_state.opt_result['pareto'], use_container_width=True)
+
+_exp_batch = _lazy_expander(" 批量工况表上传计算（CSV / XLSX）", key="exp_batch")
+with _exp_batch:
+    if _is_open(_exp_batch):
+        st.markdown("### 批量工况计算")
+        st.markdown("表头使用参数名（sigma0、alpha、q、b1、b2、T0、p、hs、Ls、beta、g），缺少的列取默认值；"
+                    "含 delta_H/U/gamma/hd/Pm/gamma_b、qs/delta_H/Ks、qm/v0/hm 列时同时计算 B.1.3、B.2.1、B.3。"
+                    "输入有误的行不中断计算，结果为空并在 message 列说明。")
+    
+        from batch_upload import template_csv
+        st.download_button("📄 下载上传模板", data=template_csv(), file_name="批量工况模板.csv",
+                           mime="text/csv", key="tpl_b")
+        uploaded_b = st.file_uploader("上传工况表", type=["csv", "xlsx"], key="upload_b")
+    
+        if uploaded_b is not None:
+            from batch_upload import compute_table, read_table
+        
+            file_key = (uploaded_b.name, uploaded_b.size, getattr(uploaded_b, "file_id", None))
+            cached_b = st.session_state.get("batch_key") == file_key
+            metrics.cache('batch_table', cached_b)
+            if not cached_b:
+                try:
+                    with metrics.track('batch'):
+                        st.session_state.batch_table = compute_table(read_table(uploaded_b.getvalue(), uploaded_b.name))
+                    metrics.CALC_ROWS.inc('batch', amount=len(st.session_state.batch_table['status']))
+                    st.session_state.batch_key = file_key
+                    st.session_state.pop("batch_csv", None)
+                    st.session_state.pop("batch_xlcc", None)
+                    st.session_state.pop("batch_zip_job", None)
+                    st.session_state.pop("batch_zip_data", None)
+                    st.session_state.pop("batch_docx_job", None)
+                    st.session_state.pop("batch_docx_data", None)
+                except ImportError as e:
+                    st.warning(f"⚠️ {e}")
+                except Exception as e:
+                    st.error(f"❌ 读取或计算失败：{str(e)}")
+    
+        if uploaded_b is None and "batch_table" in st.session_state:
+            # 面板折叠后上传控件被清空，保留的是上次文件的计算结果
+            col_k1, col_k2 = st.columns([3, 1])
+            col_k1.caption(f"显示上次上传的 {st.session_state.batch_key[0]} 的结果；重新上传即替换")
+            if col_k2.button("清除结果", use_container_width=True, key="clear_b"):
+                for k in ("batch_table", "batch_key", "batch_csv", "batch_xlcc", "batch_zip_job", "batch_zip_data",
+                          "batch_docx_job", "batch_docx_data"):
+                    st.session_state.pop(k, None)
+                st.rerun()
+
+        if "batch_table" in st.session_state:
+            import pandas as pd
+            from batch_upload import MESSAGE_KEY, to_csv_bytes, to_xlcc_bytes
+            from validation import is_error
+        
+            table_b = st.session_state.batch_table
+            n_rows = len(table_b[MESSAGE_KEY])
+            n_bad = int(is_error(table_b['status']).sum())
+            st.success(f" 共 {n_rows} 行，计算完成；其中 {n_bad} 行输入有误")
+        
+            col_p1, col_p2 = st.columns(2)
+            with col_p1:
+                page_size = st.selectbox("每页行数", [50, 100, 200, 500], key="page_size_b",
+                                         index=_recall_index("page_size_b", [50, 100, 200, 500], 1))
+            n_pages = max(1, -(-n_rows // page_size))
+            with col_p2:
+                page = st.number_input(f"页码（共 {n_pages} 页）", min_value=1, max_value=n_pages,
+                                       value=min(_recall("page_b", 1), n_pages), step=1, key="page_b")
+            start = (page - 1) * page_size
+            st.dataframe(pd.DataFrame({k: v[start:start + page_size] for k, v in table_b.items()},
+                                      index=range(start + 1, min(start + page_size, n_rows) + 1)),
+                         use_container_width=True)
+        
+            col_d1, col_d2 = st.columns(2)
+            with col_d1:
+                if "batch_csv" in st.session_state:
+                    st.download_button("💾 下载全部结果（CSV）", data=st.session_state.batch_csv,
+                                       file_name="批量计算结果.csv", mime="text/csv",
+                                       use_container_width=True, key="dl_csv_b")
+                elif st.button("准备 CSV 下载", use_container_width=True, key="prep_csv_b"):
+                    st.session_state.batch_csv = to_csv_bytes(table_b)
+                    st.rerun()
+            with col_d2:
+                if "batch_xlcc" in st.session_state:
+                    st.download_button("💾 下载全部结果（列式 .xlcc）", data=st.session_state.batch_xlcc,
+                                       file_name="批量计算结果.xlcc", mime="application/octet-stream",
+                                       use_container_width=True, key="dl_xlcc_b")
+                elif st.button("准备 .xlcc 下载", use_container_width=True, key="prep_xlcc_b"):
+                    st.session_state.batch_xlcc = to_xlcc_bytes(table_b)
+                    st.rerun()
+        
+            col_r1, col_r2 = st.columns(2)
+            with col_r1:
+                batch_fmt = st.radio("批量报告格式", ["html", "md"], format_func=lambda k: {"html": "HTML", "md": "Markdown"}[k],
+                                     index=_recall_index("batch_fmt", ["html", "md"]), horizontal=True, key="batch_fmt")
+            with col_r2:
+                prep_zip = st.button("📦 生成全部报告（zip）", use_container_width=True, key="prep_zip_b")
+        
+            # 报告压缩包、Word 汇总表与单工况报告共用报告队列（每用户与全局并发上限）
+            if prep_zip:
+                from report_queue import ReportQueueFull
+                from report_render import batch_zip_bytes
+                try:
+                    st.session_state.batch_zip_job = _report_queue().submit(
+                        _session_id(), metrics.timed_report(batch_zip_bytes, batch_fmt), table_b, batch_fmt, project_name)
+                    st.session_state.batch_zip_name = f"{project_name}_批量报告_{batch_fmt}.zip"
+                    st.session_state.batch_zip_mime = "application/zip"
+                    st.session_state.pop("batch_zip_data", None)
+                except ReportQueueFull as e:
+                    metrics.REPORTS.inc(batch_fmt, "rejected")
+                    st.warning(f"⚠️ {e}")
+            if "batch_zip_job" in st.session_state or "batch_zip_data" in st.session_state:
+                _report_panel("batch_zip")
+        
+            if st.button("📄 生成 Word 汇总表", use_container_width=True, key="prep_docx_b"):
+                from report_queue import ReportQueueFull
+                try:
+                    from word_export import export_batch_table_to_bytes
+                    st.session_state.batch_docx_job = _report_queue().submit(
+                        _session_id(), metrics.timed_report(export_batch_table_to_bytes, "docx"), table_b, project_name)
+                    st.session_state.batch_docx_name = f"{project_name}_批量计算汇总.docx"
+                    st.session_state.batch_docx_mime = ("application/vnd.openxmlformats-officedocument"
+                                                        ".wordprocessingml.document")
+                    st.session_state.pop("batch_docx_data", None)
+                except ImportError as e:
+                    st.warning(f"⚠️ {e}")
+                except ReportQueueFull as e:
+                    metrics.REPORTS.inc("docx", "rejected")
+                    st.warning(f"⚠️ {e}")
+            if "batch_docx_job" in st.session_state or "batch_docx_data" in st.session_state:
+                _report_panel("batch_docx")
+_exp_rating = _lazy_expander(" 闸门泄流能力表 Q(H, e)", key="exp_rating")
+with _exp_rating:
+    if _is_open(_exp_rating):
+        st.markdown("### 闸前水头 × 闸门开度 → 过闸流量")
+        st.markdown("按 A.0.1 ~ A.0.3（堰流、高淹没堰流、孔流及淹没孔流）在水头 × 开度网格上预计算流量，"
+                    "闸门参数不变时复用同一张表，查询为插值。")
+
+        col_r1, col_r2, col_r3 = st.columns(3)
+        with col_r1:
+            n_r = st.number_input("N - 孔数", min_value=1, max_value=50, value=_recall("n_r", 4), step=1, key="n_r")
+            b0_r = st.number_input("b0 - 单孔净宽 (m)", min_value=0.1, value=_recall("b0_r", 8.0), step=0.5, key="b0_r")
+            dc_r = st.number_input("d_c - 中间墩厚 (m)", min_value=0.0, value=_recall("dc_r", 1.5), step=0.1, key="dc_r")
+        with col_r2:
+            db_r = st.number_input("d_b - 边墩厚 (m)", min_value=0.0, value=_recall("db_r", 2.0), step=0.1, key="db_r")
+            m_r = st.number_input("m - 堰流流量系数", min_value=0.2, max_value=0.5, value=_recall("m_r", 0.385), step=0.005, format="%.3f", key="m_r")
+            phi_r = st.number_input("φ - 孔流流速系数", min_value=0.9, max_value=1.0, value=_recall("phi_r", 0.97), step=0.01, key="phi_r")
+        with col_r3:
+            hs_r = st.number_input("hs - 闸槛以上下游水深 (m)", min_value=0.0, value=_recall("hs_r", 0.0), step=0.1, key="hs_r")
+            H_max_r = st.number_input("表内最大水头 H (m)", min_value=0.5, value=_recall("Hmax_r", 10.0), step=0.5, key="Hmax_r")
+            e_max_r = st.number_input("表内最大开度 e (m)", min_value=0.1, value=_recall("emax_r", 8.0), step=0.5, key="emax_r")
+
+        try:
+            from gate_rating import REGIME_NAMES, GateConfig, rating_table
+
+            cfg_r = GateConfig(b0=b0_r, n_bays=int(n_r), dc=dc_r, db=db_r, m=m_r, phi=phi_r, hs=hs_r)
+            with metrics.track('rating'):
+                table_r = rating_table(cfg_r, float(H_max_r), float(e_max_r))
+
+            import numpy as np
+            import pandas as pd
+
+            H_axis = np.linspace(table_r.H[1], table_r.H[-1], 100)
+            e_marks = np.linspace(0.0, float(e_max_r), 6)[1:]
+            st.line_chart(pd.DataFrame({f"e = {e:.2f} m": table_r.discharge(H_axis, e) for e in e_marks},
+                                       index=pd.Index(H_axis, name="H (m)")))
+
+            col_q1, col_q2 = st.columns(2)
+            with col_q1:
+                st.markdown("#### 查流量")
+                H_q = st.number_input("H - 闸前水头 (m)", min_value=0.0, value=_recall("H_q", min(6.0, float(H_max_r))), step=0.1, key="H_q")
+                e_q = st.number_input("e - 闸门开度 (m)", min_value=0.0, value=_recall("e_q", min(2.0, float(e_max_r))), step=0.1, key="e_q")
+                st.metric("Q - 过闸流量", f"{float(table_r.discharge(H_q, e_q)):.2f} m³/s")
+                st.caption(f"流态：{REGIME_NAMES[int(table_r.regime_at(H_q, e_q))]}")
+            with col_q2:
+                st.markdown("#### 反查开度")
+                H_o = st.number_input("H - 闸前水头 (m)", min_value=0.0, value=_recall("H_o", min(6.0, float(H_max_r))), step=0.1, key="H_o")
+                Q_o = st.number_input("Q - 目标流量 (m³/s)", min_value=0.0, value=_recall("Q_o", 300.0), step=10.0, key="Q_o")
+                e_o = float(table_r.opening(H_o, Q_o))
+                st.metric("e - 所需开度", "超出泄流能力" if not np.isfinite(e_o) else f"{e_o:.3f} m")
+
+            if st.session_state.get("rating_file", (None,))[0] == cfg_r:
+                st.download_button("💾 下载泄流能力表（.xlcc）", data=st.session_state.rating_file[1],
+                                   file_name="泄流能力表.xlcc", mime="application/octet-stream", key="dl_rating")
+            elif st.button("准备泄流能力表下载", key="prep_rating"):
+                import os
+                import tempfile
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    with open(table_r.save(os.path.join(tmp, "rating.xlcc")), "rb") as f:
+                        st.session_state.rating_file = (cfg_r, f.read())
+                st.rerun()
+        except Exception as e:
+            st.error(f" 计算错误：{str(e)}")
+
+_exp_profile = _lazy_expander(" 水面线推算（渐变流，水跃定位）", key="exp_profile")
+with _exp_profile:
+    if _is_open(_exp_profile):
+        st.markdown("### 斜坡、消力池与海漫水面线")
+        st.markdown("以上方输入为准，自收缩断面向下游、自下游水深向上游按渐变流方程推算水面线，"
+                    "按动量方程（共轭水深）定位水跃，给出沿程水深与流速。")
+
+        col_w1, col_w2, col_w3 = st.columns(3)
+        with col_w1:
+            n_w = st.number_input("n - 池底糙率", min_value=0.008, max_value=0.05, value=_recall("n_w", 0.014), step=0.001, format="%.3f", key="n_w")
+        with col_w2:
+            n_apron_w = st.number_input("n - 海漫糙率", min_value=0.008, max_value=0.06, value=_recall("n_apron_w", 0.025), step=0.001, format="%.3f", key="n_apron_w")
+        with col_w3:
+            Lp_default = float(st.session_state.apron_result['Lp']) if "apron_result" in st.session_state else 30.0
+            Lp_w = st.number_input("Lp - 海漫长度 (m)", min_value=0.0, value=_recall("Lp_w", Lp_default), step=1.0, key="Lp_w")
+
+        if st.button(" 推算水面线", key="calc_w", use_container_width=True):
+            try:
+                from water_profile import compute_profile, jump_summary, profile_table
+
+                with metrics.track('profile'):
+                    prof_w = compute_profile(n=n_w, Lp=Lp_w if Lp_w > 0 else None, n_apron=n_apron_w,
+                                             sigma0=sigma0, alpha=alpha, q=q, b1=b1, b2=b2, T0=T0,
+                                             p=p, hs=hs, Ls=Ls, beta=beta, g=g)
+                st.session_state.profile_result = (jump_summary(prof_w, 0), profile_table(prof_w, 0))
+            except Exception as e:
+                st.error(f" 推算错误：{str(e)}")
+
+        if "profile_result" in st.session_state:
+            import pandas as pd
+            from water_profile import JUMP_IN_BASIN, NO_SOLUTION
+
+            jump_w, table_w = st.session_state.profile_result
+            if jump_w['jump'] == NO_SOLUTION:
+                st.error(" 无法求解收缩水深 hc，请检查输入参数")
+            else:
+                (st.success if jump_w['jump'] == JUMP_IN_BASIN else st.warning)(f"水跃状态：{jump_w['jump_name']}")
+                col_j1, col_j2, col_j3, col_j4 = st.columns(4)
+                col_j1.metric("跃首位置（距斜坡顶）", f"{jump_w['x_jump']:.2f} m")
+                col_j2.metric("跃前水深 h₁", f"{jump_w['h1']:.3f} m")
+                col_j3.metric("跃后水深 h₂", f"{jump_w['h2']:.3f} m")
+                col_j4.metric("水跃区长度", f"{jump_w['L_roller']:.2f} m", delta=f"{jump_w['L_roller'] - jump_w['Lj']:+.2f} m（对比 Lⱼ）",
+                              delta_color="off")
+                frame_w = pd.DataFrame(table_w)
+                st.line_chart(frame_w.set_index('x')[['bed', 'surface']].rename(columns={'bed': '底高程', 'surface': '水面高程'}))
+                st.dataframe(frame_w.rename(columns={'x': '桩号 (m)', 'part': '区段', 'bed': '底高程 (m)', 'h': '水深 (m)',
+                                                     'surface': '水面高程 (m)', 'v': '流速 (m/s)'}),
+                             use_container_width=True)
+
+_exp_sweep = _lazy_expander(" 参数扫描可视化（热力图 / 等值线）", key="exp_sweep")
+with _exp_sweep:
+    if _is_open(_exp_sweep):
+        st.markdown("### 双参数扫描")
+        st.markdown("以上方输入为固定参数，对两个参数做网格扫描。服务端按视窗聚合到至多 "
+                    "4 万个格子后再绘图，网格再大图表数据量也不变；在图上框选区域即放大并以更高分辨率重新计算。")
+        from basin_batch import INPUT_KEYS as _SWEEP_KEYS
+        from sweep_view import AGGREGATES, FIELDS
+
+        col_v1, col_v2, col_v3 = st.columns(3)
+        with col_v1:
+            x_key_v = st.selectbox("横轴参数", _SWEEP_KEYS, index=_recall_index("x_key_v", _SWEEP_KEYS, _SWEEP_KEYS.index('q')), key="x_key_v")
+            x_lo_v, x_hi_v = st.slider("横轴范围", min_value=0.01, max_value=100.0, value=_recall("x_rng_v", (1.0, 20.0)), step=0.01, key="x_rng_v")
+        with col_v2:
+            y_key_v = st.selectbox("纵轴参数", _SWEEP_KEYS, index=_recall_index("y_key_v", _SWEEP_KEYS, _SWEEP_KEYS.index('T0')), key="y_key_v")
+            y_lo_v, y_hi_v = st.slider("纵轴范围", min_value=0.01, max_value=100.0, value=_recall("y_rng_v", (3.0, 30.0)), step=0.01, key="y_rng_v")
+        with col_v3:
+            field_v = st.selectbox("显示字段", list(FIELDS), index=_recall_index("field_v", list(FIELDS)), format_func=lambda k: FIELDS[k][0], key="field_v")
+            how_v = st.selectbox("块内聚合", AGGREGATES, index=_recall_index("how_v", AGGREGATES), format_func=lambda k: {"mean": "均值", "max": "最大", "min": "最小"}[k], key="how_v")
+            n_v = st.select_slider("名义分辨率（每轴点数）", options=[100, 200, 500, 1000, 2000], value=_recall("n_v", 1000), key="n_v")
+
+        if x_key_v == y_key_v:
+            st.warning("⚠️ 横轴与纵轴参数需不同")
+        else:
+            base_v = {'sigma0': sigma0, 'alpha': alpha, 'q': q, 'b1': b1, 'b2': b2, 'T0': T0,
+                      'p': p, 'hs': hs, 'Ls': Ls, 'beta': beta, 'g': g}
+            spec_v = (x_key_v, x_lo_v, x_hi_v, y_key_v, y_lo_v, y_hi_v, n_v)
+            if st.session_state.get("view_spec") != spec_v:
+                st.session_state.view_spec = spec_v
+                st.session_state.view_window = None
+                st.session_state.view_zoom = None
+            window_v = st.session_state.view_window
+
+            import numpy as np
+            from sweep_view import view_chart
+
+            @st.cache_data(max_entries=16, show_spinner=False)
+            def _sweep_view(x_key, x_range, y_key, y_range, n, field, how, window, base):
+                from sweep_view import grid_view
+                return grid_view(x_key, np.linspace(*x_range, n), y_key, np.linspace(*y_range, n),
+                                 field=field, window=window, base=base, how=how)
+
+            try:
+                with metrics.track('sweep_view'):
+                    view_v = _sweep_view(x_key_v, (x_lo_v, x_hi_v), y_key_v, (y_lo_v, y_hi_v), n_v,
+                                         field_v, how_v, window_v, base_v)
+                nx_v, ny_v = view_v['full_shape']
+                fx_v, fy_v = view_v['block']
+                st.caption(f"视窗内 {nx_v}×{ny_v} 个网格点，每格聚合 {fx_v}×{fy_v} 点，显示 {view_v['z'].shape[0]}×{view_v['z'].shape[1]} 格")
+                event_v = st.altair_chart(view_chart(view_v), use_container_width=True, on_select="rerun",
+                                          key=f"chart_v{st.session_state.get('view_reset', 0)}")
+                zoom_v = (event_v.get("selection") or {}).get("zoom") or {}
+                if zoom_v.get("x") and zoom_v.get("y"):
+                    new_window = (*sorted(map(float, zoom_v["x"])), *sorted(map(float, zoom_v["y"])))
+                    if new_window != st.session_state.get("view_zoom"):
+                        st.session_state.view_zoom = new_window
+                        st.session_state.view_window = new_window
+                        st.rerun()
+                if window_v is not None and st.button("↺ 还原全范围", key="reset_v"):
+                    # 同时清除上次框选并换用新的图表键，还原后可再次框选同一区域
+                    st.session_state.view_window = None
+                    st.session_state.view_zoom = None
+                    st.session_state.view_reset = st.session_state.get('view_reset', 0) + 1
+                    st.rerun()
+            except Exception as e:
+                st.error(f" 扫描计算错误：{str(e)}")
+
+_remember_inputs()
+
 # 页脚
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,242 @@
+"""消力池计算 - 向量化批量计算
+
+公式来源：附录 B.1，由 formulas 注册表编译，与 app.py 单工况计算一致（h_c、h_c''、ΔZ、d、ΔE、L_j、L_sj）。
+所有输入均可为标量或 NumPy 数组，按广播规则一次完成整批计算，
+无法求解 h_c 的工况结果为 NaN，不中断整批计算。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from formulas import BASIN_OUTPUTS, DEFAULT_SET, compile_kernel, solve_hc_array
+from scenario_store import ColumnWriter, open_columns
+from validation import is_error, validate_basin_inputs
+
+
+# 输入参数名（与 st.session_state.input_params 一致）
+INPUT_KEYS = ('sigma0', 'alpha', 'q', 'b1', 'b2', 'T0', 'p', 'hs', 'Ls', 'beta', 'g')
+
+# 结果字段名（与 st.session_state.result 一致）
+RESULT_KEYS = BASIN_OUTPUTS
+
+# B.1.3 底板厚度结果字段
+THICKNESS_KEYS = ('t_impact', 't_float', 't_design', 't_final')
+
+# 批量文件中的逐行状态码字段（见 validation）
+STATUS_KEY = 'status'
+
+# 默认参数（与 Web 版、桌面版示例一致）
+DEFAULTS = {
+    'sigma0': 1.05,
+    'alpha': 1.00,
+    'q': 5.0,
+    'b1': 10.0,
+    'b2': 12.0,
+    'T0': 8.0,
+    'p': 1.0,
+    'hs': 3.0,
+    'Ls': 5.0,
+    'beta': 0.75,
+    'g': 9.81,
+}
+
+
+# 收缩水深批量求解（实现见 formulas.solve_hc_array）
+solve_hc_batch = solve_hc_array
+
+
+def compute_basin_batch(sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g=9.81,
+                        formula_set: str = DEFAULT_SET) -> Dict[str, np.ndarray]:
+    """批量计算消力池（B.1.1、B.1.2），公式取自 formulas 注册表
+
+    Args:
+        sigma0: 跃前淹没系数
+        alpha: 动能校正系数
+        q: 单宽流量 (m³/s/m)
+        b1, b2: 首、末槛宽度 (m)
+        T0: 总势能 (m)
+        p: 流速系数 φ（p<=0 时取 1.0）
+        hs: 出池河床水深 (m)
+        Ls: 斜坡水平投影 (m)
+        beta: 水跃长度校正系数
+        g: 重力加速度 (m/s²)
+        formula_set: 公式集名称（见 formulas.register_set）
+
+    Returns:
+        结果字典，键同 RESULT_KEYS，值为广播后形状的数组
+    """
+    args = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in
+                                 (sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g)))
+    return compile_kernel(formula_set, RESULT_KEYS)(**dict(zip(INPUT_KEYS, args)))
+
+
+def compute_basin_checked(sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g=9.81):
+    """先整批校验再计算，错误行结果置 NaN，其余行照常计算
+
+    Returns:
+        (results, codes)：结果字典与 validation 状态码数组
+    """
+    codes = validate_basin_inputs(sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g)
+    # 标量输入时计算核返回 NumPy 标量；部分结果键共用同一数组（如 hc_prime_adj 与 hc_double_prime），
+    # 逐键复制为至少一维的独立数组后再置 NaN
+    results = {k: np.array(v, dtype=float, ndmin=1)
+               for k, v in compute_basin_batch(sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g).items()}
+    bad = is_error(codes)
+    if np.any(bad):
+        for v in results.values():
+            v[np.broadcast_to(bad, v.shape)] = np.nan
+    return results, codes
+
+
+def slab_thickness_batch(q, delta_H, U, gamma, hd, Pm, gamma_b, k1=0.175, k2=1.2, plus=True) -> Dict[str, np.ndarray]:
+    """批量计算消力池底板厚度（B.1.3）
+
+    Args:
+        q: 单宽流量 (m³/s/m)
+        delta_H: 上下游水位差 ΔH' (m)
+        U: 底面扬压力 (kPa)
+        gamma: 水重力密度 (kN/m³)
+        hd: 消力池内水深 (m)
+        Pm: 脉动压力 (kPa)
+        gamma_b: 底板饱和容重 (kN/m³)
+        k1: 计算系数（0.15~0.20）
+        k2: 安全系数（1.1~1.3）
+        plus: 脉动压力取正号（前半部）或负号（后半部），可为布尔数组
+
+    Returns:
+        包含 t_impact、t_float、t_design、t_final 的字典
+    """
+    sign = np.where(plus, 1.0, -1.0)
+    return compile_kernel(DEFAULT_SET, THICKNESS_KEYS)(
+        q=q, delta_H=delta_H, U=U, gamma=gamma, hd=hd, Pm=Pm, gamma_b=gamma_b, k1=k1, k2=k2, sign=sign)
+
+
+def apron_length_batch(qs, delta_H, Ks) -> Dict[str, np.ndarray]:
+    """批量计算海漫长度（B.2.1）
+
+    Args:
+        qs: 消力池末端单宽流量 (m³/(s·m))
+        delta_H: 上下游水位差 ΔH' (m)
+        Ks: 海漫长度计算系数
+
+    Returns:
+        包含 Lp 与适用性检验值 check 的字典
+    """
+    return compile_kernel(DEFAULT_SET, ('Lp', 'check'))(qs=qs, delta_H=delta_H, Ks=Ks)
+
+
+def scour_depth_batch(qm, v0, hm, coef=1.1) -> np.ndarray:
+    """批量计算河床冲刷深度（B.3）
+
+    Args:
+        qm: 单宽流量 (m³/(s·m))
+        v0: 河床土质允许不冲流速 (m/s)
+        hm: 河床水深 (m)
+        coef: 海漫末端取 1.1（B.3.1），上游护底首端取 0.8（B.3.2）
+
+    Returns:
+        冲刷深度数组
+    """
+    return compile_kernel(DEFAULT_SET, ('dm',))(qm=qm, v0=v0, hm=hm, k_scour=coef)['dm']
+
+
+def grid_sweep(**axes) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """参数网格扫描
+
+    未给出的参数取 DEFAULTS；给出的参数可为标量或一维数组，
+    一维数组按笛卡尔积展开为网格，展平后整批计算。
+
+    Args:
+        **axes: 参数名 -> 标量或一维取值序列
+
+    Returns:
+        (inputs, results)：展平后的输入字典与结果字典，长度均为网格点数
+    """
+    values = _grid_axes(axes)
+    mesh = np.meshgrid(*(values[k] for k in INPUT_KEYS), indexing='ij')
+    inputs = {k: m.ravel() for k, m in zip(INPUT_KEYS, mesh)}
+    return inputs, compute_basin_batch(**inputs)
+
+
+def _grid_axes(axes: dict) -> Dict[str, np.ndarray]:
+    unknown = set(axes) - set(INPUT_KEYS)
+    if unknown:
+        raise ValueError(f"未知参数：{', '.join(sorted(unknown))}")
+    return {k: np.atleast_1d(np.asarray(axes.get(k, DEFAULTS[k]), dtype=float)) for k in INPUT_KEYS}
+
+
+def grid_size(**axes) -> int:
+    """网格点总数"""
+    return int(np.prod([v.size for v in _grid_axes(axes).values()]))
+
+
+def grid_slice(start: int, stop: int, **axes) -> Dict[str, np.ndarray]:
+    """取网格展平序号 [start, stop) 范围内的输入参数（顺序与 grid_sweep 一致）"""
+    values = _grid_axes(axes)
+    shape = tuple(values[k].size for k in INPUT_KEYS)
+    idx = np.unravel_index(np.arange(start, min(stop, int(np.prod(shape))), dtype=np.int64), shape)
+    return {k: values[k][i] for k, i in zip(INPUT_KEYS, idx)}
+
+
+def iter_grid_chunks(chunk_rows: int = 1_000_000, **axes) -> Iterator[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]]:
+    """分块网格扫描，每块不超过 chunk_rows 行，内存占用与网格规模无关"""
+    total = grid_size(**axes)
+    for start in range(0, total, chunk_rows):
+        inputs = grid_slice(start, start + chunk_rows, **axes)
+        yield inputs, compute_basin_batch(**inputs)
+
+
+def sweep_to_file(path: str, chunk_rows: int = 1_000_000, float32: bool = False, **axes) -> str:
+    """分块网格扫描并写出列式文件（字段为 INPUT_KEYS + RESULT_KEYS + status）
+
+    Args:
+        path: 输出文件路径（.xlcc）
+        chunk_rows: 每块行数
+        float32: 以 float32 存储
+        **axes: 同 grid_sweep
+
+    Returns:
+        输出文件路径
+    """
+    meta = {'kind': 'grid_sweep',
+            'axes': {k: np.atleast_1d(v).tolist() for k, v in axes.items()}}
+    with ColumnWriter(path, INPUT_KEYS + RESULT_KEYS + (STATUS_KEY,), float32=float32, meta=meta) as w:
+        for start in range(0, grid_size(**axes), chunk_rows):
+            inputs = grid_slice(start, start + chunk_rows, **axes)
+            results, codes = compute_basin_checked(**inputs)
+            w.append({**inputs, **results, STATUS_KEY: codes})
+    return path
+
+
+def compute_basin_file(in_path: str, out_path: str, chunk_rows: int = 1_000_000,
+                       float32: bool = False, meta: Optional[dict] = None) -> str:
+    """读取列式输入文件，分块计算后写出列式结果文件
+
+    输入文件缺少的参数列取 DEFAULTS，其余附加列原样保留；
+    校验不通过的行结果为 NaN，并在 status 列记录状态码，不中断整批计算。
+
+    Args:
+        in_path: 输入列式文件
+        out_path: 输出列式文件
+        chunk_rows: 每块行数
+        float32: 以 float32 存储
+        meta: 写入输出文件头部的附加信息
+
+    Returns:
+        输出文件路径
+    """
+    src = open_columns(in_path)
+    extra = [f for f in src.fields if f not in INPUT_KEYS + RESULT_KEYS + (STATUS_KEY,)]
+    fields = INPUT_KEYS + RESULT_KEYS + (STATUS_KEY,) + tuple(extra)
+    with ColumnWriter(out_path, fields, float32=float32, meta=meta or src.meta) as w:
+        for start in range(0, len(src), chunk_rows):
+            stop = min(start + chunk_rows, len(src))
+            inputs = {k: (src[k][start:stop] if k in src else np.full(stop - start, DEFAULTS[k]))
+                      for k in INPUT_KEYS}
+            results, codes = compute_basin_checked(**inputs)
+            w.append({**inputs, **results, STATUS_KEY: codes, **{k: src[k][start:stop] for k in extra}})
+    return out_path
+
@@ -0,0 +1,160 @@
+"""消力池尺寸优化 - 在规范取值范围内选取 σ₀、β、b₂、Lₛ
+
+以 basin_batch 的向量化计算为基础：先在取值范围内做粗网格整批计算，
+再围绕最优点逐级缩小范围加密计算，同时给出池深 d 与池长 Lsj 的 Pareto 前沿。
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from basin_batch import DEFAULTS, grid_sweep
+from scenario_store import write_columns
+
+
+# 规范推荐取值范围
+CODE_RANGES = {
+    'sigma0': (1.05, 1.10),
+    'beta': (0.7, 0.8),
+}
+
+# 参与优化的参数
+OPT_KEYS = ('sigma0', 'beta', 'b2', 'Ls')
+
+CostFunc = Callable[[Dict[str, np.ndarray], Dict[str, np.ndarray]], np.ndarray]
+
+
+def make_excavation_cost(delta_H: Optional[float] = None, k1: float = 0.175,
+                         unit_excavation: float = 1.0, unit_concrete: float = 1.0) -> CostFunc:
+    """构造默认造价函数：开挖量 + 底板混凝土量
+
+    开挖量取 max(d, 0)·Lsj·b，底板量取 B.1.3-1 抗冲厚度（不小于0.5m）·Lsj·b，
+    其中 b 取首末槛平均宽度。
+
+    Args:
+        delta_H: 上下游水位差 ΔH' (m)，为 None 时近似取 T0 - hs
+        k1: B.1.3-1 计算系数（0.15~0.20）
+        unit_excavation: 单位开挖量造价权重
+        unit_concrete: 单位混凝土量造价权重
+
+    Returns:
+        cost(inputs, results) -> 造价数组
+    """
+    def cost(inputs, results):
+        dH = inputs['T0'] - inputs['hs'] if delta_H is None else delta_H
+        with np.errstate(invalid='ignore'):
+            t = np.maximum(k1 * np.sqrt(inputs['q'] * np.sqrt(dH)), 0.5)
+        area = results['Lsj'] * (inputs['b1'] + inputs['b2']) / 2.0
+        return unit_excavation * np.maximum(results['d'], 0.0) * area + unit_concrete * t * area
+
+    return cost
+
+
+def pareto_front(depth: np.ndarray, length: np.ndarray) -> np.ndarray:
+    """求池深-池长两目标（均取小）的非劣解下标，按池深升序排列"""
+    order = np.lexsort((length, depth))
+    running_min = np.minimum.accumulate(length[order])
+    keep = np.ones(order.size, dtype=bool)
+    keep[1:] = length[order][1:] < running_min[:-1]
+    return order[keep]
+
+
+def _evaluate(base: dict, axes: dict, cost: CostFunc, min_depth: float):
+    inputs, results = grid_sweep(**base, **axes)
+    c = cost(inputs, results)
+    feasible = np.isfinite(results['d']) & np.isfinite(results['Lsj']) & np.isfinite(c) \
+        & (results['d'] >= min_depth)
+    return inputs, results, np.where(feasible, c, np.inf), feasible
+
+
+def optimize_basin(
+    base: Optional[dict] = None,
+    b2_range: Tuple[float, float] = (10.0, 20.0),
+    Ls_range: Tuple[float, float] = (5.0, 5.0),
+    sigma0_range: Tuple[float, float] = CODE_RANGES['sigma0'],
+    beta_range: Tuple[float, float] = CODE_RANGES['beta'],
+    cost: Optional[CostFunc] = None,
+    min_depth: float = 0.0,
+    grid: int = 9,
+    refine_grid: int = 5,
+    refine_iters: int = 6,
+    out_path: Optional[str] = None,
+) -> Dict[str, object]:
+    """优化消力池参数 σ₀、β、b₂、Lₛ
+
+    Args:
+        base: 其余固定参数（q、T0、hs 等），缺省项取 DEFAULTS
+        b2_range, Ls_range, sigma0_range, beta_range: 各优化参数取值范围（上下限相等即固定）
+        cost: 造价函数，缺省为 make_excavation_cost()
+        min_depth: 池深下限约束 (m)
+        grid: 粗网格每维点数
+        refine_grid: 加密网格每维点数
+        refine_iters: 加密迭代次数
+        out_path: 给出时将 Pareto 前沿写出为列式文件（见 scenario_store）
+
+    Returns:
+        字典：best（最优方案的输入、结果与造价）、pareto（池深-池长前沿）、n_evaluated（计算点数）
+    """
+    base = {k: v for k, v in (base or {}).items() if k not in OPT_KEYS}
+    for k in base:
+        if k not in DEFAULTS:
+            raise ValueError(f"未知参数：{k}")
+    cost = cost or make_excavation_cost()
+    bounds = {'sigma0': sigma0_range, 'beta': beta_range, 'b2': b2_range, 'Ls': Ls_range}
+    for k, (lo, hi) in bounds.items():
+        if lo > hi:
+            raise ValueError(f"{k} 取值范围下限大于上限")
+
+    axes = {k: np.linspace(lo, hi, grid if hi > lo else 1) for k, (lo, hi) in bounds.items()}
+    step = {k: (hi - lo) / max(grid - 1, 1) for k, (lo, hi) in bounds.items()}
+
+    collected = []
+    best = None
+    for it in range(refine_iters + 1):
+        inputs, results, c, feasible = _evaluate(base, axes, cost, min_depth)
+        collected.append((inputs, results, c, feasible))
+        i = int(np.argmin(c))
+        if np.isfinite(c[i]) and (best is None or c[i] < best[2]):
+            best = ({k: v[i] for k, v in inputs.items()}, {k: v[i] for k, v in results.items()}, c[i])
+        if best is None or it == refine_iters:
+            break
+
+        # 围绕当前最优点缩小范围
+        centre = best[0]
+        for k, (lo, hi) in bounds.items():
+            if hi == lo:
+                continue
+            a = max(lo, centre[k] - step[k])
+            b = min(hi, centre[k] + step[k])
+            axes[k] = np.linspace(a, b, refine_grid)
+            step[k] = (b - a) / max(refine_grid - 1, 1)
+
+    n_evaluated = sum(item[2].size for item in collected)
+    if best is None:
+        return {'best': None, 'pareto': {}, 'n_evaluated': n_evaluated}
+
+    all_inputs = {k: np.concatenate([item[0][k] for item in collected]) for k in collected[0][0]}
+    all_results = {k: np.concatenate([item[1][k] for item in collected]) for k in ('d', 'Lsj')}
+    all_cost = np.concatenate([item[2] for item in collected])
+    mask = np.concatenate([item[3] for item in collected])
+
+    idx = np.flatnonzero(mask)
+    front = idx[pareto_front(all_results['d'][idx], all_results['Lsj'][idx])]
+    pareto = {k: all_inputs[k][front] for k in OPT_KEYS}
+    pareto.update({k: all_results[k][front] for k in ('d', 'Lsj')})
+    pareto['cost'] = all_cost[front]
+    if out_path:
+        write_columns(out_path, pareto, meta={'kind': 'basin_pareto'})
+
+    best_inputs, best_results, best_cost = best
+    return {
+        'best': {
+            'inputs': {k: float(v) for k, v in best_inputs.items()},
+            'results': {k: float(v) for k, v in best_results.items()},
+            'cost': float(best_cost),
+        },
+        'pareto': pareto,
+        'n_evaluated': n_evaluated,
+    }
@@ -0,0 +1,140 @@
+"""批量工况表 - 上传 CSV / XLSX，整表一次向量化计算
+
+表头使用参数名（与 basin_batch.INPUT_KEYS 一致），缺少的列取默认值；
+含以下列时同时计算附属公式：
+    B.1.3 底板厚度：delta_H, U, gamma, hd, Pm, gamma_b（可选 k1, k2, plus）
+    B.2.1 海漫长度：qs, delta_H, Ks
+    B.3   冲刷深度：qm, v0, hm（B.3.1），qm_up, hm_up（B.3.2，共用 v0）
+其他列（如工况名称）原样保留在结果最前面。
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+from basin_batch import (DEFAULTS, INPUT_KEYS, STATUS_KEY, apron_length_batch,
+                         compute_basin_checked, scour_depth_batch, slab_thickness_batch)
+from scenario_store import SUFFIX, write_columns
+from validation import row_messages, validate_apron_inputs
+
+
+THICKNESS_KEYS = ('delta_H', 'U', 'gamma', 'hd', 'Pm', 'gamma_b')
+APRON_KEYS = ('qs', 'delta_H', 'Ks')
+SCOUR_KEYS = ('qm', 'v0', 'hm')
+SCOUR_UP_KEYS = ('qm_up', 'v0', 'hm_up')
+
+NUMERIC_KEYS = set(INPUT_KEYS) | set(THICKNESS_KEYS) | set(APRON_KEYS) | set(SCOUR_KEYS) \
+    | set(SCOUR_UP_KEYS) | {'k1', 'k2', 'plus'}
+
+MESSAGE_KEY = 'message'
+
+
+def _require_pandas():
+    """检查并导入pandas依赖（随 streamlit 安装）"""
+    try:
+        import pandas as pd
+        return pd
+    except Exception as e:
+        raise ImportError("缺少依赖：pandas（请先 pip install pandas）") from e
+
+
+def read_table(data: bytes, filename: str) -> Dict[str, np.ndarray]:
+    """读取上传的 CSV / XLSX 为 {列名: 数组}
+
+    已知参数列转为浮点数（无法解析的单元格为 NaN，由校验标记），其余列原样保留。
+
+    Args:
+        data: 文件内容
+        filename: 文件名，按扩展名判断格式
+
+    Returns:
+        列字典
+    """
+    pd = _require_pandas()
+    name = filename.lower()
+    if name.endswith('.xlsx'):
+        try:
+            df = pd.read_excel(io.BytesIO(data))
+        except ImportError as e:
+            raise ImportError("读取 Excel 需要 openpyxl（请先 pip install openpyxl）") from e
+    else:
+        df = pd.read_csv(io.BytesIO(data), encoding='utf-8-sig', low_memory=False)
+
+    df.columns = [str(c).strip() for c in df.columns]
+    columns = {}
+    for col in df.columns:
+        if col in NUMERIC_KEYS:
+            columns[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        else:
+            columns[col] = df[col].to_numpy()
+    return columns
+
+
+def compute_table(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """整表校验并计算
+
+    Args:
+        columns: {列名: 数组}，各列等长
+
+    Returns:
+        {列名: 数组}：附加列、输入、B.1 结果、附属公式结果、status、message
+    """
+    n = len(next(iter(columns.values()))) if columns else 0
+    inputs = {k: columns[k] if k in columns else np.full(n, DEFAULTS[k]) for k in INPUT_KEYS}
+    results, codes = compute_basin_checked(**inputs)
+
+    extra = {}
+    if all(k in columns for k in THICKNESS_KEYS):
+        t = slab_thickness_batch(
+            inputs['q'], columns['delta_H'], columns['U'], columns['gamma'], columns['hd'],
+            columns['Pm'], columns['gamma_b'],
+            k1=columns.get('k1', 0.175), k2=columns.get('k2', 1.2),
+            plus=columns['plus'] != 0 if 'plus' in columns else True,
+        )
+        extra.update(t)
+    if all(k in columns for k in APRON_KEYS):
+        codes = codes | validate_apron_inputs(columns['qs'], columns['delta_H'])
+        extra.update(apron_length_batch(columns['qs'], columns['delta_H'], columns['Ks']))
+    if all(k in columns for k in SCOUR_KEYS):
+        extra['dm'] = scour_depth_batch(columns['qm'], columns['v0'], columns['hm'], coef=1.1)
+    if all(k in columns for k in SCOUR_UP_KEYS):
+        extra['dm_prime'] = scour_depth_batch(columns['qm_up'], columns['v0'], columns['hm_up'], coef=0.8)
+
+    labels = {k: v for k, v in columns.items() if k not in NUMERIC_KEYS}
+    aux_inputs = {k: v for k, v in columns.items() if k in NUMERIC_KEYS and k not in INPUT_KEYS}
+    table = {**labels, **inputs, **aux_inputs, **results, **extra}
+    table[STATUS_KEY] = codes
+    table[MESSAGE_KEY] = np.array(row_messages(codes), dtype=object)
+    return table
+
+
+def numeric_columns(table: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """结果中的数值列（用于写出列式文件）"""
+    return {k: v for k, v in table.items() if v.dtype.kind in 'fiub'}
+
+
+def to_xlcc_bytes(table: Dict[str, np.ndarray]) -> bytes:
+    """结果表的数值列导出为列式文件（见 scenario_store）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "batch" + SUFFIX)
+        write_columns(path, numeric_columns(table), meta={'kind': 'upload'})
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def to_csv_bytes(table: Dict[str, np.ndarray]) -> bytes:
+    """结果表导出为 CSV（UTF-8 BOM，Excel 可直接打开）"""
+    pd = _require_pandas()
+    return pd.DataFrame(table).to_csv(index=False, float_format='%.6g').encode('utf-8-sig')
+
+
+def template_csv() -> bytes:
+    """上传模板：参数名表头 + 一行默认值"""
+    header = ['name'] + list(INPUT_KEYS)
+    row = ['示例'] + [str(DEFAULTS[k]) for k in INPUT_KEYS]
+    return (",".join(header) + "\n" + ",".join(row) + "\n").encode('utf-8-sig')
@@ -0,0 +1,231 @@
+"""流式 Word 写出 - 直接生成 WordprocessingML，适用于上万行的大表格
+
+python-docx 为每个段落、每个 run 建立对象树，大表格耗时且占内存。
+本模块把固定部件（样式、关系、内容类型）先写入 zip，正文 document.xml
+以流方式写入，表格逐行追加、分批刷新，内存占用与行数无关。
+版式（宋体、页边距、标题字号）与 word_export._build_doc_base 一致。
+"""
+
+from __future__ import annotations
+
+import os
+import zipfile
+from typing import Iterable, List, Optional, Sequence
+
+from word_export import (FONT_NAME, FONT_SIZE_PT, NOTE_SIZE_PT, PAGE_MARGINS_CM, SECTION_SIZE_PT,
+                         TITLE_SIZE_PT, _ensure_docx_suffix, _xml_text)
+
+
+FLUSH_ROWS = 500        # 表格每累计多少行写入一次
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+
+def _half_points(pt: float) -> int:
+    return int(round(pt * 2))
+
+
+def _twips(cm: float) -> int:
+    return int(round(cm * 567))
+
+
+def _styles_xml() -> str:
+    font = FONT_NAME
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:styles xmlns:w="{_W_NS}">'
+        '<w:docDefaults><w:rPrDefault><w:rPr>'
+        f'<w:rFonts w:ascii="{font}" w:hAnsi="{font}" w:eastAsia="{font}" w:cs="{font}"/>'
+        f'<w:sz w:val="{_half_points(FONT_SIZE_PT)}"/><w:szCs w:val="{_half_points(FONT_SIZE_PT)}"/>'
+        '</w:rPr></w:rPrDefault><w:pPrDefault/></w:docDefaults>'
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/>'
+        '<w:qFormat/></w:style>'
+        '<w:style w:type="table" w:default="1" w:styleId="TableNormal"><w:name w:val="Normal Table"/>'
+        '<w:tblPr><w:tblInd w:w="0" w:type="dxa"/><w:tblCellMar>'
+        '<w:left w:w="108" w:type="dxa"/><w:right w:w="108" w:type="dxa"/>'
+        '</w:tblCellMar></w:tblPr></w:style>'
+        '<w:style w:type="table" w:styleId="TableGrid"><w:name w:val="Table Grid"/>'
+        '<w:basedOn w:val="TableNormal"/><w:tblPr><w:tblBorders>'
+        + "".join(f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="auto"/>'
+                  for side in ("top", "left", "bottom", "right", "insideH", "insideV"))
+        + '</w:tblBorders></w:tblPr></w:style>'
+        '</w:styles>'
+    )
+
+
+def _sect_pr() -> str:
+    m = PAGE_MARGINS_CM
+    return (
+        '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+        f'<w:pgMar w:top="{_twips(m["top"])}" w:right="{_twips(m["right"])}" '
+        f'w:bottom="{_twips(m["bottom"])}" w:left="{_twips(m["left"])}" '
+        'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+    )
+
+
+def _esc(text) -> str:
+    """转义 & < > 并去掉 XML 不允许的控制字符"""
+    return _xml_text(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _run(text: str, size_pt: Optional[float] = None, bold: bool = False, italic: bool = False) -> str:
+    props = ""
+    if bold:
+        props += "<w:b/>"
+    if italic:
+        props += "<w:i/>"
+    if size_pt is not None:
+        props += f'<w:sz w:val="{_half_points(size_pt)}"/>'
+    rpr = f"<w:rPr>{props}</w:rPr>" if props else ""
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{_esc(text)}</w:t></w:r>'
+
+
+class StreamingDocx:
+    """流式写出 .docx
+
+    用法：
+        with StreamingDocx(path) as doc:
+            doc.title("消力池批量计算报告")
+            doc.begin_table(["工况", "d (m)"])
+            for row in rows:
+                doc.add_row(row)
+            doc.end_table()
+            doc.paragraph()         # 表格后需有段落，正文不能以表格结尾
+    """
+
+    def __init__(self, output_path: str) -> None:
+        self.path = _ensure_docx_suffix(output_path)
+        self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+        self._zip.writestr("word/styles.xml", _styles_xml())
+        self._doc = self._zip.open("word/document.xml", "w", force_zip64=True)
+        self._buf: List[str] = []
+        self._rows = 0
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>'
+        )
+
+    def _write(self, text: str) -> None:
+        self._buf.append(text)
+
+    def _flush(self) -> None:
+        if self._buf:
+            self._doc.write("".join(self._buf).encode("utf-8"))
+            self._buf.clear()
+
+    def paragraph(self, text: str = "", size_pt: Optional[float] = None, bold: bool = False,
+                  italic: bool = False, center: bool = False) -> None:
+        """添加段落"""
+        ppr = '<w:pPr><w:jc w:val="center"/></w:pPr>' if center else ""
+        body = _run(text, size_pt, bold, italic) if text else ""
+        self._write(f"<w:p>{ppr}{body}</w:p>")
+
+    def title(self, text: str) -> None:
+        """居中标题（同 word_export._add_centered_title）"""
+        self.paragraph(text, TITLE_SIZE_PT, bold=True, center=True)
+
+    def section(self, text: str) -> None:
+        """章节标题（同 word_export._add_section_title）"""
+        self.paragraph(text, SECTION_SIZE_PT, bold=True)
+
+    def note(self, text: str) -> None:
+        """页脚说明"""
+        self.paragraph(text, NOTE_SIZE_PT, italic=True)
+
+    def begin_table(self, headers: Sequence[str]) -> None:
+        """开始表格并写出表头（表头行在分页时重复）"""
+        m = PAGE_MARGINS_CM
+        col_w = (12240 - _twips(m["left"]) - _twips(m["right"])) // max(len(headers), 1)
+        self._write(
+            '<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="0" w:type="auto"/></w:tblPr>'
+            "<w:tblGrid>" + f'<w:gridCol w:w="{col_w}"/>' * len(headers) + "</w:tblGrid>"
+        )
+        cells = "".join(f"<w:tc><w:p>{_run(h, bold=True)}</w:p></w:tc>" for h in headers)
+        self._write(f"<w:tr><w:trPr><w:tblHeader/></w:trPr>{cells}</w:tr>")
+        self._rows = 0
+
+    def add_row(self, values: Sequence) -> None:
+        """追加一行（值按 str 输出，数值请事先格式化）"""
+        cells = "".join(f'<w:tc><w:p><w:r><w:t xml:space="preserve">{_esc(v)}</w:t></w:r></w:p></w:tc>'
+                        for v in values)
+        self._write(f"<w:tr>{cells}</w:tr>")
+        self._rows += 1
+        if self._rows % FLUSH_ROWS == 0:
+            self._flush()
+
+    def add_rows(self, rows: Iterable[Sequence]) -> None:
+        for row in rows:
+            self.add_row(row)
+
+    def end_table(self) -> None:
+        """结束表格；与 python-docx 相同，表格后的空段落由调用方添加"""
+        self._write("</w:tbl>")
+        self._flush()
+
+    def close(self) -> str:
+        """写出节属性并关闭文件"""
+        if self._doc is None:
+            return self.path
+        self._write(_sect_pr() + "</w:body></w:document>")
+        self._flush()
+        self._doc.close()
+        self._zip.close()
+        self._doc = None
+        return self.path
+
+    def abort(self) -> None:
+        """放弃写出：不写结尾，关闭并删除未完成的文件"""
+        if self._doc is None:
+            return
+        self._buf.clear()
+        try:
+            self._doc.close()
+            self._zip.close()
+        finally:
+            self._doc = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __enter__(self) -> "StreamingDocx":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 中途出错时不能收尾成一个看似完整的 .docx
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
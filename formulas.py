@@ -0,0 +1,463 @@
+"""规范公式注册表 - 条文表达式编译为向量化计算核
+
+每条条文（B.1.1-1、B.1.1-2、B.1.1-4、B.1.2、B.1.3、B.2.1、B.3 等）只在这里以
+"输出 = 表达式" 的形式声明一次，输入名由表达式自动推出。按所需输出挑选条文后，
+整条计算链编译为一个融合函数并缓存：
+
+    numpy   整批数组计算（basin_batch、批量上传、扫描、优化）
+    scalar  纯标准库 math 计算（Web 单工况、桌面版，无需 NumPy）
+    js      生成 JavaScript 源码（xlc/docs/formulas.js，静态网页版）
+
+地区规范或修订版本用 register_set(名称, 替换条文, base='default') 派生，
+只需声明有差异的条文，不需要另写循环。
+
+重新生成网页版公式：
+    python formulas.py --js xlc/docs/formulas.js
+"""
+
+from __future__ import annotations
+
+import ast
+import math
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 表达式中可用的函数（各后端分别实现）
+FUNCTIONS = ('sqrt', 'where', 'maximum', 'minimum', 'abs', 'solve_hc')
+
+# 消力池计算链（B.1.1 ~ B.1.2）的输出，与 st.session_state.result 的键一致
+BASIN_OUTPUTS = (
+    'hc', 'vc', 'Frc', 'hc_prime', 'hc_prime_adj', 'hc_double_prime',
+    'delta_Z', 'd', 'delta_E', 'Lj', 'Lsj',
+)
+
+_BINOPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}
+_CMPOPS = {ast.Gt: '>', ast.GtE: '>=', ast.Lt: '<', ast.LtE: '<='}
+
+
+class Clause:
+    """一条规范条文
+
+    Args:
+        clause_id: 条文编号，如 'B.1.1-2'
+        title: 条文名称
+        equations: [(输出名, 表达式), ...]，按计算顺序排列
+    """
+
+    def __init__(self, clause_id: str, title: str, equations: Sequence[Tuple[str, str]]) -> None:
+        self.id = clause_id
+        self.title = title
+        self.equations = [(name, expr, ast.parse(expr, mode='eval').body) for name, expr in equations]
+        for name, expr, node in self.equations:
+            _check(node, f"{clause_id} {name} = {expr}")
+
+    @property
+    def outputs(self) -> Tuple[str, ...]:
+        return tuple(name for name, _, _ in self.equations)
+
+    def __repr__(self) -> str:
+        return f"Clause({self.id!r}, {self.title!r})"
+
+
+def _check(node: ast.AST, where: str) -> None:
+    """只允许四则运算、乘方、比较、常数、变量与 FUNCTIONS 中的函数"""
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Call):
+            if not isinstance(sub.func, ast.Name) or sub.func.id not in FUNCTIONS or sub.keywords:
+                raise ValueError(f"不支持的函数调用：{where}")
+        elif isinstance(sub, ast.Compare):
+            if len(sub.ops) != 1 or type(sub.ops[0]) not in _CMPOPS:
+                raise ValueError(f"不支持的比较：{where}")
+        elif isinstance(sub, ast.BinOp):
+            if type(sub.op) not in _BINOPS and not isinstance(sub.op, ast.Pow):
+                raise ValueError(f"不支持的运算符：{where}")
+        elif isinstance(sub, ast.UnaryOp):
+            if not isinstance(sub.op, (ast.USub, ast.UAdd)):
+                raise ValueError(f"不支持的运算符：{where}")
+        elif isinstance(sub, ast.Constant):
+            if not isinstance(sub.value, (int, float)):
+                raise ValueError(f"不支持的常量：{where}")
+        elif not isinstance(sub, (ast.Name, ast.Load, ast.operator, ast.unaryop, ast.cmpop)):
+            raise ValueError(f"不支持的表达式：{where}")
+
+
+def _names(node: ast.AST) -> List[str]:
+    seen = []
+    for sub in ast.walk(node):
+        if isinstance(sub, ast.Name) and sub.id not in FUNCTIONS and sub.id not in seen:
+            seen.append(sub.id)
+    return seen
+
+
+class FormulaSet:
+    """按计算顺序排列的一组条文及其参数默认值"""
+
+    def __init__(self, name: str, clauses: Sequence[Clause], defaults: Optional[Dict[str, float]] = None) -> None:
+        self.name = name
+        self.clauses = list(clauses)
+        self.defaults = dict(defaults or {})
+        defined = set()
+        for clause in self.clauses:
+            for out, _, _ in clause.equations:
+                if out in defined:
+                    raise ValueError(f"{name}：{out} 被重复定义（{clause.id}）")
+                defined.add(out)
+
+    def clause(self, clause_id: str) -> Clause:
+        for c in self.clauses:
+            if c.id == clause_id:
+                return c
+        raise KeyError(clause_id)
+
+    @property
+    def outputs(self) -> Tuple[str, ...]:
+        return tuple(name for c in self.clauses for name in c.outputs)
+
+    def plan(self, outputs: Optional[Iterable[str]] = None):
+        """挑选计算所需的方程
+
+        Returns:
+            (equations, inputs)：按声明顺序的 [(输出名, 表达式, 语法树)] 与输入名列表
+        """
+        equations = [eq for c in self.clauses for eq in c.equations]
+        defined = {name: i for i, (name, _, _) in enumerate(equations)}
+        wanted = list(outputs) if outputs is not None else [name for name, _, _ in equations]
+        unknown = [w for w in wanted if w not in defined]
+        if unknown:
+            raise KeyError(f"{self.name} 中没有输出：{', '.join(unknown)}")
+
+        needed = set()
+        stack = [defined[w] for w in wanted]
+        while stack:
+            i = stack.pop()
+            if i in needed:
+                continue
+            needed.add(i)
+            for ref in _names(equations[i][2]):
+                if ref in defined:
+                    if defined[ref] >= i:
+                        raise ValueError(f"{self.name}：{equations[i][0]} 引用了其后才定义的 {ref}")
+                    stack.append(defined[ref])
+
+        chosen = [equations[i] for i in sorted(needed)]
+        inputs = []
+        for _, _, node in chosen:
+            for ref in _names(node):
+                if ref not in defined and ref not in inputs:
+                    inputs.append(ref)
+        return chosen, inputs
+
+
+# ---------------------------------------------------------------------------
+# 收缩水深求解（表达式中的 solve_hc）
+# ---------------------------------------------------------------------------
+
+def solve_hc_scalar(T0: float, alpha: float, q: float, g: float) -> float:
+    """求解 hc³ - T0·hc² + αq²/(2g) = 0 的急流根（最小正根），无解返回 NaN
+
+    三角函数形式的 Cardano 解，再做两步牛顿迭代消除小水深时的舍入误差。
+    """
+    K = alpha * q * q / (2.0 * g)
+    if not (T0 > 0 and K > 0):
+        return math.nan
+    arg = 1.0 - 27.0 * K / (2.0 * T0 ** 3)
+    if arg < -1.0:
+        return math.nan
+    phi = math.acos(min(arg, 1.0))
+    hc = T0 / 3.0 * (1.0 + 2.0 * math.cos((phi + 4.0 * math.pi) / 3.0))
+    for _ in range(2):
+        df = 3.0 * hc * hc - 2.0 * T0 * hc
+        if df != 0:
+            hc -= (hc ** 3 - T0 * hc * hc + K) / df
+    return hc if 0 < hc < T0 else math.nan
+
+
+def solve_hc_array(T0, alpha, q, g):
+    """solve_hc_scalar 的数组版本，按广播规则整批求解，无有效根的工况为 NaN
+
+    Args:
+        T0: 总势能 (m)
+        alpha: 动能校正系数
+        q: 单宽流量 (m³/s/m)
+        g: 重力加速度 (m/s²)
+    """
+    import numpy as np
+
+    T0, alpha, q, g = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (T0, alpha, q, g)))
+    K = alpha * q * q / (2.0 * g)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 三实根条件：K <= 4*T0^3/27，即 arg >= -1
+        arg = 1.0 - 27.0 * K / (2.0 * T0 ** 3)
+        valid = (T0 > 0) & (K > 0) & (arg >= -1.0)
+        phi = np.arccos(np.clip(arg, -1.0, 1.0))
+        hc = T0 / 3.0 * (1.0 + 2.0 * np.cos((phi + 4.0 * np.pi) / 3.0))
+
+        for _ in range(2):
+            f = hc ** 3 - T0 * hc ** 2 + K
+            df = 3.0 * hc ** 2 - 2.0 * T0 * hc
+            step = np.where(df != 0, f / df, 0.0)
+            hc = hc - step
+
+    valid &= (hc > 0) & (hc < T0)
+    return np.where(valid, hc, np.nan)
+
+
+def _scalar_sqrt(x: float) -> float:
+    # 负数开方按 NaN 处理，与数组版一致
+    return math.sqrt(x) if x >= 0 else math.nan
+
+
+def _numpy_namespace() -> dict:
+    import numpy as np
+
+    return {
+        'sqrt': np.sqrt, 'where': np.where, 'maximum': np.maximum, 'minimum': np.minimum,
+        'abs': np.abs, 'solve_hc': solve_hc_array, '_asarray': np.asarray, '_errstate': np.errstate,
+    }
+
+
+def _scalar_namespace() -> dict:
+    return {
+        'sqrt': _scalar_sqrt, 'where': lambda c, a, b: a if c else b, 'maximum': max, 'minimum': min,
+        'abs': abs, 'solve_hc': solve_hc_scalar,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 注册表
+# ---------------------------------------------------------------------------
+
+DEFAULT_SET = 'default'
+
+_SETS: Dict[str, FormulaSet] = {}
+
+
+def register_set(name: str, clauses: Sequence[Clause] = (), base: Optional[str] = None,
+                 defaults: Optional[Dict[str, float]] = None) -> FormulaSet:
+    """注册公式集
+
+    Args:
+        name: 公式集名称
+        clauses: 条文；给出 base 时为替换或追加的条文（按编号匹配）
+        base: 派生自的公式集名称
+        defaults: 参数默认值（覆盖 base 的同名默认值）
+
+    Returns:
+        FormulaSet
+    """
+    if base is not None:
+        parent = _SETS[base]
+        replace = {c.id: c for c in clauses}
+        merged = [replace.pop(c.id, c) for c in parent.clauses] + list(replace.values())
+        formula_set = FormulaSet(name, merged, {**parent.defaults, **(defaults or {})})
+    else:
+        formula_set = FormulaSet(name, clauses, defaults)
+    _SETS[name] = formula_set
+    compile_kernel.cache_clear()
+    return formula_set
+
+
+def get_set(name: str = DEFAULT_SET) -> FormulaSet:
+    if name not in _SETS:
+        raise KeyError(f"未注册的公式集：{name}")
+    return _SETS[name]
+
+
+def available_sets() -> List[str]:
+    return list(_SETS)
+
+
+def _source(fs: FormulaSet, outputs: Optional[Tuple[str, ...]], backend: str) -> Tuple[str, List[str]]:
+    equations, inputs = fs.plan(outputs)
+    params = [f"{k}={fs.defaults[k]!r}" if k in fs.defaults else k for k in inputs]
+    lines = [f"def kernel(*, {', '.join(params)}):"]
+    body = [f"{name} = {ast.unparse(node)}" for name, _, node in equations]
+    if backend == 'numpy':
+        lines += [f"    {k} = _asarray({k}, dtype=float)" for k in inputs]
+        lines.append("    with _errstate(divide='ignore', invalid='ignore', over='ignore'):")
+        lines += [f"        {b}" for b in body]
+    else:
+        lines += [f"    {b}" for b in body]
+    returned = outputs if outputs is not None else [name for name, _, _ in equations]
+    lines.append("    return {" + ", ".join(f"{k!r}: {k}" for k in returned) + "}")
+    return "\n".join(lines), inputs
+
+
+@lru_cache(maxsize=128)
+def compile_kernel(set_name: str = DEFAULT_SET, outputs: Optional[Tuple[str, ...]] = None,
+                   backend: str = 'numpy') -> Callable[..., dict]:
+    """编译（并缓存）计算核
+
+    Args:
+        set_name: 公式集名称
+        outputs: 需要的输出名元组，None 为全部；只编译其依赖到的方程
+        backend: 'numpy'（数组）或 'scalar'（标准库 math）
+
+    Returns:
+        kernel(**inputs) -> {输出名: 值}，参数只接受关键字
+    """
+    if backend not in ('numpy', 'scalar'):
+        raise ValueError(f"不支持的后端：{backend}")
+    fs = get_set(set_name)
+    source, inputs = _source(fs, outputs, backend)
+    namespace = _numpy_namespace() if backend == 'numpy' else _scalar_namespace()
+    exec(compile(source, f"<formulas:{set_name}:{backend}>", "exec"), namespace)
+    kernel = namespace['kernel']
+    kernel.inputs = tuple(inputs)
+    kernel.source = source
+    return kernel
+
+
+def evaluate(inputs: Dict[str, object], outputs: Optional[Sequence[str]] = None, set_name: str = DEFAULT_SET,
+             backend: str = 'numpy') -> dict:
+    """按名称取参数并计算（多余的参数忽略）"""
+    kernel = compile_kernel(set_name, tuple(outputs) if outputs is not None else None, backend)
+    return kernel(**{k: inputs[k] for k in kernel.inputs if k in inputs})
+
+
+# ---------------------------------------------------------------------------
+# JavaScript 导出
+# ---------------------------------------------------------------------------
+
+_JS_FUNCS = {'sqrt': 'Math.sqrt', 'maximum': 'Math.max', 'minimum': 'Math.min', 'abs': 'Math.abs',
+             'solve_hc': 'solveHc'}
+
+_JS_SOLVE_HC = """  function solveHc(T0, alpha, q, g) {
+    const K = (alpha * q * q) / (2 * g);
+    if (!(T0 > 0 && K > 0)) return NaN;
+    const arg = 1 - (27 * K) / (2 * Math.pow(T0, 3));
+    if (arg < -1) return NaN;
+    const phi = Math.acos(Math.min(arg, 1));
+    let hc = (T0 / 3) * (1 + 2 * Math.cos((phi + 4 * Math.PI) / 3));
+    for (let i = 0; i < 2; i++) {
+      const df = 3 * hc * hc - 2 * T0 * hc;
+      if (df !== 0) hc -= (Math.pow(hc, 3) - T0 * hc * hc + K) / df;
+    }
+    return hc > 0 && hc < T0 ? hc : NaN;
+  }
+"""
+
+
+def _js(node: ast.AST) -> str:
+    if isinstance(node, ast.Constant):
+        return repr(float(node.value)) if isinstance(node.value, float) else str(node.value)
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.UnaryOp):
+        return f"({'-' if isinstance(node.op, ast.USub) else '+'}{_js(node.operand)})"
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, ast.Pow):
+            return f"Math.pow({_js(node.left)}, {_js(node.right)})"
+        return f"({_js(node.left)} {_BINOPS[type(node.op)]} {_js(node.right)})"
+    if isinstance(node, ast.Compare):
+        return f"({_js(node.left)} {_CMPOPS[type(node.ops[0])]} {_js(node.comparators[0])})"
+    if isinstance(node, ast.Call):
+        args = [_js(a) for a in node.args]
+        if node.func.id == 'where':
+            return f"({args[0]} ? {args[1]} : {args[2]})"
+        return f"{_JS_FUNCS[node.func.id]}({', '.join(args)})"
+    raise ValueError(f"无法转换为 JavaScript：{ast.dump(node)}")
+
+
+def export_js(set_name: str = DEFAULT_SET, global_name: str = 'XLCFormulas') -> str:
+    """生成浏览器可直接加载的 JavaScript 计算核
+
+    定义全局对象 global_name：inputs（输入名）、defaults、outputs、evaluate(v)。
+    """
+    fs = get_set(set_name)
+    equations, inputs = fs.plan()
+    lines = [
+        f"// 由 formulas.py 自动生成（公式集：{set_name}），请勿手工修改",
+        "// 重新生成：python formulas.py --js xlc/docs/formulas.js",
+        f"window.{global_name} = (function () {{",
+        _JS_SOLVE_HC,
+        "  function evaluate(v) {",
+    ]
+    for k in inputs:
+        default = f" ?? {fs.defaults[k]!r}" if k in fs.defaults else ""
+        lines.append(f"    const {k} = v.{k}{default};")
+    for name, _, node in equations:
+        lines.append(f"    const {name} = {_js(node)};")
+    lines.append("    return { " + ", ".join(name for name, _, _ in equations) + " };")
+    lines.append("  }")
+    lines.append("")
+    lines.append("  return {")
+    lines.append(f"    inputs: {list(inputs)!r},".replace("'", '"'))
+    lines.append("    defaults: { " + ", ".join(f"{k}: {v!r}" for k, v in fs.defaults.items()) + " },")
+    lines.append(f"    outputs: {list(fs.outputs)!r},".replace("'", '"'))
+    lines.append("    evaluate,")
+    lines.append("  };")
+    lines.append("})();")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# 默认公式集（附录 B）
+# ---------------------------------------------------------------------------
+
+register_set(DEFAULT_SET, [
+    Clause('B.1.1', "收缩断面水深（能量方程 T₀ = hc + αq²/(2g·hc²)）", [
+        ('hc', "solve_hc(T0, alpha, q, g)"),
+        ('vc', "q / hc"),
+        ('Frc', "vc / sqrt(g * hc)"),
+    ]),
+    Clause('B.1.1-2', "跃后水深", [
+        ('hc_double_prime', "hc / 2.0 * (sqrt(1.0 + 8.0 * alpha * q ** 2 / (g * hc ** 3)) - 1.0) * (b1 / b2) ** 0.25"),
+        ('hc_prime', "hc_double_prime / sigma0"),
+        ('hc_prime_adj', "hc_double_prime"),
+    ]),
+    Clause('B.1.1-4', "出池落差（φ = p，p ≤ 0 时取 1.0）", [
+        ('phi', "where(p > 0, p, 1.0)"),
+        ('delta_Z', "alpha * q ** 2 / (2.0 * g * phi ** 2 * hs ** 2) - alpha * q ** 2 / (2.0 * g * hc_double_prime ** 2)"),
+    ]),
+    Clause('B.1.1-1', "消力池深度", [
+        ('d', "sigma0 * hc_double_prime - hs - delta_Z"),
+        ('delta_E', "(hc_double_prime - hc) ** 3 / (4.0 * hc * hc_double_prime)"),
+    ]),
+    Clause('B.1.2', "水跃长度与消力池长度", [
+        ('Lj', "6.9 * (hc_double_prime - hc)"),
+        ('Lsj', "Ls + beta * Lj"),
+    ]),
+    Clause('B.1.3', "消力池底板厚度", [
+        ('t_impact', "k1 * sqrt(q * sqrt(delta_H))"),
+        ('t_float', "k2 * (U - gamma * hd + sign * Pm) / gamma_b"),
+        ('t_design', "maximum(t_impact, t_float)"),
+        ('t_final', "maximum(t_design, 0.5)"),
+    ]),
+    Clause('B.2.1', "海漫长度", [
+        ('check', "sqrt(qs * sqrt(delta_H))"),
+        ('Lp', "Ks * check"),
+    ]),
+    Clause('B.3.1', "海漫末端河床冲刷深度", [
+        ('dm', "k_scour * qm / v0 - hm"),
+    ]),
+    Clause('B.3.2', "上游护底首端河床冲刷深度", [
+        ('dm_prime', "k_scour_up * qm_up / v0_up - hm_up"),
+    ]),
+], defaults={'g': 9.81, 'k1': 0.175, 'k2': 1.2, 'sign': 1.0, 'k_scour': 1.1, 'k_scour_up': 0.8})
+
+
+def _main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="规范公式注册表")
+    parser.add_argument("--set", default=DEFAULT_SET, help="公式集名称")
+    parser.add_argument("--js", metavar="PATH", help="导出 JavaScript 计算核")
+    args = parser.parse_args(argv)
+    if args.js:
+        with open(args.js, "w", encoding="utf-8", newline="\n") as f:
+            f.write(export_js(args.set))
+        print(f"已导出：{args.js}")
+    else:
+        for clause in get_set(args.set).clauses:
+            print(f"{clause.id}  {clause.title}")
+            for name, expr, _ in clause.equations:
+                print(f"    {name} = {expr}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
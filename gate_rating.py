@@ -0,0 +1,276 @@
+"""闸门泄流能力表 Q(H, e) - 预计算、紧凑存储与向量化插值查询
+
+GateCalculator（Services/Calculators.cs）按 A.0.1 ~ A.0.3 由流量反求闸孔总净宽；运行调度
+需要反过来由闸前水头 H 与闸门开度 e 求过闸流量。本模块对一组闸门参数在稠密的
+水头 × 开度网格上计算流量，表以 float32 存为列式文件（scenario_store），查询时双线性插值。
+
+流态与公式（H0 取闸前水头 H，不计行近流速；hs 为闸槛以上下游水深；B0 = N·b0）：
+    堰流   e/H > 0.65 或闸门出水：Q = σ·ε·m·B0·√(2g)·H0^1.5（A.0.1），
+           σ = 1（hs/H0 ≤ 0.72），否则 σ = 2.31·(hs/H0)·(1 − hs/H0)^0.4；
+           hs/H0 ≥ 0.9 时为高淹没堰流：Q = μ0·hs·B0·√(2g(H0 − hs))，μ0 = 0.877 + (hs/H0 − 0.65)²（A.0.2）
+    孔流   e/H ≤ 0.65：Q = σ'·μ·e·B0·√(2g·H0)（A.0.3），
+           μ = φ·ε'·√(1 − ε'·e/H)，ε' = 1/(1 + √(λ(1 − (e/H)²)))，λ = 0.4 / e^(16r/e)
+    淹没孔流的 σ' 由收缩断面能量方程与跃后动量方程联立求出（下游水深大于收缩水深的共轭水深时），
+    与自由孔流连续衔接；堰流与孔流在 e/H = 0.65 ± band 内线性过渡，使表内流量连续。
+
+与 Calculators.cs 的差异：σ（A.0.1）与 μ（A.0.3）按上式（规范形式），淹没孔流不查 TableA03。
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from scenario_store import open_columns, write_columns
+
+
+# 流态编号
+REGIME_WEIR = 0                 # 自由堰流
+REGIME_WEIR_SUBMERGED = 1       # 淹没堰流（σ < 1）
+REGIME_WEIR_HIGH = 2            # 高淹没堰流（A.0.2）
+REGIME_ORIFICE = 3              # 自由孔流
+REGIME_ORIFICE_SUBMERGED = 4    # 淹没孔流
+REGIME_TRANSITION = 5           # 堰流 / 孔流过渡段
+
+REGIME_NAMES = {
+    REGIME_WEIR: "自由堰流",
+    REGIME_WEIR_SUBMERGED: "淹没堰流",
+    REGIME_WEIR_HIGH: "高淹没堰流",
+    REGIME_ORIFICE: "自由孔流",
+    REGIME_ORIFICE_SUBMERGED: "淹没孔流",
+    REGIME_TRANSITION: "堰流/孔流过渡",
+}
+
+ORIFICE_LIMIT = 0.65     # e/H 不大于此值为孔流
+
+
+class GateConfig(NamedTuple):
+    """闸门参数（不可变，可作为缓存键）
+
+    Args:
+        b0: 单孔净宽 (m)
+        n_bays: 孔数 N
+        dc: 中间墩厚 (m)
+        db: 边墩厚 (m)
+        b_up: 单孔闸的上游河道宽度 (m)，None 时按边孔公式计侧收缩
+        m: 堰流流量系数
+        phi: 孔流流速系数（0.95 ~ 1.0）
+        r: 胸墙底 / 闸门底缘圆弧半径 (m)，平板闸门取 0
+        hs: 闸槛以上下游水深 (m)，0 为自由出流
+        g: 重力加速度 (m/s²)
+        band: 堰流 / 孔流过渡段半宽（e/H）
+    """
+    b0: float
+    n_bays: int = 1
+    dc: float = 1.0
+    db: float = 1.0
+    b_up: Optional[float] = None
+    m: float = 0.385
+    phi: float = 0.97
+    r: float = 0.0
+    hs: float = 0.0
+    g: float = 9.81
+    band: float = 0.05
+
+
+def contraction_coefficients(b0: float, dc: float, db: float):
+    """中孔与边孔侧收缩系数（A.0.1）
+
+    Args:
+        b0: 单孔净宽 (m)
+        dc: 中间墩厚 (m)
+        db: 边墩厚 (m)
+
+    Returns:
+        (ε_c, ε_b)
+    """
+    rc = b0 / (b0 + dc)
+    rb = b0 / (b0 + db / 2.0)
+    return 1 - 0.171 * (1 - rc) * np.sqrt(rc), 1 - 0.171 * (1 - rb) * np.sqrt(rb)
+
+
+def weir_epsilon(cfg: GateConfig) -> float:
+    """闸孔综合侧收缩系数 ε（A.0.1）"""
+    if cfg.n_bays == 1:
+        if cfg.b_up:
+            ratio = cfg.b0 / cfg.b_up
+            return float(1 - 0.171 * (1 - ratio) * np.sqrt(ratio))
+        return float(contraction_coefficients(cfg.b0, cfg.dc, cfg.db)[1])
+    eps_c, eps_b = contraction_coefficients(cfg.b0, cfg.dc, cfg.db)
+    return float(eps_c * (cfg.n_bays - 1.0) / cfg.n_bays + eps_b / cfg.n_bays)
+
+
+def weir_discharge(H, cfg: GateConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """堰流流量（A.0.1 / A.0.2），返回 (Q, 流态)"""
+    H = np.asarray(H, dtype=float)
+    B0 = cfg.n_bays * cfg.b0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(H > 0, cfg.hs / H, np.inf)
+        sigma = np.where(ratio <= 0.72, 1.0, 2.31 * ratio * np.abs(1.0 - ratio) ** 0.4)
+        q_weir = sigma * weir_epsilon(cfg) * cfg.m * B0 * np.sqrt(2 * cfg.g) * np.maximum(H, 0.0) ** 1.5
+        mu0 = 0.877 + (ratio - 0.65) ** 2
+        q_high = mu0 * cfg.hs * B0 * np.sqrt(2 * cfg.g * np.maximum(H - cfg.hs, 0.0))
+    Q = np.where(ratio >= 0.9, q_high, q_weir)
+    regime = np.where(ratio >= 0.9, REGIME_WEIR_HIGH, np.where(ratio > 0.72, REGIME_WEIR_SUBMERGED, REGIME_WEIR))
+    return np.where(H > 0, Q, 0.0), regime
+
+
+def orifice_discharge(H, e, cfg: GateConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """孔流流量（A.0.3，含淹没孔流），返回 (Q, 流态)"""
+    H, e = np.broadcast_arrays(np.asarray(H, dtype=float), np.asarray(e, dtype=float))
+    B0 = cfg.n_bays * cfg.b0
+    g, phi, hs = cfg.g, cfg.phi, np.float64(cfg.hs)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        ratio = np.clip(e / H, 0.0, 1.0)
+        lam = 0.4 / np.exp(16.0 * cfg.r / e)
+        eps = 1.0 / (1.0 + np.sqrt(lam * (1.0 - ratio ** 2)))
+        mu = phi * eps * np.sqrt(1.0 - eps * ratio)
+        q_free = mu * e * np.sqrt(2 * g * H)
+
+        # 收缩水深及其共轭水深，下游水深更大时为淹没孔流
+        hc = eps * e
+        hc2 = hc / 2.0 * (np.sqrt(1.0 + 8.0 * q_free ** 2 / (g * hc ** 3)) - 1.0)
+        submerged = (hs > hc2) & (hs > 0)
+        # 收缩断面水深 y：能量 q² = 2gφ²hc²(H − y)，动量 y²/2 + q²/(g·hc) = hs²/2 + q²/(g·hs)
+        k = 4.0 * phi ** 2 * hc ** 2 * (1.0 / hs - 1.0 / hc)
+        y = (-k + np.sqrt(k * k + 4.0 * (hs * hs + k * H))) / 2.0
+        q_sub = phi * hc * np.sqrt(2 * g * np.maximum(H - y, 0.0))
+    q = np.where(submerged, np.minimum(q_sub, q_free), q_free)
+    valid = (H > 0) & (e > 0)
+    return (np.where(valid, q * B0, 0.0),
+            np.where(submerged, REGIME_ORIFICE_SUBMERGED, REGIME_ORIFICE))
+
+
+def discharge(H, e, cfg: GateConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """直接计算过闸流量与流态（不经查表），H、e 按广播规则
+
+    e/H ≤ 0.65 − band 为孔流，≥ 0.65 + band 为堰流，中间线性过渡。
+    """
+    H, e = np.broadcast_arrays(np.asarray(H, dtype=float), np.asarray(e, dtype=float))
+    q_w, reg_w = weir_discharge(H, cfg)
+    q_o, reg_o = orifice_discharge(H, np.minimum(e, H), cfg)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(H > 0, e / H, np.inf)
+    lo, hi = ORIFICE_LIMIT - cfg.band, ORIFICE_LIMIT + cfg.band
+    w = np.clip((ratio - lo) / (hi - lo), 0.0, 1.0) if hi > lo else (ratio > ORIFICE_LIMIT).astype(float)
+    Q = (1.0 - w) * q_o + w * q_w
+    regime = np.where(w <= 0, reg_o, np.where(w >= 1, reg_w, REGIME_TRANSITION))
+    Q = np.where(e > 0, Q, 0.0)
+    return Q, regime.astype(np.uint8)
+
+
+def _interp_index(axis: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """升序轴上的区间下标与插值权重（超出范围取端点）"""
+    i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, axis.size - 2)
+    with np.errstate(invalid='ignore'):
+        t = np.clip((x - axis[i]) / (axis[i + 1] - axis[i]), 0.0, 1.0)
+    return i, t
+
+
+class RatingTable:
+    """泄流能力表：H 轴 × e 轴上的流量（float32）与流态
+
+    Args:
+        H, e: 升序水头轴与开度轴 (m)
+        Q: 形状 (len(H), len(e)) 的流量 (m³/s)
+        regime: 同形流态编号
+        config: 生成该表的闸门参数
+    """
+
+    def __init__(self, H, e, Q, regime, config: GateConfig) -> None:
+        self.H = np.asarray(H, dtype=float)
+        self.e = np.asarray(e, dtype=float)
+        self.Q = np.asarray(Q, dtype=np.float32).reshape(self.H.size, self.e.size)
+        self.regime = np.asarray(regime, dtype=np.uint8).reshape(self.Q.shape)
+        self.config = config
+        if self.H.size < 2 or self.e.size < 2:
+            raise ValueError("水头轴与开度轴至少各需 2 个点")
+
+    @property
+    def nbytes(self) -> int:
+        return self.Q.nbytes + self.regime.nbytes + self.H.nbytes + self.e.nbytes
+
+    def discharge(self, H, e) -> np.ndarray:
+        """批量查询流量（双线性插值，超出表范围取边界值）"""
+        H, e = np.broadcast_arrays(np.asarray(H, dtype=float), np.asarray(e, dtype=float))
+        i, s = _interp_index(self.H, H)
+        j, t = _interp_index(self.e, e)
+        Q = self.Q
+        q0 = Q[i, j] + t * (Q[i, j + 1] - Q[i, j])
+        q1 = Q[i + 1, j] + t * (Q[i + 1, j + 1] - Q[i + 1, j])
+        return q0 + s * (q1 - q0)
+
+    def regime_at(self, H, e) -> np.ndarray:
+        """批量查询流态（取最近格点）"""
+        i = np.clip(np.rint(np.interp(H, self.H, np.arange(self.H.size))).astype(int), 0, self.H.size - 1)
+        j = np.clip(np.rint(np.interp(e, self.e, np.arange(self.e.size))).astype(int), 0, self.e.size - 1)
+        return self.regime[i, j]
+
+    def opening(self, H, Q, chunk_rows: int = 65536) -> np.ndarray:
+        """批量反查：给定水头下泄放流量 Q 所需的开度（超出该水头最大泄量为 NaN）"""
+        H, Q = np.broadcast_arrays(np.asarray(H, dtype=float), np.asarray(Q, dtype=float))
+        shape = H.shape
+        H, Q = H.ravel(), Q.ravel()
+        out = np.empty(H.size)
+        # Q 沿开度单调不减：插值出该水头的一行后按行计数定位
+        for start in range(0, H.size, chunk_rows):
+            h, q = H[start:start + chunk_rows], Q[start:start + chunk_rows]
+            i, s = _interp_index(self.H, h)
+            rows = self.Q[i] + s[:, None] * (self.Q[i + 1] - self.Q[i])
+            rows = np.maximum.accumulate(rows, axis=1)
+            k = np.clip((rows < q[:, None]).sum(axis=1), 1, self.e.size - 1)
+            r = np.arange(h.size)
+            lo, hi = rows[r, k - 1], rows[r, k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.where(hi > lo, (q - lo) / (hi - lo), 0.0)
+            e = self.e[k - 1] + np.clip(t, 0.0, 1.0) * (self.e[k] - self.e[k - 1])
+            out[start:start + h.size] = np.where((q <= rows[:, -1]) & (q >= 0), e, np.nan)
+        return out.reshape(shape)
+
+    def save(self, path: str) -> str:
+        """保存为列式文件（流量 float32，轴与闸门参数写入头部）"""
+        return write_columns(path, {'Q': self.Q.ravel(), 'regime': self.regime.ravel()}, float32=True,
+                             meta={'kind': 'gate_rating', 'H': self.H.tolist(), 'e': self.e.tolist(),
+                                   'config': self.config._asdict()})
+
+    @classmethod
+    def load(cls, path: str) -> "RatingTable":
+        cols = open_columns(path)
+        meta = cols.meta
+        if meta.get('kind') != 'gate_rating':
+            raise ValueError("文件不是泄流能力表")
+        return cls(meta['H'], meta['e'], cols['Q'], np.asarray(cols['regime']), GateConfig(**meta['config']))
+
+
+def build_table(cfg: GateConfig, H_max: float, e_max: Optional[float] = None, n_H: int = 400, n_e: int = 200,
+                H_min: float = 0.0) -> RatingTable:
+    """在 [H_min, H_max] × [0, e_max] 的等分网格上计算泄流能力表
+
+    Args:
+        cfg: 闸门参数
+        H_max: 最大闸前水头 (m)
+        e_max: 最大开度 (m)，缺省同 H_max
+        n_H, n_e: 两轴点数
+    """
+    if not H_max > H_min >= 0:
+        raise ValueError("水头范围无效")
+    H = np.linspace(H_min, H_max, n_H)
+    e = np.linspace(0.0, e_max if e_max else H_max, n_e)
+    Q, regime = discharge(H[:, None], e[None, :], cfg)
+    return RatingTable(H, e, Q, regime, cfg)
+
+
+@lru_cache(maxsize=16)
+def rating_table(cfg: GateConfig, H_max: float, e_max: Optional[float] = None, n_H: int = 400,
+                 n_e: int = 200, H_min: float = 0.0) -> RatingTable:
+    """build_table 的缓存版本：闸门参数与网格不变时复用同一张表"""
+    return build_table(cfg, H_max, e_max, n_H, n_e, H_min)
+
+
+def rating_frame(table: RatingTable, H_values, e_values) -> Dict[str, np.ndarray]:
+    """水头 × 开度的流量长表（用于展示 / 导出）"""
+    Hg, eg = np.meshgrid(np.asarray(H_values, dtype=float), np.asarray(e_values, dtype=float), indexing='ij')
+    return {'H': Hg.ravel(), 'e': eg.ravel(), 'Q': table.discharge(Hg, eg).ravel(),
+            'regime': table.regime_at(Hg, eg).ravel()}
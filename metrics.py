@@ -0,0 +1,367 @@
+"""运行指标 - 计数器与耗时直方图，Prometheus 文本格式导出
+
+记录路径不加锁：每个线程写自己的分片（threading.local），只有该线程写入，
+导出时才汇总各分片；线程结束后其分片在下次登记新分片或导出时并入累计值。
+导出方式（按环境变量启用，见 from_env）：
+    XLC_METRICS_FILE      定时写入文本文件（供 node_exporter textfile collector 采集）
+    XLC_METRICS_PORT      在本机端口提供 /metrics（监听地址 XLC_METRICS_ADDR，默认 127.0.0.1）
+    XLC_METRICS_INTERVAL  写文件间隔 (s)，默认 15
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+# 耗时直方图默认分桶 (s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Shard:
+    """单个线程的指标值：(指标名, 标签值) -> 数值列表"""
+
+    __slots__ = ("thread", "values")
+
+    def __init__(self) -> None:
+        self.thread = threading.current_thread()
+        self.values: Dict[Tuple[str, Tuple[str, ...]], List[float]] = {}
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help_text: str, labels: Sequence[str]) -> None:
+        self._registry = registry
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+
+    def _cell(self, label_values: Tuple[str, ...], size: int) -> List[float]:
+        try:
+            values = self._registry._local.shard.values
+        except AttributeError:
+            values = self._registry._shard().values
+        key = (self.name, label_values)
+        cell = values.get(key)
+        if cell is None:
+            if len(label_values) != len(self.labels):
+                raise ValueError(f"{self.name} 需要标签 {self.labels}，实际为 {label_values}")
+            cell = values[key] = [0.0] * size
+        return cell
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self._cell(label_values, 1)[0] += amount
+
+
+class Histogram(_Metric):
+    """分桶直方图（各桶非累计存储，导出时累加）"""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "Registry", name: str, help_text: str, labels: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str) -> None:
+        # 布局：[各桶计数..., +Inf 桶, 总和, 次数]
+        n = len(self.buckets)
+        cell = self._cell(label_values, n + 3)
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[n + 1] += value
+        cell[n + 2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        """计时上下文：with hist.time('basin'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()              # 仅在新线程登记分片和导出时使用
+        self._shards: List[_Shard] = []
+        self._retired: Dict[Tuple[str, Tuple[str, ...]], List[float]] = {}
+        self._collectors: Dict[object, Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = {}
+
+    def _shard(self) -> _Shard:
+        """当前线程的分片（首次使用时登记）"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                # 新线程登记时顺带回收已结束线程的分片，短命线程较多时分片列表不会无限增长
+                self._prune()
+                self._shards.append(shard)
+        return shard
+
+    def _prune(self) -> None:
+        """已结束线程的分片并入累计值后丢弃（调用方持有 _lock）"""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                _merge(self._retired, shard.values)
+        self._shards = alive
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"指标已存在：{metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help_text, labels, buckets))
+
+    def add_collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]],
+                      name: object = None) -> None:
+        """登记导出时调用的采集函数，产生 (指标名, 类型, 说明, 标签, 值)，用于从其他模块读取现成统计
+
+        同一 name（缺省为函数本身）重复登记时替换原采集函数，不会重复导出
+        """
+        self._collectors[fn if name is None else name] = fn
+
+    def snapshot(self) -> Dict[Tuple[str, Tuple[str, ...]], List[float]]:
+        """汇总所有线程分片；已结束线程的分片并入累计值后丢弃"""
+        with self._lock:
+            self._prune()
+            total = {k: list(v) for k, v in self._retired.items()}
+            for shard in self._shards:
+                _merge(total, shard.values.copy())
+        return total
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        data = self.snapshot()
+        by_metric: Dict[str, List[Tuple[Tuple[str, ...], List[float]]]] = {}
+        for (name, label_values), cell in data.items():
+            by_metric.setdefault(name, []).append((label_values, cell))
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for label_values, cell in sorted(by_metric.get(name, [])):
+                labels = dict(zip(metric.labels, label_values))
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets + (float("inf"),), cell):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {_num(cumulative)}")
+                    n = len(metric.buckets)
+                    lines.append(f"{name}_sum{_labels(labels)} {_num(cell[n + 1])}")
+                    lines.append(f"{name}_count{_labels(labels)} {_num(cell[n + 2])}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_num(cell[0])}")
+
+        declared = set()
+        for collect in list(self._collectors.values()):
+            for name, kind, help_text, labels, value in collect():
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_labels(labels)} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(into: dict, values: dict) -> None:
+    for key, cell in values.items():
+        acc = into.get(key)
+        if acc is None:
+            into[key] = list(cell)
+        else:
+            for i, v in enumerate(cell):
+                acc[i] += v
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# ---------------------------------------------------------------------------
+# 计算器指标
+# ---------------------------------------------------------------------------
+
+REGISTRY = Registry()
+
+CALCULATIONS = REGISTRY.counter("xlc_calculations_total", "按类型统计的计算次数", ("type",))
+CALC_ERRORS = REGISTRY.counter("xlc_calculation_errors_total", "按类型统计的计算失败次数", ("type",))
+CALC_SECONDS = REGISTRY.histogram("xlc_calculation_seconds", "按类型统计的计算耗时", ("type",))
+CALC_ROWS = REGISTRY.counter("xlc_calculation_rows_total", "批量计算的工况行数", ("type",))
+REPORTS = REGISTRY.counter("xlc_report_exports_total", "报告导出次数", ("format", "status"))
+REPORT_SECONDS = REGISTRY.histogram("xlc_report_export_seconds", "报告生成耗时", ("format",))
+CACHE = REGISTRY.counter("xlc_cache_requests_total", "缓存命中 / 未命中次数", ("cache", "result"))
+
+
+@contextmanager
+def track(calc_type: str):
+    """记录一次计算：次数、耗时，异常时记失败并继续抛出（批量行数由调用方记入 CALC_ROWS）
+
+    Args:
+        calc_type: 计算类型（basin、thickness、apron、scour、optimize、batch 等）
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        CALC_ERRORS.inc(calc_type)
+        raise
+    finally:
+        CALCULATIONS.inc(calc_type)
+        CALC_SECONDS.observe(time.perf_counter() - start, calc_type)
+
+
+def error(calc_type: str) -> None:
+    """记录未以异常形式出现的计算失败（如无法求解 hc）"""
+    CALC_ERRORS.inc(calc_type)
+
+
+def cache(name: str, hit: bool) -> None:
+    CACHE.inc(name, "hit" if hit else "miss")
+
+
+def timed_report(fn: Callable[..., bytes], fmt: str) -> Callable[..., bytes]:
+    """包装报告生成函数，记录导出次数与耗时（在报告队列的工作线程中执行）"""
+    def run(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            data = fn(*args, **kwargs)
+        except BaseException:
+            REPORTS.inc(fmt, "error")
+            raise
+        REPORTS.inc(fmt, "ok")
+        REPORT_SECONDS.observe(time.perf_counter() - start, fmt)
+        return data
+    return run
+
+
+def _kernel_cache():
+    """公式计算核的编译缓存（formulas.compile_kernel）"""
+    import sys
+
+    formulas = sys.modules.get("formulas")
+    if formulas is None:
+        return
+    info = formulas.compile_kernel.cache_info()
+    help_text = "公式计算核编译缓存命中 / 未命中次数"
+    yield "xlc_kernel_cache_requests_total", "counter", help_text, {'result': "hit"}, info.hits
+    yield "xlc_kernel_cache_requests_total", "counter", help_text, {'result': "miss"}, info.misses
+
+
+def _queue_collector(queue) -> Callable:
+    def collect():
+        for status, n in queue.stats().items():
+            yield "xlc_report_queue_jobs", "gauge", "报告队列中各状态任务数", {'status': status}, n
+    return collect
+
+
+# ---------------------------------------------------------------------------
+# 导出
+# ---------------------------------------------------------------------------
+
+def write_textfile(path: str, registry: Registry = REGISTRY) -> None:
+    """原子写入文本文件"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def start_file_writer(path: str, interval: float = 15.0, registry: Registry = REGISTRY) -> threading.Thread:
+    """后台线程定时写入文本文件"""
+    def loop():
+        while True:
+            try:
+                write_textfile(path, registry)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1", registry: Registry = REGISTRY):
+    """在后台线程提供 http://addr:port/metrics"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def from_env(report_queue=None, registry: Registry = REGISTRY) -> Dict[str, object]:
+    """按环境变量 XLC_METRICS_FILE / XLC_METRICS_PORT / XLC_METRICS_INTERVAL 启动导出
+
+    Args:
+        report_queue: 报告队列（report_queue.ReportQueue），给出时导出各状态任务数
+
+    Returns:
+        已启动的导出器 {'file': 线程, 'http': 服务器}
+    """
+    # 按名称登记：缓存资源重建后再次调用时替换而不是重复导出
+    if report_queue is not None:
+        registry.add_collector(_queue_collector(report_queue), "report_queue")
+    registry.add_collector(_kernel_cache, "kernel_cache")
+    started: Dict[str, object] = {}
+    path = os.environ.get("XLC_METRICS_FILE")
+    if path:
+        started['file'] = start_file_writer(path, float(os.environ.get("XLC_METRICS_INTERVAL", "15")), registry)
+    port = os.environ.get("XLC_METRICS_PORT")
+    if port:
+        started['http'] = start_http_server(int(port), os.environ.get("XLC_METRICS_ADDR", "127.0.0.1"), registry)
+    return started
@@ -0,0 +1,195 @@
+"""多孔闸消力池 - 按闸门开启组合分配各孔单宽流量并批量计算
+
+多孔水闸各孔过流并不均匀：边孔受边墩侧收缩影响，与关闭闸孔相邻的孔也相当于边孔；
+部分闸门关闭时，同样的总流量集中到开启的孔，单宽流量随之增大。本模块按开启组合
+分配各孔单宽流量，并对 组合 × 闸孔 一次完成 B.1 计算，给出控制孔与控制组合。
+
+单宽流量分配：
+    每孔每侧按相邻状态取侧收缩系数——相邻孔开启取中孔系数 ε_c，相邻为边墩或关闭闸孔取边孔系数 ε_b
+    （公式同 GateCalculator A.0.1），该孔 ε 取两侧平均；
+    第 i 孔过流份额 ∝ ε_i · e_i · b0，e_i 为开启度（0 关闭，1 全开，部分开启按线性折减）；
+    q_i = Q · ε_i·e_i / Σ(ε_j·e_j·b0)
+
+其余 B.1 参数（T0、hs、b1、b2 等）各孔共用，关闭闸孔的结果为 NaN。开启闸孔无解（q 过大，
+T0 不足以形成收缩断面）比任何可解的孔都不利：该组合记为不可行，控制孔取无解孔中单宽流量最大者，
+只要存在不可行组合，控制组合即取其中单宽流量最大的一个。
+"""
+
+from __future__ import annotations
+
+import itertools
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from basin_batch import DEFAULTS, INPUT_KEYS, RESULT_KEYS, compute_basin_batch
+from gate_rating import contraction_coefficients
+
+
+def bay_coefficients(openings, b0: float, dc: float, db: float) -> np.ndarray:
+    """各开启组合下每孔的侧收缩系数
+
+    Args:
+        openings: 开启度数组，形状 (组合数, 孔数)
+
+    Returns:
+        与 openings 同形，关闭闸孔为 0
+    """
+    e = np.atleast_2d(np.asarray(openings, dtype=float))
+    eps_c, eps_b = contraction_coefficients(b0, dc, db)
+    is_open = e > 0
+    # 左右相邻孔是否开启（两端为边墩）
+    left = np.zeros_like(is_open)
+    right = np.zeros_like(is_open)
+    left[:, 1:] = is_open[:, :-1]
+    right[:, :-1] = is_open[:, 1:]
+    eps = (np.where(left, eps_c, eps_b) + np.where(right, eps_c, eps_b)) / 2.0
+    return np.where(is_open, eps, 0.0)
+
+
+def distribute(Q, openings, b0: float, dc: float = 1.0, db: float = 1.0) -> np.ndarray:
+    """按开启组合分配各孔单宽流量
+
+    Args:
+        Q: 总流量 (m³/s)，标量或形状 (组合数,)
+        openings: 开启度，形状 (组合数, 孔数)
+        b0: 单孔净宽 (m)
+        dc, db: 中间墩厚、边墩厚 (m)
+
+    Returns:
+        单宽流量 q，形状 (组合数, 孔数)，关闭闸孔为 0，全部关闭的组合为 NaN
+    """
+    e = np.clip(np.atleast_2d(np.asarray(openings, dtype=float)), 0.0, 1.0)
+    w = bay_coefficients(e, b0, dc, db) * e
+    total = w.sum(axis=1, keepdims=True) * b0
+    Q = np.asarray(Q, dtype=float).reshape(-1, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 0, Q * w / total, np.nan)
+
+
+def all_schedules(n_bays: int, min_open: int = 1, symmetric: bool = False) -> np.ndarray:
+    """枚举全开 / 全关的闸门开启组合
+
+    Args:
+        n_bays: 孔数
+        min_open: 最少开启孔数
+        symmetric: 只保留左右对称的组合（对称运行调度）
+
+    Returns:
+        形状 (组合数, 孔数) 的 0/1 数组，按开启孔数由多到少排列
+    """
+    rows = [s for s in itertools.product((1.0, 0.0), repeat=n_bays)
+            if sum(s) >= min_open and (not symmetric or s == s[::-1])]
+    rows.sort(key=lambda s: -sum(s))
+    return np.array(rows, dtype=float).reshape(-1, n_bays)
+
+
+def parse_schedules(text: str, n_bays: Optional[int] = None) -> np.ndarray:
+    """解析开启组合文本：每行一个组合，如 "1 1 0 1" 或 "1,0.5,0,1"，"1101" 亦可
+
+    Args:
+        text: 组合文本
+        n_bays: 孔数，给出时校验每行长度
+    """
+    rows = []
+    for i, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.replace(',', ' ').split()
+        if len(parts) == 1 and set(parts[0]) <= {'0', '1'}:
+            parts = list(parts[0])
+        try:
+            row = [float(v) for v in parts]
+        except ValueError:
+            raise ValueError(f"第 {i} 行无法解析：{line}") from None
+        if n_bays is not None and len(row) != n_bays:
+            raise ValueError(f"第 {i} 行为 {len(row)} 孔，应为 {n_bays} 孔")
+        if any(v < 0 or v > 1 for v in row):
+            raise ValueError(f"第 {i} 行开启度需在 0~1 之间")
+        rows.append(row)
+    if not rows:
+        raise ValueError("未给出开启组合")
+    if len({len(r) for r in rows}) > 1:
+        raise ValueError("各行孔数不一致")
+    return np.array(rows, dtype=float)
+
+
+def evaluate_schedules(Q, openings, b0: float, dc: float = 1.0, db: float = 1.0,
+                       key: str = 'd', base: Optional[dict] = None) -> Dict[str, object]:
+    """对全部开启组合与闸孔一次完成 B.1 计算
+
+    Args:
+        Q: 总流量 (m³/s)，标量或每组合一个值
+        openings: 开启度，形状 (组合数, 孔数)
+        b0, dc, db: 单孔净宽、中间墩厚、边墩厚 (m)
+        key: 判定控制孔的结果字段（取最大值），如 'd'、'Lsj'
+        base: 其余 B.1 参数（q 除外），缺省取 DEFAULTS
+
+    Returns:
+        {'q': 单宽流量 (组合数, 孔数),
+         'results': {RESULT_KEYS: (组合数, 孔数)},
+         'infeasible': 每组合是否有开启闸孔无解,
+         'governing_bay': 每组合的控制孔序号（从 0 起，无开启闸孔为 -1）,
+         'governing_value': 每组合 key 的最大值（不可行组合为 NaN）,
+         'governing': 全部组合中的控制情况 {'schedule','bay','q','openings','infeasible', RESULT_KEYS...}，
+                      无开启闸孔时为 None}
+    """
+    if key not in RESULT_KEYS:
+        raise ValueError(f"未知结果字段：{key}")
+    e = np.atleast_2d(np.asarray(openings, dtype=float))
+    q = distribute(Q, e, b0, dc, db)
+    params = dict(DEFAULTS, **(base or {}))
+    params['q'] = np.where(q > 0, q, np.nan)
+    results = compute_basin_batch(**{k: params[k] for k in INPUT_KEYS})
+    results = {k: np.broadcast_to(v, q.shape) for k, v in results.items()}
+
+    is_open = q > 0
+    failed = is_open & ~np.isfinite(results[key])
+    infeasible = failed.any(axis=1)
+    # 不可行组合的控制孔取无解孔中 q 最大者，其余取 key 最大的孔
+    values = np.where(is_open & np.isfinite(results[key]), results[key], -np.inf)
+    bay = np.where(infeasible, np.where(failed, q, -np.inf).argmax(axis=1), values.argmax(axis=1))
+    rows = np.arange(q.shape[0])
+    has_open = is_open.any(axis=1)
+    best = np.where(infeasible, np.nan, values[rows, bay])
+    out = {
+        'q': q,
+        'results': results,
+        'infeasible': infeasible,
+        'governing_bay': np.where(has_open, bay, -1),
+        'governing_value': np.where(has_open, best, np.nan),
+        'governing': None,
+    }
+    if has_open.any():
+        if infeasible.any():
+            s = int(np.argmax(np.where(infeasible, q[rows, bay], -np.inf)))
+        else:
+            s = int(np.argmax(np.where(has_open, best, -np.inf)))
+        b = int(bay[s])
+        out['governing'] = dict({'schedule': s, 'bay': b, 'q': float(q[s, b]), 'openings': e[s].tolist(),
+                                 'infeasible': bool(infeasible[s])},
+                                **{k: float(v[s, b]) for k, v in results.items()})
+    return out
+
+
+def schedule_table(evaluation: Dict[str, object], openings, key: str = 'd') -> Dict[str, np.ndarray]:
+    """每个组合一行的汇总：开启孔、是否不可行、控制孔（从 1 起，无开启闸孔为 NaN）、最大单宽流量与控制值"""
+    e = np.atleast_2d(np.asarray(openings, dtype=float))
+    q = evaluation['q']
+    labels = np.array([''.join('1' if v >= 1 else ('0' if v <= 0 else '◐') for v in row) for row in e], dtype=object)
+    is_open = q > 0
+    q_max = np.where(is_open.any(axis=1), np.where(is_open, q, -np.inf).max(axis=1, initial=-np.inf), np.nan)
+    return {
+        'openings': labels,
+        'n_open': (e > 0).sum(axis=1),
+        'infeasible': evaluation['infeasible'],
+        'governing_bay': np.where(evaluation['governing_bay'] >= 0, evaluation['governing_bay'] + 1.0, np.nan),
+        'q_max': q_max,
+        key: evaluation['governing_value'],
+    }
+
+
+def bay_lines(openings: Sequence[Sequence[float]]) -> str:
+    """开启组合数组转为文本（parse_schedules 的逆操作）"""
+    return "\n".join(" ".join(f"{v:g}" for v in row) for row in np.atleast_2d(openings))
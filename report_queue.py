@@ -0,0 +1,140 @@
+"""报告生成队列 - 多用户共享的有界线程池
+
+Web 版多个会话同时导出报告时，统一提交到本模块的共享线程池：
+工作线程数固定，排队总数有上限，每个用户（会话）同时进行的任务数有上限，
+超限时立即拒绝而不是阻塞计算请求。任务完成后由会话按任务号取回字节数据。
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+STATUS_TEXT = {
+    QUEUED: "排队中",
+    RUNNING: "生成中",
+    DONE: "已完成",
+    ERROR: "失败",
+}
+
+
+class ReportQueueFull(RuntimeError):
+    """排队任务已满或该用户任务数已达上限"""
+
+
+class _Job:
+    __slots__ = ("id", "user", "status", "result", "error", "submitted", "finished")
+
+    def __init__(self, job_id: str, user: str) -> None:
+        self.id = job_id
+        self.user = user
+        self.status = QUEUED
+        self.result = None
+        self.error = ""
+        self.submitted = time.monotonic()
+        self.finished = None
+
+
+class ReportQueue:
+    """有界报告生成队列
+
+    Args:
+        max_workers: 工作线程数
+        max_pending: 排队中 + 生成中任务总数上限
+        per_user: 每个用户同时进行的任务数上限
+        ttl: 已完成任务结果的保留时间 (s)，超时未取回即丢弃
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, per_user: int = 1, ttl: float = 600.0) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.per_user = per_user
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, user: str, fn: Callable[..., bytes], *args, **kwargs) -> str:
+        """提交报告生成任务，返回任务号；超限时抛出 ReportQueueFull"""
+        with self._lock:
+            self._expire()
+            active = [j for j in self._jobs.values() if j.status in (QUEUED, RUNNING)]
+            if sum(j.user == user for j in active) >= self.per_user:
+                raise ReportQueueFull("您已有报告正在生成，请等待完成后再提交")
+            if len(active) >= self.max_pending:
+                raise ReportQueueFull("报告生成队列已满，请稍后再试")
+            job = _Job(f"r{next(self._ids)}", user)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job: _Job, fn, args, kwargs) -> None:
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = DONE
+        except Exception as e:  # noqa: BLE001
+            job.error = str(e) or type(e).__name__
+            job.status = ERROR
+        finally:
+            job.finished = time.monotonic()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished is not None and now - j.finished > self.ttl]:
+            del self._jobs[job_id]
+
+    def status(self, job_id: str) -> Optional[str]:
+        """任务状态（QUEUED/RUNNING/DONE/ERROR），任务不存在或已过期返回 None"""
+        job = self._jobs.get(job_id)
+        return job.status if job else None
+
+    def position(self, job_id: str) -> int:
+        """排队位置（前面还有多少个排队任务），非排队状态返回 0"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            return sum(j.status == QUEUED and j.submitted < job.submitted for j in self._jobs.values())
+
+    def error(self, job_id: str) -> str:
+        job = self._jobs.get(job_id)
+        return job.error if job else ""
+
+    def pop_result(self, job_id: str) -> Optional[bytes]:
+        """取回已完成任务的结果并释放；未完成返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (DONE, ERROR):
+                return None
+            del self._jobs[job_id]
+            return job.result
+
+    def stats(self) -> Dict[str, int]:
+        """各状态任务数"""
+        with self._lock:
+            counts = {s: 0 for s in STATUS_TEXT}
+            for j in self._jobs.values():
+                counts[j.status] += 1
+            return counts
+
+
+def from_env() -> ReportQueue:
+    """按环境变量 XLC_REPORT_WORKERS / XLC_REPORT_QUEUE / XLC_REPORT_PER_USER 创建队列"""
+    return ReportQueue(
+        max_workers=int(os.environ.get("XLC_REPORT_WORKERS", "2")),
+        max_pending=int(os.environ.get("XLC_REPORT_QUEUE", "16")),
+        per_user=int(os.environ.get("XLC_REPORT_PER_USER", "1")),
+    )
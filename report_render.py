@@ -0,0 +1,210 @@
+"""轻量报告渲染 - HTML / Markdown，内容与 Word 报告一致
+
+模板在导入时编译为格式字符串，渲染只做一次 format_map，适合批量生成；
+Word 格式仍走 word_export（python-docx）。
+"""
+
+from __future__ import annotations
+
+import html
+import io
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from word_export import _fmt
+
+
+# 报告格式：键 -> (显示名, 扩展名, MIME)
+FORMATS = {
+    'docx': ("Word", ".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    'html': ("HTML", ".html", "text/html"),
+    'md': ("Markdown", ".md", "text/markdown"),
+}
+
+# (键, 名称, 单位)
+INPUT_ROWS = [
+    ('sigma0', "σ₀ - 跳跃淹没系数", ""),
+    ('alpha', "α - 动能校正系数", ""),
+    ('q', "q - 单宽流量", "m³/s/m"),
+    ('b1', "b₁ - 首端宽度", "m"),
+    ('b2', "b₂ - 末端宽度", "m"),
+    ('T0', "T₀ - 总势能", "m"),
+    ('p', "p - 校正长度参数", "m"),
+    ('hs', "h′ₛ - 出池河床水深", "m"),
+    ('Ls', "Lₛ - 斜段水平投影", "m"),
+    ('beta', "β - 水跃长度校正", ""),
+    ('g', "g - 重力加速度", "m/s²"),
+]
+
+RESULT_GROUPS = [
+    ("水深计算", [
+        ('hc', "收缩断面水深 hc", "m"),
+        ('hc_double_prime', "跃后水深 h″c", "m"),
+        ('delta_Z', "能量修正 ΔZ", "m"),
+        ('d', "池深 d", "m"),
+    ]),
+    ("长度计算", [
+        ('Lj', "水跃长度 Lⱼ", "m"),
+        ('Lsj', "护坦长度 Lsj", "m"),
+    ]),
+    ("其他参数", [
+        ('v', "流速 v", "m/s"),
+        ('Fr', "Froude数 Fr", ""),
+    ]),
+]
+
+FORMULAS = [
+    ("能量方程求解收缩水深", "T₀ = hc + αq²/(2g·hc²)"),
+    ("跃后水深（B.1.1-2）", "h″c = (hc/2)·(√(1 + 8αq²/(g·hc³)) − 1)·(b₁/b₂)^0.25"),
+    ("能量修正（B.1.1-4）", "ΔZ = αq²/(2gφ²h′s²) − αq²/(2g·h″c²)"),
+    ("消力池深度（B.1.1-1）", "d = σ₀h″c − h′s − ΔZ"),
+    ("水跃长度", "Lⱼ = 6.9(h″c − hc)"),
+    ("护坦长度", "Lsj = Lₛ + βLⱼ"),
+    ("弗劳德数", "Frc = vc/√(g·hc)"),
+]
+
+_HTML_STYLE = (
+    "body{font-family:'宋体',SimSun,serif;font-size:10.5pt;max-width:760px;margin:2cm auto;padding:0 2.2cm;}"
+    "h1{text-align:center;font-size:16pt;margin:0.2em 0;}"
+    "h2{font-size:12pt;margin-top:1.2em;}"
+    "h3{font-size:10.5pt;margin:0.8em 0 0.2em;}"
+    "p{margin:0.2em 0;}"
+    "table{border-collapse:collapse;}td{padding:1px 12px 1px 0;}"
+    ".note{font-size:9pt;font-style:italic;}"
+    "@media print{body{margin:0 auto;}}"
+)
+
+
+def _compile_html() -> Tuple[str, str, str]:
+    """编译 HTML 模板：(正文头, 输入参数段, 正文尾)"""
+    def row(key, label, unit):
+        return f"<tr><td>{label}</td><td>{{{key}}}</td><td>{unit}</td></tr>"
+
+    head = (
+        "<!DOCTYPE html><html lang=\"zh-CN\"><head><meta charset=\"UTF-8\">"
+        "<title>消力池计算报告 - {project}</title><style>" + _HTML_STYLE.replace("{", "{{").replace("}", "}}")
+        + "</style></head><body>"
+        "<h1>消力池计算报告</h1><h1>（{project}）</h1>"
+        "<h2>一、计算依据</h2><p>规范附录B.1 - 消力池计算</p>"
+        "<p>计算内容：收缩断面水深hc、跃后水深h″c、能量修正ΔZ、池深d、水跃长度Lⱼ、护坦长度Lsj</p>"
+    )
+    inputs = "<h2>二、输入参数</h2><table>" + "".join(row(*r) for r in INPUT_ROWS) + "</table>"
+    tail = "<h2>三、计算结果</h2>"
+    for title, rows in RESULT_GROUPS:
+        tail += f"<h3>【{title}】</h3><table>" + "".join(row(*r) for r in rows) + "</table>"
+    tail += "<h2>四、计算公式</h2><table>"
+    tail += "".join(f"<tr><td>{name}</td><td>{html.escape(expr)}</td></tr>" for name, expr in FORMULAS)
+    tail += "</table><p>计算时间：{timestamp}</p><p class=\"note\">注：本报告由消力池计算器自动生成</p></body></html>"
+    return head, inputs, tail
+
+
+def _compile_md() -> Tuple[str, str, str]:
+    """编译 Markdown 模板：(正文头, 输入参数段, 正文尾)"""
+    def row(key, label, unit):
+        return f"| {label} | {{{key}}} | {unit} |\n"
+
+    head = (
+        "# 消力池计算报告\n\n**（{project}）**\n\n"
+        "## 一、计算依据\n\n规范附录B.1 - 消力池计算\n\n"
+        "计算内容：收缩断面水深hc、跃后水深h″c、能量修正ΔZ、池深d、水跃长度Lⱼ、护坦长度Lsj\n\n"
+    )
+    inputs = "## 二、输入参数\n\n| 参数 | 数值 | 单位 |\n|---|---|---|\n" + "".join(row(*r) for r in INPUT_ROWS) + "\n"
+    tail = "## 三、计算结果\n\n"
+    for title, rows in RESULT_GROUPS:
+        tail += f"**【{title}】**\n\n| 项目 | 数值 | 单位 |\n|---|---|---|\n" + "".join(row(*r) for r in rows) + "\n"
+    tail += "## 四、计算公式\n\n"
+    tail += "".join(f"- {name}：`{expr}`\n" for name, expr in FORMULAS)
+    tail += "\n计算时间：{timestamp}\n\n*注：本报告由消力池计算器自动生成*\n"
+    return head, inputs, tail
+
+
+_TEMPLATES = {'html': _compile_html(), 'md': _compile_md()}
+
+
+def _values(results: Dict[str, Any], input_params: Optional[dict]) -> Dict[str, str]:
+    values = {key: "--" for _, rows in RESULT_GROUPS for key, _, _ in rows}
+    values.update({key: _fmt(results[key]) for key in values if key in results})
+    if input_params:
+        values.update({key: _fmt(input_params.get(key, 0)) for key, _, _ in INPUT_ROWS})
+    return values
+
+
+def render_report(
+    results: Dict[str, Any],
+    project_name: str = "消力池计算",
+    input_params: dict = None,
+    fmt: str = 'html',
+    timestamp: Optional[str] = None,
+) -> str:
+    """
+    渲染消力池计算报告文本
+
+    Args:
+        results: 计算结果字典（键同 export_energy_basin_to_word）
+        project_name: 工程名称
+        input_params: 输入参数字典
+        fmt: 'html' 或 'md'
+        timestamp: 计算时间文本，缺省取当前时间
+
+    Returns:
+        str: 报告内容
+    """
+    if fmt not in _TEMPLATES:
+        raise ValueError(f"不支持的报告格式：{fmt}")
+    head, inputs, tail = _TEMPLATES[fmt]
+    values = _values(results, input_params)
+    values['project'] = html.escape(project_name) if fmt == 'html' else project_name
+    values['timestamp'] = timestamp or datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')
+    template = head + inputs + tail if input_params else head + tail
+    return template.format_map(values)
+
+
+def render_report_bytes(
+    results: Dict[str, Any],
+    project_name: str = "消力池计算",
+    input_params: dict = None,
+    fmt: str = 'html',
+) -> bytes:
+    """按格式生成报告文件内容（docx 走 python-docx，其余为 UTF-8 文本）"""
+    if fmt == 'docx':
+        from word_export import export_energy_basin_to_bytes
+        return export_energy_basin_to_bytes(results, project_name, input_params)
+    return render_report(results, project_name, input_params, fmt).encode('utf-8')
+
+
+def iter_batch_reports(table: Dict[str, Any], fmt: str = 'html', project_name: str = "消力池计算",
+                       name_key: str = 'name') -> Iterator[Tuple[str, str]]:
+    """逐行渲染批量结果表（如 batch_upload.compute_table 的输出）
+
+    Yields:
+        (文件名, 报告内容)
+    """
+    n = len(table['hc'])
+    ext = FORMATS[fmt][1]
+    timestamp = datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')
+    aliases = {'v': 'vc', 'Fr': 'Frc'}
+    result_keys = [(k, aliases.get(k, k)) for _, rows in RESULT_GROUPS for k, _, _ in rows]
+    input_keys = [k for k, _, _ in INPUT_ROWS]
+    for i in range(n):
+        results = {k: table[src][i] for k, src in result_keys if src in table}
+        inputs = {k: table[k][i] for k in input_keys if k in table}
+        label = str(table[name_key][i]) if name_key in table else f"{i + 1:06d}"
+        title = f"{project_name} - {label}"
+        yield f"{i + 1:06d}_{label}{ext}", render_report(results, title, inputs or None, fmt, timestamp)
+
+
+def _entry_name(name: str) -> str:
+    """压缩包内文件名：名称列来自用户上传的表格，去掉路径分隔符与 ..，避免解压到目录之外"""
+    return name.replace("/", "_").replace("\\", "_").replace("..", "_")
+
+
+def batch_zip_bytes(table: Dict[str, Any], fmt: str = 'html', project_name: str = "消力池计算") -> bytes:
+    """批量渲染报告并打包为 zip"""
+    if fmt not in _TEMPLATES:
+        raise ValueError(f"批量报告仅支持 HTML / Markdown：{fmt}")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for name, text in iter_batch_reports(table, fmt, project_name):
+            zf.writestr(_entry_name(name), text)
+    return buf.getvalue()
@@ -0,0 +1,207 @@
+"""批量工况列式存储 - 参数扫描 / 蒙特卡洛结果的紧凑二进制格式
+
+文件格式（.xlcc，小端）：
+
+    偏移 0    8 字节魔数 b"XLCCOL01"
+    偏移 8    uint32 头部长度 N
+    偏移 12   N 字节 UTF-8 JSON 头部
+    ...       填充 0 至 64 字节对齐
+    数据区    起点为 align64(12 + N)，每个字段一段连续数组，段首 64 字节对齐
+
+JSON 头部字段：
+    version  格式版本（当前为 1）
+    rows     行数
+    fields   [{"name": 字段名, "dtype": "<f8" 或 "<f4", "offset": 段首相对数据区的偏移}, ...]
+    meta     任意附加信息（如扫描参数），可省略
+
+写入端按块追加（ColumnWriter.append），各列先写入同目录下的临时列文件，
+close 时一次拼接为最终文件，内存占用与总行数无关；读取端用内存映射按列零拷贝访问。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+
+MAGIC = b"XLCCOL01"
+VERSION = 1
+ALIGN = 64
+SUFFIX = ".xlcc"
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _dtype(float32: bool) -> np.dtype:
+    return np.dtype('<f4') if float32 else np.dtype('<f8')
+
+
+class ColumnWriter:
+    """按块追加写入列式文件
+
+    用法：
+        with ColumnWriter(path, fields) as w:
+            w.append({'q': q_chunk, 'd': d_chunk, ...})
+    """
+
+    def __init__(self, path: str, fields: Iterable[str], float32: bool = False,
+                 meta: Optional[dict] = None) -> None:
+        self.path = str(path)
+        self.fields = list(fields)
+        if not self.fields:
+            raise ValueError("字段列表为空")
+        if len(set(self.fields)) != len(self.fields):
+            raise ValueError("字段名重复")
+        self.dtype = _dtype(float32)
+        self.meta = dict(meta or {})
+        self.rows = 0
+        self._tmpdir = tempfile.mkdtemp(prefix=".xlcc-", dir=os.path.dirname(os.path.abspath(self.path)))
+        self._spill = {name: open(os.path.join(self._tmpdir, f"{i}.bin"), "wb")
+                       for i, name in enumerate(self.fields)}
+        self._closed = False
+
+    def append(self, columns: Mapping[str, np.ndarray]) -> None:
+        """追加一块数据，各字段长度需一致（标量按块长广播）"""
+        if self._closed:
+            raise ValueError("写入器已关闭")
+        missing = [f for f in self.fields if f not in columns]
+        if missing:
+            raise KeyError(f"缺少字段：{', '.join(missing)}")
+        n = max((np.size(columns[f]) for f in self.fields), default=0)
+        for name in self.fields:
+            col = np.asarray(columns[name], dtype=self.dtype).ravel()
+            if col.size == 1 and n > 1:
+                col = np.full(n, col[0], dtype=self.dtype)
+            if col.size != n:
+                raise ValueError(f"字段 {name} 长度 {col.size} 与本块行数 {n} 不一致")
+            col.tofile(self._spill[name])
+        self.rows += n
+
+    def close(self) -> str:
+        """拼接临时列文件，写出最终文件并返回路径"""
+        if self._closed:
+            return self.path
+        for f in self._spill.values():
+            f.close()
+        try:
+            fields = []
+            offset = 0
+            for name in self.fields:
+                fields.append({'name': name, 'dtype': self.dtype.str, 'offset': offset})
+                offset = _align(offset + self.rows * self.dtype.itemsize)
+            header = {'version': VERSION, 'rows': self.rows, 'fields': fields, 'meta': self.meta}
+            header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+            data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+            tmp_path = self.path + ".partial"
+            with open(tmp_path, "wb") as out:
+                out.write(MAGIC)
+                out.write(struct.pack('<I', len(header_bytes)))
+                out.write(header_bytes)
+                for i, field in enumerate(fields):
+                    out.write(b"\0" * (data_start + field['offset'] - out.tell()))
+                    with open(os.path.join(self._tmpdir, f"{i}.bin"), "rb") as src:
+                        shutil.copyfileobj(src, out, 1 << 20)
+            os.replace(tmp_path, self.path)
+        finally:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._closed = True
+        return self.path
+
+    def abort(self) -> None:
+        """放弃写入，删除临时文件"""
+        for f in self._spill.values():
+            f.close()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        self._closed = True
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ColumnFile:
+    """以内存映射方式打开的列式文件，按字段名取列（只读、零拷贝）"""
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        self.header, self._data_start = _read_header(self.path)
+        self.rows = int(self.header['rows'])
+        self.meta = self.header.get('meta', {})
+        self._fields = {f['name']: f for f in self.header['fields']}
+        self._cache: Dict[str, np.ndarray] = {}
+
+    @property
+    def fields(self):
+        return list(self._fields)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._fields
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            f = self._fields[name]
+            if self.rows == 0:
+                self._cache[name] = np.empty(0, dtype=f['dtype'])
+            else:
+                self._cache[name] = np.memmap(self.path, dtype=np.dtype(f['dtype']), mode='r',
+                                              offset=self._data_start + f['offset'], shape=(self.rows,))
+        return self._cache[name]
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """返回 {字段名: 内存映射数组}"""
+        return {name: self[name] for name in (fields or self.fields)}
+
+
+def _read_header(path: str):
+    """读取并校验列式文件头部，返回 (头部字典, 数据区起点)"""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"不是列式工况文件：{path}")
+        (n,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(n).decode('utf-8'))
+    if header.get('version') != VERSION:
+        raise ValueError(f"不支持的列式文件版本：{header.get('version')}")
+    return header, _align(len(MAGIC) + 4 + n)
+
+
+def open_columns(path: str) -> ColumnFile:
+    """以内存映射方式打开列式文件"""
+    return ColumnFile(path)
+
+
+def write_columns(path: str, columns: Mapping[str, np.ndarray], float32: bool = False,
+                  meta: Optional[dict] = None) -> str:
+    """一次性写出 {字段名: 数组} 到列式文件"""
+    with ColumnWriter(path, columns.keys(), float32=float32, meta=meta) as w:
+        w.append(columns)
+    return w.path
+
+
+def read_columns(path: str, fields: Optional[Iterable[str]] = None, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """读取列式文件为 {字段名: 数组}
+
+    Args:
+        path: 文件路径
+        fields: 需要的字段，缺省读取全部
+        mmap: True 返回内存映射数组，False 读入内存副本
+    """
+    cols = open_columns(path).to_dict(fields)
+    return cols if mmap else {k: np.array(v) for k, v in cols.items()}
@@ -0,0 +1,265 @@
+"""河床土质参数表 - 海漫长度（B.2.1）与冲刷深度（B.3）的多土质批量计算
+
+每类土质给出海漫长度计算系数 Ks 的范围（表 B.2.1）与允许不冲流速 [v0] 的范围。
+同一出口在多种候选河床土质下的海漫长度、冲刷深度按 土质 × 工况 一次向量化计算，
+并按参数范围给出 最小 / 中值 / 最大 包络：
+
+    Lp 随 Ks 增大而增大，包络依次取 Ks_min、Ks_mid、Ks_max
+    dm 随 [v0] 增大而减小，包络依次取 v0_max、v0_mid、v0_min
+
+参数表文件（CSV 或 JSON）字段：name, Ks_min, Ks_max, v0_min, v0_max，
+JSON 可为记录列表或 {"soils": [...]}。环境变量 XLC_SOIL_CATALOG 指向的文件替换内置表。
+
+内置 [v0] 为水深约 1 m 时的常用经验值，工程应用应以地质勘察资料为准。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Union
+
+from formulas import DEFAULT_SET, compile_kernel
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+FIELDS = ('name', 'Ks_min', 'Ks_max', 'v0_min', 'v0_max')
+
+# 包络次序
+ENVELOPE = ('min', 'mid', 'max')
+
+# 内置参数表：(名称, Ks_min, Ks_max, v0_min, v0_max)
+DEFAULT_SOILS = (
+    ("粉砂、细砂", 13.0, 14.0, 0.3, 0.6),
+    ("中砂、粗砂、粉质黏土", 11.0, 12.0, 0.5, 0.8),
+    ("粉质黏土", 9.0, 10.0, 0.7, 1.0),
+    ("坚硬黏土", 7.0, 8.0, 1.2, 1.8),
+)
+
+
+class SoilClass:
+    """一类河床土质
+
+    Args:
+        name: 土质名称
+        Ks_min, Ks_max: 海漫长度计算系数范围（表 B.2.1）
+        v0_min, v0_max: 允许不冲流速范围 (m/s)
+    """
+
+    def __init__(self, name: str, Ks_min: float, Ks_max: float, v0_min: float, v0_max: float) -> None:
+        self.name = str(name).strip()
+        self.Ks_min, self.Ks_max = float(Ks_min), float(Ks_max)
+        self.v0_min, self.v0_max = float(v0_min), float(v0_max)
+        if not self.name:
+            raise ValueError("土质名称不能为空")
+        if not 0 < self.Ks_min <= self.Ks_max:
+            raise ValueError(f"{self.name}：Ks 范围无效（需 0 < Ks_min ≤ Ks_max）")
+        if not 0 < self.v0_min <= self.v0_max:
+            raise ValueError(f"{self.name}：[v0] 范围无效（需 0 < v0_min ≤ v0_max）")
+
+    @property
+    def Ks_mid(self) -> float:
+        return (self.Ks_min + self.Ks_max) / 2.0
+
+    @property
+    def v0_mid(self) -> float:
+        return (self.v0_min + self.v0_max) / 2.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {k: getattr(self, k) for k in FIELDS}
+
+    def __repr__(self) -> str:
+        return f"SoilClass({self.name!r}, Ks={self.Ks_min}~{self.Ks_max}, v0={self.v0_min}~{self.v0_max})"
+
+
+class SoilCatalog:
+    """按名称索引的土质参数表
+
+    Ks、v0 属性为形状 (土质数, 3) 的数组，列依次为 最小 / 中值 / 最大，首次访问时生成
+    （只取名称与参数的界面不必加载 numpy）。
+    """
+
+    def __init__(self, soils: Sequence[SoilClass]) -> None:
+        self.soils = list(soils)
+        if not self.soils:
+            raise ValueError("土质参数表为空")
+        self._index = {}
+        for i, soil in enumerate(self.soils):
+            if soil.name in self._index:
+                raise ValueError(f"土质名称重复：{soil.name}")
+            self._index[soil.name] = i
+        self._arrays = None
+
+    def _ranges(self):
+        if self._arrays is None:
+            import numpy as np
+            self._arrays = (np.array([(s.Ks_min, s.Ks_mid, s.Ks_max) for s in self.soils]),
+                            np.array([(s.v0_min, s.v0_mid, s.v0_max) for s in self.soils]))
+        return self._arrays
+
+    @property
+    def Ks(self) -> np.ndarray:
+        return self._ranges()[0]
+
+    @property
+    def v0(self) -> np.ndarray:
+        return self._ranges()[1]
+
+    @property
+    def names(self) -> List[str]:
+        return [s.name for s in self.soils]
+
+    def index(self, name: str) -> int:
+        try:
+            return self._index[name]
+        except KeyError:
+            raise KeyError(f"未知土质：{name}") from None
+
+    def subset(self, names: Sequence[str]) -> "SoilCatalog":
+        """按名称取子表（保持给定次序）"""
+        return SoilCatalog([self.soils[self.index(n)] for n in names])
+
+    def __getitem__(self, key: Union[str, int]) -> SoilClass:
+        return self.soils[self.index(key) if isinstance(key, str) else key]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __iter__(self) -> Iterator[SoilClass]:
+        return iter(self.soils)
+
+    def __len__(self) -> int:
+        return len(self.soils)
+
+    def to_csv_bytes(self) -> bytes:
+        """导出为 CSV（UTF-8 BOM，便于 Excel 打开与再次加载）"""
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(s.to_dict() for s in self.soils)
+        return buf.getvalue().encode('utf-8-sig')
+
+
+DEFAULT_CATALOG = SoilCatalog([SoilClass(*row) for row in DEFAULT_SOILS])
+
+
+def parse_catalog(data: bytes, filename: str) -> SoilCatalog:
+    """解析上传或读取的参数表内容
+
+    Args:
+        data: 文件内容
+        filename: 文件名（按扩展名区分 .json 与 CSV）
+    """
+    text = data.decode('utf-8-sig')
+    if filename.lower().endswith('.json'):
+        records = json.loads(text)
+        if isinstance(records, dict):
+            records = records.get('soils', [])
+    else:
+        records = list(csv.DictReader(io.StringIO(text)))
+    soils = []
+    for i, rec in enumerate(records, start=1):
+        rec = {str(k).strip(): v for k, v in rec.items()}
+        missing = [k for k in FIELDS if rec.get(k) in (None, '')]
+        if missing:
+            raise ValueError(f"参数表第 {i} 行缺少字段：{', '.join(missing)}")
+        try:
+            soils.append(SoilClass(rec['name'], *(float(rec[k]) for k in FIELDS[1:])))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"参数表第 {i} 行：{e}") from e
+    return SoilCatalog(soils)
+
+
+def load_catalog(path: str) -> SoilCatalog:
+    """从 CSV / JSON 文件加载参数表"""
+    with open(path, 'rb') as f:
+        return parse_catalog(f.read(), path)
+
+
+def from_env() -> SoilCatalog:
+    """按环境变量 XLC_SOIL_CATALOG 加载参数表，未设置时使用内置表"""
+    path = os.environ.get("XLC_SOIL_CATALOG")
+    return load_catalog(path) if path else DEFAULT_CATALOG
+
+
+def _scenario(x) -> np.ndarray:
+    """工况参数整理为形状 (1, 工况数, 1)，与 (土质数, 1, 3) 的土质参数广播"""
+    import numpy as np
+    return np.atleast_1d(np.asarray(x, dtype=float)).reshape(1, -1, 1)
+
+
+def apron_envelope(catalog: SoilCatalog, qs, delta_H) -> Dict[str, np.ndarray]:
+    """各土质 × 工况的海漫长度包络（B.2.1）
+
+    Args:
+        catalog: 土质参数表
+        qs: 消力池末端单宽流量，标量或一维数组 (m³/(s·m))
+        delta_H: 上下游水位差 ΔH'，与 qs 同形或标量 (m)
+
+    Returns:
+        {'Lp': 形状 (土质数, 工况数, 3) 的 最小/中值/最大, 'check': 形状 (工况数,) 的 √(qs·√ΔH')}
+    """
+    import numpy as np
+
+    qs, delta_H = np.broadcast_arrays(_scenario(qs), _scenario(delta_H))
+    out = compile_kernel(DEFAULT_SET, ('Lp', 'check'))(qs=qs, delta_H=delta_H, Ks=catalog.Ks[:, None, :])
+    return {'Lp': out['Lp'], 'check': np.broadcast_to(out['check'], qs.shape)[0, :, 0]}
+
+
+def scour_envelope(catalog: SoilCatalog, qm, hm, qm_up=None, hm_up=None) -> Dict[str, np.ndarray]:
+    """各土质 × 工况的河床冲刷深度包络（B.3.1，给出 qm_up、hm_up 时同时计算 B.3.2）
+
+    Args:
+        catalog: 土质参数表（海漫末端与上游护底首端取同一土质）
+        qm, hm: 海漫末端单宽流量 (m³/(s·m)) 与河床水深 (m)
+        qm_up, hm_up: 上游护底首端单宽流量与河床水深，可省略
+
+    Returns:
+        {'dm': 形状 (土质数, 工况数, 3), 'dm_prime': 同形（仅给出上游参数时）}
+    """
+    # 冲刷深度随 [v0] 减小而增大：按 v0_max、v0_mid、v0_min 排列即得 最小/中值/最大
+    v0 = catalog.v0[:, None, ::-1]
+    if qm_up is None or hm_up is None:
+        return compile_kernel(DEFAULT_SET, ('dm',))(qm=_scenario(qm), v0=v0, hm=_scenario(hm))
+    return compile_kernel(DEFAULT_SET, ('dm', 'dm_prime'))(
+        qm=_scenario(qm), v0=v0, hm=_scenario(hm), qm_up=_scenario(qm_up), v0_up=v0, hm_up=_scenario(hm_up))
+
+
+def envelope_table(catalog: SoilCatalog, qs, delta_H, qm, hm, qm_up=None, hm_up=None) -> Dict[str, np.ndarray]:
+    """土质 × 工况展开为长表（每行一个土质与工况组合）
+
+    Returns:
+        列字典：soil、scenario（工况序号，从 1 起）、check，
+        以及 Lp_min/Lp_mid/Lp_max、dm_min/…、dm_prime_min/…（给出上游参数时）
+    """
+    import numpy as np
+
+    apron = apron_envelope(catalog, qs, delta_H)
+    scour = scour_envelope(catalog, qm, hm, qm_up, hm_up)
+    n_soil = len(catalog)
+    n_scen = max(apron['Lp'].shape[1], scour['dm'].shape[1])
+    table = {
+        'soil': np.repeat(np.array(catalog.names, dtype=object), n_scen),
+        'scenario': np.tile(np.arange(1, n_scen + 1), n_soil),
+        'check': np.tile(np.broadcast_to(apron['check'], (n_scen,)), n_soil),
+    }
+    for key, values in (('Lp', apron['Lp']), *scour.items()):
+        values = np.broadcast_to(values, (n_soil, n_scen, 3)).reshape(-1, 3)
+        for j, level in enumerate(ENVELOPE):
+            table[f'{key}_{level}'] = values[:, j]
+    return table
+
+
+def governing(table: Dict[str, np.ndarray], key: str = 'dm_max') -> Optional[Dict[str, object]]:
+    """长表中 key 列最大的组合（控制土质与工况），全为 NaN 时返回 None"""
+    import numpy as np
+
+    values = np.asarray(table[key], dtype=float)
+    if not np.isfinite(values).any():
+        return None
+    i = int(np.nanargmax(values))
+    return {k: v[i] for k, v in table.items()}
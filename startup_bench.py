@@ -0,0 +1,157 @@
+"""启动耗时基准 - 核心模块导入时间与网页首屏渲染时间
+
+每项在独立的子进程中测量（避免模块已导入带来的偏差），重复若干次取最小值：
+
+    核心模块    python -X importtime 给出的累计导入时间，并检查是否带入了重量级依赖
+    首屏渲染    streamlit.testing 运行 app.py 的首次与再次执行耗时，以及首屏已加载的重量级库
+
+核心模块（公式、计算核、校验、指标）导入时间应低于预算（默认 50 ms），
+且不得导入 streamlit、tkinter、python-docx、numpy、pandas——这些只在首次使用时加载。
+
+    python startup_bench.py                 # 核心模块
+    python startup_bench.py --app           # 另测首屏渲染
+    python startup_bench.py --json log.jsonl  # 追加一条记录，便于跟踪历次变化
+
+超出预算或带入重量级依赖时退出码为 1。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence
+
+# 应保持轻量的核心模块
+CORE_MODULES = ('formulas', 'energy_basin', 'validation', 'metrics')
+
+# 核心模块不得在导入时带入的依赖
+HEAVY_MODULES = ('streamlit', 'tkinter', 'docx', 'numpy', 'pandas')
+
+# 首屏渲染时检查的重量级库
+APP_HEAVY_MODULES = ('numpy', 'pandas', 'pyarrow', 'altair', 'PIL', 'docx', 'tkinter')
+
+DEFAULT_BUDGET_MS = 50.0
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_APP_SCRIPT = r'''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+t0 = time.perf_counter(); at.run(); t1 = time.perf_counter(); at.run(); t2 = time.perf_counter()
+print(json.dumps({{"first_ms": (t1 - t0) * 1e3, "rerun_ms": (t2 - t1) * 1e3,
+                  "exception": bool(at.exception),
+                  "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=HERE, capture_output=True,
+                          text=True, encoding='utf-8', errors='replace')
+
+
+def measure_import(module: str, repeat: int = 5) -> Dict[str, object]:
+    """测量单个模块的累计导入时间
+
+    Returns:
+        {'module', 'import_ms'（各次最小值）, 'heavy'（导入时带入的重量级依赖）}
+    """
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    best, heavy = float('inf'), []
+    for _ in range(repeat):
+        proc = _run(code, '-X', 'importtime')
+        if proc.returncode != 0:
+            raise RuntimeError(f"导入 {module} 失败：{proc.stderr.strip().splitlines()[-1:]}")
+        for line in proc.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == module:
+                best = min(best, int(parts[1]) / 1e3)
+        heavy = [m for m in proc.stdout.strip().split(',') if m]
+    return {'module': module, 'import_ms': best, 'heavy': heavy}
+
+
+def measure_app(app: str = 'app.py', repeat: int = 3) -> Dict[str, object]:
+    """测量 app.py 首次执行（首屏）与再次执行的耗时
+
+    Returns:
+        {'first_ms', 'rerun_ms'（各次最小值）, 'loaded'（首屏已加载的重量级库）, 'exception'}
+    """
+    code = _APP_SCRIPT.format(app=os.path.join(HERE, app), heavy=APP_HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        proc = _run(code)
+        if proc.returncode != 0:
+            raise RuntimeError(f"运行 {app} 失败：{proc.stderr.strip().splitlines()[-1:]}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        'first_ms': min(r['first_ms'] for r in runs),
+        'rerun_ms': min(r['rerun_ms'] for r in runs),
+        'loaded': runs[-1]['loaded'],
+        'exception': any(r['exception'] for r in runs),
+    }
+
+
+def run_benchmark(modules: Sequence[str] = CORE_MODULES, budget_ms: float = DEFAULT_BUDGET_MS,
+                  app: bool = False, repeat: int = 5) -> Dict[str, object]:
+    """执行全部测量
+
+    Returns:
+        {'time', 'python', 'budget_ms', 'imports': [...], 'app': {...} 或 None, 'ok'}
+    """
+    imports = [measure_import(m, repeat) for m in modules]
+    ok = all(r['import_ms'] <= budget_ms and not r['heavy'] for r in imports)
+    app_result = measure_app(repeat=max(1, repeat // 2)) if app else None
+    if app_result is not None:
+        ok = ok and not app_result['exception']
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'budget_ms': budget_ms,
+        'imports': imports,
+        'app': app_result,
+        'ok': ok,
+    }
+
+
+def format_report(result: Dict[str, object]) -> str:
+    lines = [f"核心模块导入（预算 {result['budget_ms']:g} ms）："]
+    for r in result['imports']:
+        over = r['import_ms'] > result['budget_ms']
+        flag = "超出预算" if over else ("带入 " + "、".join(r['heavy']) if r['heavy'] else "通过")
+        lines.append(f"    {r['module']:<16}{r['import_ms']:8.1f} ms    {flag}")
+    app = result['app']
+    if app is not None:
+        lines.append("首屏渲染（app.py）：")
+        lines.append(f"    首次执行 {app['first_ms']:.0f} ms，再次执行 {app['rerun_ms']:.0f} ms")
+        lines.append(f"    已加载：{'、'.join(app['loaded']) or '无重量级库'}")
+        if app['exception']:
+            lines.append("    运行出现异常")
+    return "\n".join(lines)
+
+
+def _main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument("modules", nargs="*", default=list(CORE_MODULES), help="要测量的模块（默认核心模块）")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="单个模块导入时间预算 (ms)")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最小值")
+    parser.add_argument("--app", action="store_true", help="同时测量 app.py 首屏渲染（需 streamlit）")
+    parser.add_argument("--json", metavar="PATH", help="将结果追加为一行 JSON")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.modules, args.budget_ms, args.app, max(1, args.repeat))
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return 0 if result['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
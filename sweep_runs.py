@@ -0,0 +1,264 @@
+"""长时批量运行 - 网格扫描 / 蒙特卡洛 / 流量过程线，分块检查点与断点续算
+
+每个运行由一份规格（spec）描述，按 chunk_rows 切分为编号连续的块。
+每完成一块即把该块结果写为检查点目录下的列式文件，并原子更新 checkpoint.json
+记录已完成块号；进程被中断后以相同规格重新运行，会跳过已完成块继续计算。
+蒙特卡洛每块的随机数流由 SeedSequence(seed, spawn_key=(块号,)) 派生，
+与执行顺序、是否中断无关，续算结果与一次跑完完全一致。
+全部块完成后按块号顺序合并为一个输出文件。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from basin_batch import (DEFAULTS, INPUT_KEYS, RESULT_KEYS, STATUS_KEY, compute_basin_checked,
+                         grid_size, grid_slice)
+from scenario_store import ColumnWriter, open_columns, write_columns
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+SPEC_FILE = "spec.json"
+
+FIELDS = INPUT_KEYS + RESULT_KEYS + (STATUS_KEY,)
+
+ChunkFunc = Callable[[int, int, int], Dict[str, np.ndarray]]
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _spec_id(spec: dict) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _chunk_path(checkpoint_dir: str, index: int) -> str:
+    return os.path.join(checkpoint_dir, f"chunk_{index:06d}.xlcc")
+
+
+def _load_done(checkpoint_dir: str, spec: dict) -> set:
+    """读取已完成块号；检查点属于其他规格时报错，避免误拼接"""
+    spec_path = os.path.join(checkpoint_dir, SPEC_FILE)
+    if os.path.exists(spec_path):
+        with open(spec_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get('id') != _spec_id(spec):
+            raise ValueError(f"检查点目录 {checkpoint_dir} 属于另一规格的运行，请更换目录或删除后重试")
+    else:
+        _write_json(spec_path, {'id': _spec_id(spec), 'spec': spec})
+
+    cp_path = os.path.join(checkpoint_dir, CHECKPOINT_FILE)
+    if not os.path.exists(cp_path):
+        return set()
+    with open(cp_path, encoding="utf-8") as f:
+        done = set(json.load(f).get('done', []))
+    # 块文件缺失（如被手动删除）则重算该块
+    return {i for i in done if os.path.exists(_chunk_path(checkpoint_dir, i))}
+
+
+def merge_chunks(directory: str, n_chunks: int, out_path: str, float32: bool = False,
+                 meta: Optional[dict] = None) -> str:
+    """按块号顺序把目录中的块文件合并为一个输出文件"""
+    with ColumnWriter(out_path, FIELDS, float32=float32, meta=meta) as w:
+        for index in range(n_chunks):
+            w.append(open_columns(_chunk_path(directory, index)).to_dict(FIELDS))
+    return out_path
+
+
+def run_chunked(
+    spec: dict,
+    out_path: str,
+    checkpoint_dir: str,
+    chunk_rows: int = 1_000_000,
+    float32: bool = False,
+    keep_checkpoint: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """按块执行并写检查点，全部完成后合并输出
+
+    Args:
+        spec: 运行规格（grid_spec / monte_carlo_spec / hydrograph_spec 的返回值）
+        out_path: 合并后的输出列式文件
+        checkpoint_dir: 检查点目录
+        chunk_rows: 每块行数
+        float32: 以 float32 存储
+        keep_checkpoint: 合并后保留检查点目录
+        progress: progress(已完成块数, 总块数) 回调
+
+    Returns:
+        输出文件路径
+    """
+    spec = dict(spec, chunk_rows=chunk_rows, float32=float32)
+    n_rows, chunk_fn = build_job(spec)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    done = _load_done(checkpoint_dir, spec)
+    n_chunks = n_chunks_of(n_rows, chunk_rows)
+    cp_path = os.path.join(checkpoint_dir, CHECKPOINT_FILE)
+
+    for index in range(n_chunks):
+        if index in done:
+            continue
+        start, stop = chunk_bounds(index, n_rows, chunk_rows)
+        write_columns(_chunk_path(checkpoint_dir, index), chunk_fn(index, start, stop), float32=float32)
+        done.add(index)
+        _write_json(cp_path, {'id': _spec_id(spec), 'done': sorted(done), 'n_chunks': n_chunks})
+        if progress:
+            progress(len(done), n_chunks)
+
+    merge_chunks(checkpoint_dir, n_chunks, out_path, float32, meta=spec)
+    if not keep_checkpoint:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    return out_path
+
+
+def n_chunks_of(n_rows: int, chunk_rows: int) -> int:
+    return -(-n_rows // chunk_rows) if n_rows else 0
+
+
+def chunk_bounds(index: int, n_rows: int, chunk_rows: int):
+    start = index * chunk_rows
+    return start, min(start + chunk_rows, n_rows)
+
+
+def _compute(inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    results, codes = compute_basin_checked(**inputs)
+    return {**inputs, **results, STATUS_KEY: codes}
+
+
+def grid_spec(axes: dict) -> dict:
+    """网格扫描规格（轴定义同 basin_batch.grid_sweep）"""
+    return {'kind': 'grid', 'axes': {k: np.atleast_1d(v).astype(float).tolist() for k, v in axes.items()}}
+
+
+def _grid_job(spec: dict):
+    axes = spec['axes']
+
+    def chunk(index, start, stop):
+        return _compute(grid_slice(start, stop, **axes))
+
+    return grid_size(**axes), chunk
+
+
+def run_grid(out_path: str, checkpoint_dir: str, axes: dict, chunk_rows: int = 1_000_000, **kwargs) -> str:
+    """可续算的网格扫描（轴定义同 basin_batch.grid_sweep）"""
+    return run_chunked(grid_spec(axes), out_path, checkpoint_dir, chunk_rows, **kwargs)
+
+
+# 蒙特卡洛分布：名称 -> (参数个数, 采样函数)
+DISTRIBUTIONS = {
+    'uniform': (2, lambda rng, a, n: rng.uniform(a[0], a[1], n)),
+    'normal': (2, lambda rng, a, n: rng.normal(a[0], a[1], n)),
+    'lognormal': (2, lambda rng, a, n: rng.lognormal(a[0], a[1], n)),
+    'triangular': (3, lambda rng, a, n: rng.triangular(a[0], a[1], a[2], n)),
+}
+
+
+def monte_carlo_spec(n: int, distributions: dict, base: Optional[dict] = None, seed: int = 0) -> dict:
+    """蒙特卡洛规格
+
+    Args:
+        n: 样本数
+        distributions: {参数名: (分布名, 参数...)}，如 {'q': ('normal', 5.0, 0.5)}
+        base: 其余固定参数，缺省取 DEFAULTS
+        seed: 随机种子
+    """
+    base = dict(DEFAULTS, **(base or {}))
+    dists = {}
+    for key, dist in distributions.items():
+        if key not in INPUT_KEYS:
+            raise ValueError(f"未知参数：{key}")
+        name, *args = dist
+        if name not in DISTRIBUTIONS or len(args) != DISTRIBUTIONS[name][0]:
+            raise ValueError(f"{key} 的分布定义无效：{dist}")
+        dists[key] = [name] + [float(a) for a in args]
+    return {'kind': 'monte_carlo', 'n': int(n), 'seed': int(seed), 'distributions': dists,
+            'base': {k: float(v) for k, v in base.items()}}
+
+
+def _monte_carlo_job(spec: dict):
+    base, dists, seed = spec['base'], spec['distributions'], spec['seed']
+
+    def chunk(index, start, stop):
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+        size = stop - start
+        inputs = {k: np.full(size, base[k]) for k in INPUT_KEYS}
+        # 按参数名排序采样，保证随机数消耗顺序固定
+        for key in sorted(dists):
+            name, *args = dists[key]
+            inputs[key] = DISTRIBUTIONS[name][1](rng, args, size)
+        return _compute(inputs)
+
+    return spec['n'], chunk
+
+
+def run_monte_carlo(out_path: str, checkpoint_dir: str, n: int, distributions: dict,
+                    base: Optional[dict] = None, seed: int = 0, chunk_rows: int = 1_000_000, **kwargs) -> str:
+    """可续算的蒙特卡洛抽样计算（参数见 monte_carlo_spec，kwargs 传给 run_chunked）"""
+    spec = monte_carlo_spec(n, distributions, base, seed)
+    return run_chunked(spec, out_path, checkpoint_dir, chunk_rows, **kwargs)
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hydrograph_spec(series_path: str, base: Optional[dict] = None) -> dict:
+    """流量过程线规格
+
+    Args:
+        series_path: 过程线列式文件，含 q 列及可选的 T0、hs 等随时间变化的参数列
+        base: 其余固定参数，缺省取 DEFAULTS
+    """
+    base = dict(DEFAULTS, **(base or {}))
+    if 'q' not in open_columns(series_path):
+        raise ValueError("过程线文件缺少 q 列")
+    return {'kind': 'hydrograph', 'path': os.path.abspath(series_path), 'digest': _file_digest(series_path),
+            'base': {k: float(v) for k, v in base.items()}}
+
+
+def _hydrograph_job(spec: dict):
+    base = spec['base']
+    series = open_columns(spec['path'])
+
+    def chunk(index, start, stop):
+        inputs = {k: (np.asarray(series[k][start:stop], dtype=float) if k in series
+                      else np.full(stop - start, base[k])) for k in INPUT_KEYS}
+        return _compute(inputs)
+
+    return len(series), chunk
+
+
+def run_hydrograph(out_path: str, checkpoint_dir: str, series_path: str,
+                   base: Optional[dict] = None, chunk_rows: int = 1_000_000, **kwargs) -> str:
+    """可续算的流量过程线逐时段计算（参数见 hydrograph_spec，kwargs 传给 run_chunked）"""
+    return run_chunked(hydrograph_spec(series_path, base), out_path, checkpoint_dir, chunk_rows, **kwargs)
+
+
+_JOBS = {
+    'grid': _grid_job,
+    'monte_carlo': _monte_carlo_job,
+    'hydrograph': _hydrograph_job,
+}
+
+
+def build_job(spec: dict) -> Tuple[int, ChunkFunc]:
+    """由规格重建任务：(总行数, chunk_fn)，供本进程或其他工作进程按块计算"""
+    if spec.get('kind') not in _JOBS:
+        raise ValueError(f"未知的运行类型：{spec.get('kind')}")
+    return _JOBS[spec['kind']](spec)
@@ -0,0 +1,283 @@
+"""多进程 / 多机分片扫描 - 共享目录协调
+
+把 sweep_runs 的运行规格按块切分为确定的分片（分片号即块号），
+协调者与工作进程通过一个共享目录交换任务与结果，目录放在 NFS 等共享存储上
+即可跨机运行，单机上用多个工作进程模拟多节点：
+
+    <work_dir>/spec.json              运行规格
+    <work_dir>/leases/<分片>.lease     认领记录（O_EXCL 创建，内容为工作进程信息，mtime 为心跳）
+    <work_dir>/chunk_<分片>.xlcc       分片结果（原子写入，存在即视为完成）
+
+工作进程逐个认领未完成、无有效租约的分片，计算期间定时刷新租约 mtime；
+进程死亡后，协调者释放其租约并补发新的工作进程，其他机器上的失联进程
+由租约超时判定。全部分片完成后按分片号顺序合并为一个输出文件，
+结果与 sweep_runs 单进程运行完全一致。
+
+命令行：
+    python sweep_shards.py worker <work_dir>       在任一节点上加入计算
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from scenario_store import write_columns
+from sweep_runs import (SPEC_FILE, _chunk_path, _spec_id, _write_json, build_job, chunk_bounds,
+                        merge_chunks, n_chunks_of)
+
+
+LEASE_DIR = "leases"
+LEASE_TIMEOUT = 60.0        # 租约超过该时间未刷新视为失联 (s)
+POLL_S = 0.2
+
+
+def _lease_path(work_dir: str, index: int) -> str:
+    return os.path.join(work_dir, LEASE_DIR, f"{index:06d}.lease")
+
+
+def _load_spec(work_dir: str) -> dict:
+    with open(os.path.join(work_dir, SPEC_FILE), encoding="utf-8") as f:
+        return json.load(f)['spec']
+
+
+def prepare(work_dir: str, spec: dict, chunk_rows: int = 1_000_000, float32: bool = False) -> int:
+    """初始化共享目录并返回分片数；目录已属于其他规格时报错"""
+    spec = dict(spec, chunk_rows=chunk_rows, float32=float32)
+    os.makedirs(os.path.join(work_dir, LEASE_DIR), exist_ok=True)
+    spec_path = os.path.join(work_dir, SPEC_FILE)
+    if os.path.exists(spec_path):
+        with open(spec_path, encoding="utf-8") as f:
+            if json.load(f).get('id') != _spec_id(spec):
+                raise ValueError(f"分片目录 {work_dir} 属于另一规格的运行，请更换目录或删除后重试")
+    else:
+        _write_json(spec_path, {'id': _spec_id(spec), 'spec': spec})
+    n_rows, _ = build_job(spec)
+    return n_chunks_of(n_rows, chunk_rows)
+
+
+def _break_stale(path: str, timeout: float) -> None:
+    """租约超时则移除（先改名再删除，多个进程同时处理时只有一个成功）"""
+    try:
+        if time.time() - os.path.getmtime(path) <= timeout:
+            return
+        stale = f"{path}.{uuid.uuid4().hex}.stale"
+        os.rename(path, stale)
+        os.unlink(stale)
+    except FileNotFoundError:
+        pass
+
+
+def _claim(work_dir: str, index: int, worker: str, timeout: float) -> bool:
+    path = _lease_path(work_dir, index)
+    if os.path.exists(path):
+        _break_stale(path, timeout)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({'worker': worker, 'pid': os.getpid(), 'host': socket.gethostname()}, f)
+    # 认领期间其他进程可能刚好完成该分片
+    if os.path.exists(_chunk_path(work_dir, index)):
+        _release(work_dir, index)
+        return False
+    return True
+
+
+def _release(work_dir: str, index: int) -> None:
+    try:
+        os.unlink(_lease_path(work_dir, index))
+    except FileNotFoundError:
+        pass
+
+
+def _heartbeat(path: str, stop: threading.Event, interval: float) -> None:
+    while not stop.wait(interval):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return
+
+
+def pending(work_dir: str, n_shards: int) -> List[int]:
+    """尚未完成的分片号"""
+    return [i for i in range(n_shards) if not os.path.exists(_chunk_path(work_dir, i))]
+
+
+def run_worker(work_dir: str, worker: Optional[str] = None, lease_timeout: float = LEASE_TIMEOUT) -> int:
+    """工作进程主循环：认领并计算分片，直到没有可认领的分片
+
+    Returns:
+        本进程完成的分片数
+    """
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    spec = _load_spec(work_dir)
+    n_rows, chunk_fn = build_job(spec)
+    chunk_rows, float32 = spec['chunk_rows'], spec['float32']
+    n_shards = n_chunks_of(n_rows, chunk_rows)
+    finished = 0
+
+    while True:
+        claimed = None
+        for index in pending(work_dir, n_shards):
+            if _claim(work_dir, index, worker, lease_timeout):
+                claimed = index
+                break
+        if claimed is None:
+            return finished
+
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(_lease_path(work_dir, claimed), stop, lease_timeout / 3),
+                                daemon=True)
+        beat.start()
+        try:
+            start, end = chunk_bounds(claimed, n_rows, chunk_rows)
+            write_columns(_chunk_path(work_dir, claimed), chunk_fn(claimed, start, end), float32=float32)
+            finished += 1
+        finally:
+            stop.set()
+            _release(work_dir, claimed)
+
+
+def _leases_of(work_dir: str, worker: str) -> List[str]:
+    lease_dir = os.path.join(work_dir, LEASE_DIR)
+    owned = []
+    for name in os.listdir(lease_dir):
+        path = os.path.join(lease_dir, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if json.load(f).get('worker') == worker:
+                    owned.append(path)
+        except (FileNotFoundError, ValueError):
+            continue
+    return owned
+
+
+def _claimable(work_dir: str, shards: List[int], timeout: float) -> bool:
+    """是否存在无人持有（或租约已超时）的分片"""
+    for index in shards:
+        path = _lease_path(work_dir, index)
+        _break_stale(path, timeout)
+        if not os.path.exists(path):
+            return True
+    return False
+
+
+def _spawn(work_dir: str, worker: str, lease_timeout: float) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", work_dir,
+                             "--id", worker, "--lease-timeout", str(lease_timeout)])
+
+
+def run_sharded(
+    spec: dict,
+    out_path: str,
+    work_dir: str,
+    n_workers: int = 4,
+    chunk_rows: int = 1_000_000,
+    float32: bool = False,
+    lease_timeout: float = LEASE_TIMEOUT,
+    max_restarts: int = 8,
+    keep_shards: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> str:
+    """协调者：启动本机工作进程、补发死亡进程、全部完成后合并
+
+    其他节点可随时以 `python sweep_shards.py worker <work_dir>` 加入同一目录。
+
+    Args:
+        spec: 运行规格（sweep_runs.grid_spec / monte_carlo_spec / hydrograph_spec）
+        out_path: 合并后的输出列式文件
+        work_dir: 共享目录
+        n_workers: 本机工作进程数
+        chunk_rows: 每个分片的行数
+        float32: 以 float32 存储
+        lease_timeout: 租约超时 (s)
+        max_restarts: 工作进程异常退出后的最多补发次数
+        keep_shards: 合并后保留共享目录
+        progress: progress(已完成分片数, 总分片数) 回调
+
+    Returns:
+        输出文件路径
+    """
+    n_shards = prepare(work_dir, spec, chunk_rows, float32)
+    spec = _load_spec(work_dir)
+    workers: Dict[str, subprocess.Popen] = {}
+    seq = 0
+
+    def spawn() -> None:
+        nonlocal seq
+        seq += 1
+        worker = f"{socket.gethostname()}-w{seq}-{uuid.uuid4().hex[:6]}"
+        workers[worker] = _spawn(work_dir, worker, lease_timeout)
+
+    for _ in range(min(n_workers, n_shards)):
+        spawn()
+    restarts = 0
+    reported = -1
+    try:
+        while True:
+            left = pending(work_dir, n_shards)
+            if progress and n_shards - len(left) != reported:
+                reported = n_shards - len(left)
+                progress(reported, n_shards)
+            if not left:
+                break
+            for worker, proc in list(workers.items()):
+                code = proc.poll()
+                if code is None:
+                    continue
+                del workers[worker]
+                # 释放死亡进程持有的租约，分片立即可被重新认领
+                for path in _leases_of(work_dir, worker):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                if code != 0:
+                    if restarts >= max_restarts:
+                        raise RuntimeError(f"工作进程多次异常退出（退出码 {code}），已停止补发")
+                    restarts += 1
+                    spawn()
+            # 本机进程均已退出但仍有分片：由其他节点持有，待其完成或租约超时后再补发
+            if not workers and _claimable(work_dir, left, lease_timeout):
+                spawn()
+            time.sleep(POLL_S)
+    finally:
+        for proc in workers.values():
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in workers.values():
+            proc.wait()
+
+    merge_chunks(work_dir, n_shards, out_path, float32, meta=spec)
+    if not keep_shards:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return out_path
+
+
+def _main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="消力池分片扫描工作进程")
+    sub = parser.add_subparsers(dest="command", required=True)
+    w = sub.add_parser("worker", help="认领并计算共享目录中的分片")
+    w.add_argument("work_dir")
+    w.add_argument("--id", default=None, help="工作进程标识")
+    w.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT)
+    args = parser.parse_args(argv)
+    done = run_worker(args.work_dir, args.id, args.lease_timeout)
+    print(f"完成分片数：{done}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
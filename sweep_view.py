@@ -0,0 +1,347 @@
+"""扫描结果可视化 - 服务端降采样，图表数据量与网格规模无关
+
+1000×1000 的 q/T₀ 网格直接画图需要向浏览器发送一百万个点。本模块在服务端
+只计算（或只读取）当前视窗内的网格点，按块聚合（均值 / 最大 / 最小）到
+不超过 max_points 个格子，再生成热力图与等值线；放大视窗时重新查询，
+图表数据量保持不变而分辨率随之提高。
+
+数据来源：
+    grid_view   实时计算：放大时在视窗内按同样的每轴点数重新取网格，细节可超出原扫描
+    file_view   读取 sweep_to_file / sweep_runs.run_grid 写出的列式文件（内存映射，只读视窗内的行），
+                放大只截取已存网格，聚合块变小，最细到原始网格点
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from basin_batch import DEFAULTS, INPUT_KEYS, compute_basin_checked
+from scenario_store import open_columns
+
+
+MAX_POINTS = 40_000          # 每张图的格子数上限（约 200×200）
+CHUNK_POINTS = 1_000_000     # 实时计算时每块的网格点数
+
+# 可视化字段：键 -> (名称, 单位)
+FIELDS = {
+    'd': ("池深 d", "m"),
+    'Lsj': ("护坦长度 Lsj", "m"),
+    'Frc': ("弗劳德数 Frc", ""),
+}
+
+AGGREGATES = ('mean', 'max', 'min')
+
+Window = Tuple[float, float, float, float]     # (x0, x1, y0, y1)
+
+
+def _factors(nx: int, ny: int, max_points: int) -> Tuple[int, int]:
+    """块大小：两个方向按相同比例缩减，使块数不超过 max_points"""
+    f = max(1, math.ceil(math.sqrt(nx * ny / max_points)))
+    fx, fy = min(f, nx), min(f, ny)
+    # 一个方向已缩到 1 格时，剩余的缩减由另一方向承担
+    while math.ceil(nx / fx) * math.ceil(ny / fy) > max_points:
+        if fx < nx and (fx <= fy or fy >= ny):
+            fx += 1
+        else:
+            fy += 1
+    return fx, fy
+
+
+def _reduce(z: np.ndarray, fx: int, fy: int, how: str) -> np.ndarray:
+    """二维数组按 fx×fy 块聚合，不足整块的边缘以 NaN 补齐"""
+    nx, ny = z.shape
+    bx, by = math.ceil(nx / fx), math.ceil(ny / fy)
+    if (fx, fy) == (1, 1):
+        return z.astype(float, copy=False)
+    padded = np.full((bx * fx, by * fy), np.nan)
+    padded[:nx, :ny] = z
+    blocks = padded.reshape(bx, fx, by, fy)
+    with np.errstate(invalid='ignore'), _quiet():
+        if how == 'max':
+            return np.nanmax(blocks, axis=(1, 3))
+        if how == 'min':
+            return np.nanmin(blocks, axis=(1, 3))
+        return np.nanmean(blocks, axis=(1, 3))
+
+
+class _quiet:
+    """屏蔽全 NaN 块的 RuntimeWarning"""
+
+    def __enter__(self):
+        import warnings
+        self._ctx = warnings.catch_warnings()
+        self._ctx.__enter__()
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+    def __exit__(self, *exc):
+        return self._ctx.__exit__(*exc)
+
+
+def _axis_centers(values: np.ndarray, f: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每块 f 个点时的块中心与块边界 (centers, lo, hi)，相邻块以中点为界首尾相接"""
+    n = values.size
+    if n < 2:
+        return values.astype(float), values - 0.5, values + 0.5
+    starts = np.arange(0, n, f)
+    lo = np.empty(starts.size)
+    lo[0] = values[0] - (values[1] - values[0]) / 2.0
+    lo[1:] = (values[starts[1:] - 1] + values[starts[1:]]) / 2.0
+    hi = np.empty(starts.size)
+    hi[:-1] = lo[1:]
+    hi[-1] = values[-1] + (values[-1] - values[-2]) / 2.0
+    return (lo + hi) / 2.0, lo, hi
+
+
+def _window_slice(values: np.ndarray, lo: Optional[float], hi: Optional[float]) -> slice:
+    """升序轴上落在 [lo, hi] 内的下标范围（至少保留 2 个点）"""
+    i0 = 0 if lo is None else int(np.searchsorted(values, lo, side='left'))
+    i1 = values.size if hi is None else int(np.searchsorted(values, hi, side='right'))
+    if i1 - i0 < 2:
+        mid = min(max(i0, 1), values.size - 1)
+        i0, i1 = max(mid - 1, 0), min(mid + 1, values.size)
+    return slice(i0, i1)
+
+
+def _resample(values: np.ndarray, lo: Optional[float], hi: Optional[float]) -> np.ndarray:
+    """实时网格的视窗轴：[lo, hi] 截到名义范围内，按名义点数重新等距取点"""
+    if values.size < 2:
+        return values
+    lo = values[0] if lo is None else max(float(lo), float(values[0]))
+    hi = values[-1] if hi is None else min(float(hi), float(values[-1]))
+    if not hi > lo:
+        return values[_window_slice(values, lo, hi)]
+    return np.linspace(lo, hi, values.size)
+
+
+def _result(field, x_key, y_key, xs, ys, z, fx, fy, how) -> Dict[str, object]:
+    xc, x_lo, x_hi = _axis_centers(xs, fx)
+    yc, y_lo, y_hi = _axis_centers(ys, fy)
+    return {
+        'field': field, 'how': how, 'x_key': x_key, 'y_key': y_key,
+        'x': xc, 'y': yc, 'z': z,
+        'x_lo': x_lo, 'x_hi': x_hi, 'y_lo': y_lo, 'y_hi': y_hi,
+        'full_shape': (xs.size, ys.size), 'block': (fx, fy),
+        'window': (float(xs[0]), float(xs[-1]), float(ys[0]), float(ys[-1])),
+    }
+
+
+def grid_view(x_key: str, x_values, y_key: str, y_values, field: str = 'd',
+              window: Optional[Window] = None, base: Optional[dict] = None,
+              max_points: int = MAX_POINTS, how: str = 'mean') -> Dict[str, object]:
+    """按名义网格实时计算视窗内的聚合结果
+
+    Args:
+        x_key, y_key: 横、纵轴参数名（INPUT_KEYS 之一）
+        x_values, y_values: 名义网格的轴取值（升序）
+        field: 结果字段（FIELDS 之一或任意 RESULT_KEYS）
+        window: 视窗 (x0, x1, y0, y1)，None 为全范围；视窗截到名义网格范围内，
+            并在其中按名义网格的每轴点数重新等距取点
+        base: 其余固定参数，缺省取 DEFAULTS
+        max_points: 聚合后格子数上限
+        how: 'mean'、'max' 或 'min'
+
+    Returns:
+        {'x','y'（块中心）,'z'（形状 (nx, ny)）,'x_lo','x_hi','y_lo','y_hi','full_shape','block',...}
+    """
+    if x_key not in INPUT_KEYS or y_key not in INPUT_KEYS or x_key == y_key:
+        raise ValueError(f"坐标轴参数无效：{x_key}, {y_key}")
+    if how not in AGGREGATES:
+        raise ValueError(f"不支持的聚合方式：{how}")
+    xs = np.sort(np.asarray(x_values, dtype=float))
+    ys = np.sort(np.asarray(y_values, dtype=float))
+    if window is not None:
+        xs = _resample(xs, window[0], window[1])
+        ys = _resample(ys, window[2], window[3])
+    fx, fy = _factors(xs.size, ys.size, max_points)
+
+    params = dict(DEFAULTS, **(base or {}))
+    # 每块取 fx 的整数倍行，块间聚合互不跨越
+    rows = max(fx, (CHUNK_POINTS // max(ys.size, 1)) // fx * fx)
+    parts = []
+    for start in range(0, xs.size, rows):
+        xc = xs[start:start + rows]
+        X, Y = np.meshgrid(xc, ys, indexing='ij')
+        inputs = {k: params[k] for k in INPUT_KEYS}
+        inputs[x_key], inputs[y_key] = X, Y
+        results, _ = compute_basin_checked(**inputs)
+        z = np.broadcast_to(results[field], X.shape)
+        parts.append(_reduce(z, fx, fy, how))
+    return _result(field, x_key, y_key, xs, ys, np.concatenate(parts, axis=0), fx, fy, how)
+
+
+def file_view(path: str, field: str = 'd', window: Optional[Window] = None,
+              x_key: Optional[str] = None, y_key: Optional[str] = None,
+              max_points: int = MAX_POINTS, how: str = 'mean') -> Dict[str, object]:
+    """读取网格扫描列式文件并按视窗聚合
+
+    文件需带 meta['axes']（sweep_to_file、sweep_runs.run_grid 写出），且恰有两个
+    取值多于 1 个的轴，或由 x_key / y_key 指定（其余轴取第一个值）。
+    """
+    cols = open_columns(path)
+    axes_meta = cols.meta.get('axes')
+    if not axes_meta:
+        raise ValueError("文件不是网格扫描结果（缺少 axes 元数据）")
+    axes = {k: np.atleast_1d(np.asarray(axes_meta.get(k, DEFAULTS[k]), dtype=float)) for k in INPUT_KEYS}
+    varying = [k for k in INPUT_KEYS if axes[k].size > 1]
+    x_key = x_key or varying[0]
+    y_key = y_key or next(k for k in varying if k != x_key)
+    if how not in AGGREGATES:
+        raise ValueError(f"不支持的聚合方式：{how}")
+
+    shape = tuple(axes[k].size for k in INPUT_KEYS)
+    data = cols[field].reshape(shape)
+    index = []
+    for k in INPUT_KEYS:
+        if k == x_key:
+            index.append(slice(None))
+        elif k == y_key:
+            index.append(slice(None))
+        else:
+            index.append(0)
+    grid = data[tuple(index)]
+    if INPUT_KEYS.index(x_key) > INPUT_KEYS.index(y_key):
+        grid = grid.T
+
+    xs, ys = axes[x_key], axes[y_key]
+    ox, oy = np.argsort(xs), np.argsort(ys)
+    if not (np.all(ox == np.arange(xs.size)) and np.all(oy == np.arange(ys.size))):
+        grid, xs, ys = grid[np.ix_(ox, oy)], xs[ox], ys[oy]
+    if window is not None:
+        sx, sy = _window_slice(xs, window[0], window[1]), _window_slice(ys, window[2], window[3])
+        grid, xs, ys = grid[sx, sy], xs[sx], ys[sy]
+    fx, fy = _factors(xs.size, ys.size, max_points)
+
+    # 按 fx 行分段读取，内存映射只触及视窗内的数据
+    rows = max(fx, (CHUNK_POINTS // max(ys.size, 1)) // fx * fx)
+    parts = [_reduce(np.asarray(grid[s:s + rows], dtype=float), fx, fy, how) for s in range(0, xs.size, rows)]
+    return _result(field, x_key, y_key, xs, ys, np.concatenate(parts, axis=0), fx, fy, how)
+
+
+def contour_levels(z: np.ndarray, n: int = 10) -> np.ndarray:
+    """在有效值范围内取 n 个等间距等值线值"""
+    finite = z[np.isfinite(z)]
+    if finite.size == 0:
+        return np.array([])
+    lo, hi = float(finite.min()), float(finite.max())
+    if lo == hi:
+        return np.array([lo])
+    return np.linspace(lo, hi, n + 2)[1:-1]
+
+
+def contour_segments(x: np.ndarray, y: np.ndarray, z: np.ndarray, levels: Sequence[float]) -> Dict[str, np.ndarray]:
+    """向量化 marching squares，返回等值线线段
+
+    Args:
+        x, y: 格点坐标，z 的形状为 (x.size, y.size)
+        levels: 等值线值
+
+    Returns:
+        {'x','y','x2','y2','level'}：每条线段的起止点
+    """
+    out = {k: [] for k in ('x', 'y', 'x2', 'y2', 'level')}
+    if x.size < 2 or y.size < 2:
+        return {k: np.array([]) for k in out}
+    z00, z10, z01, z11 = z[:-1, :-1], z[1:, :-1], z[:-1, 1:], z[1:, 1:]
+    X0, Y0 = np.meshgrid(x[:-1], y[:-1], indexing='ij')
+    X1, Y1 = np.meshgrid(x[1:], y[1:], indexing='ij')
+
+    def cross(a, b, level):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (level - a) / (b - a)
+        return ((a >= level) != (b >= level)) & np.isfinite(a) & np.isfinite(b), t
+
+    for level in levels:
+        # 四条边：下 (y0, x 向)、右 (x1, y 向)、上 (y1, x 向)、左 (x0, y 向)
+        m_b, t_b = cross(z00, z10, level)
+        m_r, t_r = cross(z10, z11, level)
+        m_t, t_t = cross(z01, z11, level)
+        m_l, t_l = cross(z00, z01, level)
+        px = np.stack([X0 + t_b * (X1 - X0), X1, X0 + t_t * (X1 - X0), X0], axis=-1)
+        py = np.stack([Y0, Y0 + t_r * (Y1 - Y0), Y1, Y0 + t_l * (Y1 - Y0)], axis=-1)
+        mask = np.stack([m_b, m_r, m_t, m_l], axis=-1)
+        count = mask.sum(axis=-1)
+
+        two = count == 2
+        if np.any(two):
+            idx = np.nonzero(mask[two])[1].reshape(-1, 2)
+            sx, sy = px[two], py[two]
+            rows = np.arange(idx.shape[0])
+            out['x'].append(sx[rows, idx[:, 0]])
+            out['y'].append(sy[rows, idx[:, 0]])
+            out['x2'].append(sx[rows, idx[:, 1]])
+            out['y2'].append(sy[rows, idx[:, 1]])
+            out['level'].append(np.full(idx.shape[0], level))
+
+        four = count == 4
+        if np.any(four):
+            # 鞍点：按格子中心值决定连接方式
+            center = (z00 + z10 + z01 + z11)[four] / 4.0
+            same = (center >= level) == (z00[four] >= level)
+            sx, sy = px[four], py[four]
+            pairs = np.where(same[:, None], [[0, 1, 2, 3]], [[0, 3, 2, 1]])
+            rows = np.arange(sx.shape[0])
+            for a, b in ((0, 1), (2, 3)):
+                out['x'].append(sx[rows, pairs[:, a]])
+                out['y'].append(sy[rows, pairs[:, a]])
+                out['x2'].append(sx[rows, pairs[:, b]])
+                out['y2'].append(sy[rows, pairs[:, b]])
+                out['level'].append(np.full(sx.shape[0], level))
+    return {k: np.concatenate(v) if v else np.array([]) for k, v in out.items()}
+
+
+def _require_altair():
+    """检查并导入altair依赖（随 streamlit 安装）"""
+    try:
+        import altair as alt
+        return alt
+    except Exception as e:
+        raise ImportError("缺少依赖：altair（请先 pip install altair）") from e
+
+
+def view_chart(view: Dict[str, object], levels: int = 10, zoom: bool = True):
+    """热力图 + 等值线的 Altair 图表
+
+    格子数已由 max_points 限定；Streamlit 以 Arrow 传输数据，不受 Altair 默认
+    5000 行限制，在 Streamlit 之外导出规格时需在 alt.data_transformers.disable_max_rows() 下调用 to_dict。
+
+    Args:
+        view: grid_view / file_view 的返回值
+        levels: 等值线条数，0 为不画
+        zoom: 添加框选（名称 'zoom'），供 Streamlit on_select 回传视窗
+    """
+    alt = _require_altair()
+    import pandas as pd
+
+    field = view['field']
+    name, unit = FIELDS.get(field, (field, ""))
+    title = f"{name} ({unit})" if unit else name
+    nx, ny = view['z'].shape
+    cells = pd.DataFrame({
+        'x': np.repeat(view['x_lo'], ny), 'x2': np.repeat(view['x_hi'], ny),
+        'y': np.tile(view['y_lo'], nx), 'y2': np.tile(view['y_hi'], nx),
+        'z': view['z'].ravel(),
+    }, dtype='float32').dropna(subset=['z'])
+    x_scale = alt.Scale(domain=[float(view['x_lo'][0]), float(view['x_hi'][-1])], nice=False, zero=False)
+    y_scale = alt.Scale(domain=[float(view['y_lo'][0]), float(view['y_hi'][-1])], nice=False, zero=False)
+
+    heat = alt.Chart(cells).mark_rect().encode(
+        x=alt.X('x:Q', title=view['x_key'], scale=x_scale), x2='x2:Q',
+        y=alt.Y('y:Q', title=view['y_key'], scale=y_scale), y2='y2:Q',
+        color=alt.Color('z:Q', title=title, scale=alt.Scale(scheme='viridis')),
+        tooltip=[alt.Tooltip('z:Q', title=title, format='.4f')],
+    )
+    if zoom:
+        heat = heat.add_params(alt.selection_interval(name='zoom', encodings=['x', 'y']))
+    layers = [heat]
+    if levels:
+        seg = contour_segments(view['x'], view['y'], view['z'], contour_levels(view['z'], levels))
+        if seg['x'].size:
+            lines = pd.DataFrame(seg)
+            layers.append(alt.Chart(lines).mark_rule(color='white', strokeWidth=1, opacity=0.8).encode(
+                x='x:Q', y='y:Q', x2='x2:Q', y2='y2:Q',
+                tooltip=[alt.Tooltip('level:Q', title=title, format='.3f')],
+            ))
+    return alt.layer(*layers).properties(height=480)
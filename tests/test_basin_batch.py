@@ -0,0 +1,30 @@
+"""basin_batch.compute_basin_checked：标量输入与错误行置 NaN"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from basin_batch import DEFAULTS, compute_basin_checked  # noqa: E402
+
+
+def test_scalar_inputs_valid():
+    results, codes = compute_basin_checked(**DEFAULTS)
+    assert int(codes) == 0
+    assert results['d'].shape == (1,)
+    assert np.isfinite(results['d'][0])
+
+
+def test_scalar_inputs_invalid_row_is_nan():
+    results, codes = compute_basin_checked(**{**DEFAULTS, 'q': -1.0})
+    assert int(codes) != 0
+    assert all(np.isnan(v).all() for v in results.values())
+
+
+def test_result_keys_are_independent_arrays():
+    results, _ = compute_basin_checked(**{**DEFAULTS, 'q': np.array([5.0, -1.0])})
+    assert np.isfinite(results['d'][0]) and np.isnan(results['d'][1])
+    arrays = list(results.values())
+    assert not any(a is b for i, a in enumerate(arrays) for b in arrays[i + 1:])
@@ -0,0 +1,143 @@
+"""输入校验 - 整批掩码校验，逐行返回状态码
+
+每行状态码为若干标志位的按位或，0 表示通过。ERROR_MASK 内的标志为错误（该行结果无效），
+其余为提示（超出规范推荐范围，结果仍可用）。批量计算据此跳过坏行而不中断整批。
+numpy 在首次校验时导入，只取标志位与提示文字时不加载。
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# 错误
+ERR_NONFINITE = 1 << 0      # 输入含 NaN / inf
+ERR_NONPOSITIVE = 1 << 1    # 需大于 0 的参数 <= 0
+ERR_NEGATIVE = 1 << 2       # 需非负的参数 < 0
+ERR_NO_HC = 1 << 3          # 无有效收缩水深 hc
+
+# 提示
+WARN_SIGMA0 = 1 << 8        # σ₀ 不在 1.05~1.10
+WARN_ALPHA = 1 << 9         # α 不在 1.0~1.05
+WARN_BETA = 1 << 10         # β 不在 0.7~0.8
+WARN_APRON_RANGE = 1 << 11  # B.2.1 √(qs·√ΔH') 不在 [1, 9]
+
+ERROR_MASK = ERR_NONFINITE | ERR_NONPOSITIVE | ERR_NEGATIVE | ERR_NO_HC
+
+MESSAGES = {
+    ERR_NONFINITE: "输入含非数值（NaN 或无穷大）",
+    ERR_NONPOSITIVE: "σ₀/α/q/b₁/b₂/T₀/h′ₛ/g 需大于 0",
+    ERR_NEGATIVE: "p/Lₛ/β 不能为负",
+    ERR_NO_HC: "无法求解收缩水深 hc（αq²/2g 过大或 T₀ 过小）",
+    WARN_SIGMA0: "σ₀ 超出推荐范围 1.05~1.10",
+    WARN_ALPHA: "α 超出推荐范围 1.0~1.05",
+    WARN_BETA: "β 超出推荐范围 0.7~0.8",
+    WARN_APRON_RANGE: "√(qs·√ΔH') 超出 B.2.1 适用范围 [1, 9]",
+}
+
+# 推荐取值范围
+RANGES = {
+    'sigma0': (1.05, 1.10, WARN_SIGMA0),
+    'alpha': (1.0, 1.05, WARN_ALPHA),
+    'beta': (0.7, 0.8, WARN_BETA),
+}
+
+_POSITIVE = ('sigma0', 'alpha', 'q', 'b1', 'b2', 'T0', 'hs', 'g')
+_NON_NEGATIVE = ('p', 'Ls', 'beta')
+
+
+def _flag(codes: np.ndarray, mask, flag: int) -> None:
+    import numpy as np
+    codes[np.broadcast_to(mask, codes.shape)] |= flag
+
+
+def validate_basin_inputs(sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g=9.81) -> np.ndarray:
+    """校验消力池（B.1）输入
+
+    Args:
+        参数同 basin_batch.compute_basin_batch，可为标量或数组
+
+    Returns:
+        广播后形状的 uint16 状态码数组
+    """
+    import numpy as np
+
+    values = dict(zip(
+        ('sigma0', 'alpha', 'q', 'b1', 'b2', 'T0', 'p', 'hs', 'Ls', 'beta', 'g'),
+        np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in
+                              (sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g))),
+    ))
+    shape = values['q'].shape
+    codes = np.zeros(shape, dtype=np.uint16)
+
+    with np.errstate(invalid='ignore'):
+        for v in values.values():
+            _flag(codes, ~np.isfinite(v), ERR_NONFINITE)
+        for k in _POSITIVE:
+            _flag(codes, values[k] <= 0, ERR_NONPOSITIVE)
+        for k in _NON_NEGATIVE:
+            _flag(codes, values[k] < 0, ERR_NEGATIVE)
+        for k, (lo, hi, flag) in RANGES.items():
+            _flag(codes, (values[k] < lo) | (values[k] > hi), flag)
+
+        # hc^3 - T0*hc^2 + K = 0 有急流根的条件：27K <= 4*T0^3
+        K = values['alpha'] * values['q'] ** 2 / (2.0 * values['g'])
+        no_hc = 27.0 * K > 4.0 * values['T0'] ** 3
+        _flag(codes, ((codes & ERROR_MASK) == 0) & no_hc, ERR_NO_HC)
+    return codes
+
+
+def validate_apron_inputs(qs, delta_H) -> np.ndarray:
+    """校验海漫长度（B.2.1）输入及适用范围
+
+    Args:
+        qs: 消力池末端单宽流量 (m³/(s·m))
+        delta_H: 上下游水位差 ΔH' (m)
+
+    Returns:
+        uint16 状态码数组
+    """
+    import numpy as np
+
+    qs, delta_H = np.broadcast_arrays(np.asarray(qs, dtype=float), np.asarray(delta_H, dtype=float))
+    codes = np.zeros(qs.shape, dtype=np.uint16)
+    with np.errstate(invalid='ignore'):
+        _flag(codes, ~np.isfinite(qs) | ~np.isfinite(delta_H), ERR_NONFINITE)
+        _flag(codes, (qs <= 0) | (delta_H <= 0), ERR_NONPOSITIVE)
+        check = np.sqrt(qs * np.sqrt(delta_H))
+        _flag(codes, ((codes & ERROR_MASK) == 0) & ((check < 1.0) | (check > 9.0)), WARN_APRON_RANGE)
+    return codes
+
+
+def is_error(codes) -> np.ndarray:
+    """错误行掩码"""
+    import numpy as np
+    return (np.asarray(codes) & ERROR_MASK) != 0
+
+
+def messages(code: int) -> List[str]:
+    """单个状态码对应的全部提示信息"""
+    code = int(code)
+    return [msg for flag, msg in MESSAGES.items() if code & flag]
+
+
+def row_messages(codes) -> List[str]:
+    """逐行提示信息（以"；"连接），按不同状态码去重后映射，适用于大批量"""
+    import numpy as np
+
+    codes = np.asarray(codes).ravel()
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    text = np.array(["；".join(messages(c)) for c in uniq], dtype=object)
+    return text[inverse].tolist()
+
+
+def summarize(codes) -> Dict[str, int]:
+    """统计各类问题的行数"""
+    import numpy as np
+
+    codes = np.asarray(codes)
+    return {msg: int(np.count_nonzero(codes & flag)) for flag, msg in MESSAGES.items()
+            if np.any(codes & flag)}
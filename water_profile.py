@@ -0,0 +1,258 @@
+"""消力池与海漫水面线 - 渐变流推算与水跃定位（向量化）
+
+B.1 只给出收缩断面水深 hc 与跃后水深 h″c，水跃长度取经验值 6.9(h″c − hc)。本模块沿
+斜坡 Ls、消力池与海漫推算水面线，按动量方程定位水跃，给出各断面水深与流速；所有工况
+排成一维数组，沿程逐断面推进，每一步对全部工况向量化计算。
+
+几何与边界（单宽，宽浅矩形断面，水力半径取水深）：
+    坐标 x 自斜坡顶起算，0 ~ Ls 为斜坡，Ls ~ Lsj 为池底（水平），海漫另起坐标 0 ~ Lp；
+    池底高程为 0，斜坡顶与下游河床（海漫）高程为池深 d（d ≤ 0 时按 0 计）；
+    急流支：斜坡段按能量方程（不计摩阻，与 B.1.1 一致）求急流水深，坡脚即收缩断面 hc，
+            池内按渐变流方程向下游推算；
+    缓流支：池末水深取下游水深 hs + d + ΔZ（出池落差见 B.1.1-4），向上游推算；
+    海漫：末端水深取 hs，向上游推算。
+
+渐变流方程（四阶 Runge-Kutta 沿断面推进）：
+    dh/dx = (S0 − Sf) / (1 − Fr²)，Sf = n²q² / h^(10/3)，Fr² = αq² / (g·h³)
+
+水跃位置：急流水深的共轭水深 h₁/2·(√(1 + 8Fr₁²) − 1) 等于缓流支水深处，坡脚作为附加断面参与
+插值；其后水跃区长度取 6.9(h₂ − h₁)，区内水深按线性过渡。斜坡顶（x = 0）处缓流支水深已不小于
+共轭水深时为淹没水跃，x_jump 取 0，h₁、h₂ 取斜坡顶两支水深，判别与断面划分无关。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from basin_batch import DEFAULTS, INPUT_KEYS, compute_basin_batch
+from formulas import solve_hc_array
+
+
+# 水跃状态
+JUMP_IN_BASIN = 0      # 水跃发生在池内
+JUMP_SUBMERGED = 1     # 下游水深过大，水跃被推至斜坡顶（淹没出流）
+JUMP_SWEPT = 2         # 急流冲出消力池，池内未形成水跃
+NO_SOLUTION = 3        # 无法求解收缩水深
+
+JUMP_NAMES = {
+    JUMP_IN_BASIN: "池内水跃",
+    JUMP_SUBMERGED: "淹没水跃",
+    JUMP_SWEPT: "水跃冲出池外",
+    NO_SOLUTION: "无解",
+}
+
+N_BASIN = 0.014        # 混凝土池底糙率
+N_APRON = 0.025        # 海漫糙率（浆砌石 / 混凝土块）
+
+# 推算停止的临界接近程度：|1 − Fr²| 小于此值后的断面记为 NaN
+_NEAR_CRITICAL = 0.05
+
+
+def _slope(h, Kc, Kf, S0):
+    """渐变流方程右端 dh/dx（Kc = αq²/g，Kf = n²q²），接近临界流时返回 NaN"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        h3 = h * h * h
+        denom = 1.0 - Kc / h3
+        Sf = Kf / (h3 * np.cbrt(h))
+        return np.where(np.abs(denom) > _NEAR_CRITICAL, (S0 - Sf) / denom, np.nan)
+
+
+def _rk4(h, dx, Kc, Kf, S0):
+    k1 = _slope(h, Kc, Kf, S0)
+    k2 = _slope(h + 0.5 * dx * k1, Kc, Kf, S0)
+    k3 = _slope(h + 0.5 * dx * k2, Kc, Kf, S0)
+    k4 = _slope(h + dx * k3, Kc, Kf, S0)
+    out = h + dx / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+    return np.where(out > 0, out, np.nan)
+
+
+def _backwater(x, h_end, Kc, Kf, S0, Ls=None):
+    """缓流支：自末断面向上游逐断面推算，x 形状 (断面数, 工况数)
+
+    给出坡脚位置 Ls 时，跨越坡脚的一步先按水平池底推至坡脚，再按斜坡推至上游断面。
+    """
+    h = np.full(x.shape, np.nan)
+    h[-1] = h_end
+    for j in range(x.shape[0] - 1, 0, -1):
+        h0, x0 = h[j], x[j]
+        if Ls is not None:
+            cross = (x[j - 1] < Ls) & (x[j] > Ls)
+            if cross.any():
+                h0 = np.where(cross, _rk4(h0, Ls - x0, Kc, Kf, 0.0), h0)
+                x0 = np.where(cross, Ls, x0)
+        h[j - 1] = _rk4(h0, x[j - 1] - x0, Kc, Kf, S0[j - 1])
+    return h
+
+
+def _conjugate(h, Kc):
+    """动量方程共轭水深（矩形断面，Kc = αq²/g）"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return h / 2.0 * (np.sqrt(1.0 + 8.0 * Kc / (h * h * h)) - 1.0)
+
+
+def _interp_uniform(s, values: np.ndarray) -> np.ndarray:
+    """在等分断面（相对位置 0 ~ 1）上逐工况线性插值，values 形状 (断面数, 工况数)"""
+    n = values.shape[0] - 1
+    with np.errstate(invalid='ignore'):
+        pos = np.clip(np.nan_to_num(s, nan=0.0) * n, 0.0, n)
+    i = np.minimum(pos.astype(int), n - 1)
+    cols = np.arange(values.shape[1])
+    out = values[i, cols] + (pos - i) * (values[i + 1, cols] - values[i, cols])
+    return np.where(np.isfinite(s), out, np.nan)
+
+
+def compute_profile(n_stations: int = 101, n: float = N_BASIN, Lp=None, n_apron: float = N_APRON,
+                    apron_stations: int = 51, **params) -> Dict[str, np.ndarray]:
+    """批量推算消力池与海漫水面线
+
+    Args:
+        n_stations: 斜坡 + 消力池（0 ~ Lsj）等分断面数
+        n: 池底糙率
+        Lp: 海漫长度 (m)，标量或与工况同形；None 时不推算海漫
+        n_apron: 海漫糙率
+        apron_stations: 海漫等分断面数
+        **params: B.1 输入参数（INPUT_KEYS），标量或一维数组，缺省取 DEFAULTS
+
+    Returns:
+        一维（每工况一个值）：x_jump、h1、h2、L_roller、jump（水跃状态）及 B.1 结果字段；
+        二维（工况数, 断面数）：x、bed（底高程）、h、v、h_super、h_sub；
+        给出 Lp 时另有 x_apron、h_apron、v_apron
+    """
+    unknown = set(params) - set(INPUT_KEYS)
+    if unknown:
+        raise ValueError(f"未知参数：{', '.join(sorted(unknown))}")
+    if n_stations < 3:
+        raise ValueError("断面数至少为 3")
+    inputs = dict(DEFAULTS, **params)
+    arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(inputs[k], dtype=float)) for k in INPUT_KEYS))
+    p = {k: a.ravel() for k, a in zip(INPUT_KEYS, arrays)}
+    res = {k: np.broadcast_to(v, p['q'].shape) for k, v in compute_basin_batch(**p).items()}
+    q, alpha, g = p['q'], p['alpha'], p['g']
+    Kc = alpha * q * q / g
+
+    # 内部按 (断面数, 工况数) 存放，逐断面推进时每步访问连续内存
+    Ls = np.maximum(p['Ls'], 0.0)
+    Lsj = res['Lsj']
+    drop = np.maximum(np.nan_to_num(res['d']), 0.0)
+    x = np.linspace(0.0, 1.0, n_stations)[:, None] * Lsj
+    on_slope = x < Ls
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bed = np.where(on_slope, drop * (1.0 - x / Ls), 0.0)
+        S0 = np.where(on_slope, drop / Ls, 0.0)
+
+    # 急流支：斜坡段按能量方程，池内自收缩断面（坡脚）向下游推算
+    h_super = np.full(x.shape, np.nan)
+    cols = np.nonzero(on_slope)[1]
+    h_super[on_slope] = solve_hc_array(p['T0'][cols] - bed[on_slope], alpha[cols], q[cols], g[cols])
+    hc = res['hc']
+    h_crit = np.cbrt(Kc)
+    Kf = n * n * q * q
+    zero = np.zeros_like(q)
+    # Ls = 0 时首断面即坡脚
+    h_super[0] = np.where(on_slope[0], h_super[0], hc)
+    for j in range(n_stations - 1):
+        past = ~on_slope[j + 1]
+        if not past.any():
+            continue
+        start_at_toe = on_slope[j]
+        x0 = np.where(start_at_toe, Ls, x[j])
+        h0 = np.where(start_at_toe, hc, h_super[j])
+        step = _rk4(h0, x[j + 1] - x0, Kc, Kf, zero)
+        # 急流在推算中不能变为缓流
+        step = np.where(step < h_crit, step, np.nan)
+        h_super[j + 1] = np.where(past, step, h_super[j + 1])
+
+    # 缓流支：池末为下游水深加出池落差
+    h_end = p['hs'] + drop + np.nan_to_num(res['delta_Z'])
+    h_sub = _backwater(x, h_end, Kc, Kf, S0, Ls)
+
+    # 坡脚处两支水深：急流为 hc，缓流自坡脚下游第一个池底断面按水平池底推回 x = Ls
+    cols = np.arange(x.shape[1])
+    k = np.minimum((~on_slope).argmax(axis=0), n_stations - 1)
+    toe = {'x': Ls, 'h_super': hc, 'h_sub': _rk4(h_sub[k, cols], Ls - x[k, cols], Kc, Kf, zero)}
+    toe['f'] = _conjugate(hc, Kc) - toe['h_sub']
+
+    # 水跃定位：共轭水深首次不大于缓流支水深处；斜坡顶即满足时为淹没水跃
+    f = _conjugate(h_super, Kc) - h_sub
+    solved = np.isfinite(hc)
+    submerged = solved & (f[0] <= 0)
+    hit = np.isfinite(f) & (f <= 0)
+    any_hit = hit.any(axis=0)
+    j1 = np.where(any_hit, hit.argmax(axis=0), 0)
+    j0 = np.maximum(j1 - 1, 0)
+    # 区间跨越坡脚时以坡脚为一端：坡脚已满足则水跃在坡上，否则在坡脚以下
+    straddle = on_slope[j0, cols] & ~on_slope[j1, cols]
+    toe_end = straddle & (toe['f'] <= 0)
+    toe_start = straddle & ~(toe['f'] <= 0)
+
+    def ends(name, a):
+        a0 = np.where(toe_start, toe[name], a[j0, cols])
+        a1 = np.where(toe_end, toe[name], a[j1, cols])
+        return a0, a1
+
+    f0, f1 = ends('f', f)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(f0 / (f0 - f1), 0.0, 1.0)
+
+    def at_jump(name, a):
+        a0, a1 = ends(name, a)
+        return np.where(submerged, a[0], np.where(np.isfinite(t), a0 + t * (a1 - a0), a1))
+
+    found = solved & (submerged | any_hit)
+    jump = np.where(~solved, NO_SOLUTION,
+                    np.where(submerged, JUMP_SUBMERGED, np.where(any_hit, JUMP_IN_BASIN, JUMP_SWEPT)))
+    x_jump = np.where(found, at_jump('x', x), np.nan)
+    h1 = np.where(found, at_jump('h_super', h_super), np.nan)
+    h2 = np.where(found, at_jump('h_sub', h_sub), np.nan)
+    L_roller = 6.9 * (h2 - h1)
+
+    # 合成水面线：跃前急流、水跃区线性过渡、跃后缓流
+    x_after = np.minimum(x_jump + L_roller, Lsj)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        h_after = _interp_uniform(x_after / Lsj, h_sub)
+        ramp = h1 + (h_after - h1) * np.clip((x - x_jump) / (x_after - x_jump), 0.0, 1.0)
+    h = np.where(x < x_jump, h_super, np.where(x < x_after, ramp, h_sub))
+    h = np.where(jump == JUMP_SWEPT, h_super, np.where(jump == JUMP_SUBMERGED, h_sub, h))
+
+    out = dict(res)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out.update({
+            'x': x.T, 'bed': bed.T, 'h': h.T, 'v': (q / h).T, 'h_super': h_super.T, 'h_sub': h_sub.T,
+            'x_jump': x_jump, 'h1': h1, 'h2': h2, 'L_roller': L_roller, 'jump': jump,
+        })
+        if Lp is not None:
+            Lp = np.broadcast_to(np.asarray(Lp, dtype=float), q.shape)
+            xa = np.linspace(0.0, 1.0, apron_stations)[:, None] * Lp
+            ha = _backwater(xa, p['hs'], Kc, n_apron * n_apron * q * q, np.zeros_like(xa))
+            out.update({'x_apron': xa.T, 'h_apron': ha.T, 'v_apron': (q / ha).T})
+    return out
+
+
+def profile_table(profile: Dict[str, np.ndarray], row: int = 0) -> Dict[str, np.ndarray]:
+    """单个工况的沿程表：断面桩号、底高程、水深、水面高程、流速（含海漫段）
+
+    海漫桩号接在消力池末端之后，底高程为池深（下游河床）。
+    """
+    x, bed, h, v = (profile[k][row] for k in ('x', 'bed', 'h', 'v'))
+    part = np.full(x.shape, 'basin', dtype=object)
+    if 'x_apron' in profile:
+        drop = bed[0] if x.size else 0.0
+        xa = profile['x_apron'][row][1:] + x[-1]
+        x = np.concatenate([x, xa])
+        bed = np.concatenate([bed, np.full(xa.shape, drop)])
+        h = np.concatenate([h, profile['h_apron'][row][1:]])
+        v = np.concatenate([v, profile['v_apron'][row][1:]])
+        part = np.concatenate([part, np.full(xa.shape, 'apron', dtype=object)])
+    return {'x': x, 'part': part, 'bed': bed, 'h': h, 'surface': bed + h, 'v': v}
+
+
+def jump_summary(profile: Dict[str, np.ndarray], row: Optional[int] = None) -> Dict[str, object]:
+    """水跃位置与状态汇总（row 为 None 时返回全部工况的数组）"""
+    keys = ('jump', 'x_jump', 'h1', 'h2', 'L_roller', 'hc', 'hc_double_prime', 'Lj', 'Lsj')
+    if row is None:
+        return {k: profile[k] for k in keys}
+    out = {k: profile[k][row].item() for k in keys}
+    out['jump_name'] = JUMP_NAMES[int(out['jump'])]
+    return out
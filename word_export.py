@@ -1,10 +1,21 @@
 ﻿"""Word文档导出模块 - 消力池计算结果"""
 
 from __future__ import annotations
+import io
+import re
 from datetime import datetime
 from typing import Dict, Any
 
 
+# 版式（python-docx 与 docx_stream 流式写出共用）
+PAGE_MARGINS_CM = {'top': 2.0, 'bottom': 2.0, 'left': 2.2, 'right': 2.2}
+FONT_NAME = '宋体'
+FONT_SIZE_PT = 10.5
+TITLE_SIZE_PT = 16
+SECTION_SIZE_PT = 12
+NOTE_SIZE_PT = 9
+
+
 def _require_docx():
     """检查并导入python-docx依赖"""
     try:
@@ -23,6 +34,15 @@ def _ensure_docx_suffix(path: str) -> str:
     return p if p.lower().endswith(".docx") else (p + ".docx")
 
 
+# XML 1.0 不允许的控制字符（保留 \t \n \r），Word 遇到会拒绝打开文件
+_XML_INVALID = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xml_text(text) -> str:
+    """去掉文本中 XML 不允许的控制字符（如上传表格名称列中的不可见字符）"""
+    return _XML_INVALID.sub('', str(text))
+
+
 def _fmt(x, nd: int = 3) -> str:
     """格式化数值显示"""
     try:
@@ -40,16 +60,16 @@ def _build_doc_base():
 
     doc = Document()
     section = doc.sections[0]
-    section.top_margin = Cm(2.0)
-    section.bottom_margin = Cm(2.0)
-    section.left_margin = Cm(2.2)
-    section.right_margin = Cm(2.2)
+    section.top_margin = Cm(PAGE_MARGINS_CM['top'])
+    section.bottom_margin = Cm(PAGE_MARGINS_CM['bottom'])
+    section.left_margin = Cm(PAGE_MARGINS_CM['left'])
+    section.right_margin = Cm(PAGE_MARGINS_CM['right'])
 
     # 设置中文字体
     style = doc.styles['Normal']
-    style.font.name = '宋体'
-    style.element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
-    style.font.size = Pt(10.5)
+    style.font.name = FONT_NAME
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), FONT_NAME)
+    style.font.size = Pt(FONT_SIZE_PT)
 
     return doc, WD_ALIGN_PARAGRAPH, WD_LINE_SPACING, qn, Cm, Pt
 
@@ -61,7 +81,7 @@ def _add_centered_title(doc, title_text: str):
     p.alignment = WD_ALIGN_PARAGRAPH.CENTER
     run = p.add_run(title_text)
     run.bold = True
-    run.font.size = Pt(16)
+    run.font.size = Pt(TITLE_SIZE_PT)
 
 
 def _add_section_title(doc, title_text: str):
@@ -70,7 +90,7 @@ def _add_section_title(doc, title_text: str):
     p = doc.add_paragraph()
     run = p.add_run(title_text)
     run.bold = True
-    run.font.size = Pt(12)
+    run.font.size = Pt(SECTION_SIZE_PT)
 
 
 def _add_line(doc, text: str):
@@ -88,25 +108,8 @@ def _add_line(doc, text: str):
     doc.add_paragraph(text)
 
 
-def export_energy_basin_to_word(
-    results: Dict[str, Any],
-    output_path: str,
-    project_name: str = "消力池计算",
-    input_params: dict = None
-) -> str:
-    """
-    导出消力池计算结果到Word文档
-
-    Args:
-        results: 计算结果字典
-        output_path: 输出文件路径
-        project_name: 工程名称
-        input_params: 输入参数字典
-
-    Returns:
-        str: 实际保存的文件路径
-    """
-    output_path = _ensure_docx_suffix(output_path)
+def _build_energy_basin_doc(results: Dict[str, Any], project_name: str, input_params: dict = None):
+    """生成消力池计算报告文档对象"""
     doc, _, _, _, _, Pt = _build_doc_base()
 
     # 标题
@@ -165,9 +168,179 @@ def export_energy_basin_to_word(
     # 页脚说明
     p = doc.add_paragraph()
     run = p.add_run("注：本报告由消力池计算器自动生成")
-    run.font.size = Pt(9)
+    run.font.size = Pt(NOTE_SIZE_PT)
     run.italic = True
 
+    return doc
+
+
+def export_energy_basin_to_word(
+    results: Dict[str, Any],
+    output_path: str,
+    project_name: str = "消力池计算",
+    input_params: dict = None
+) -> str:
+    """
+    导出消力池计算结果到Word文档
+
+    Args:
+        results: 计算结果字典
+        output_path: 输出文件路径
+        project_name: 工程名称
+        input_params: 输入参数字典
+
+    Returns:
+        str: 实际保存的文件路径
+    """
+    output_path = _ensure_docx_suffix(output_path)
+    doc = _build_energy_basin_doc(results, project_name, input_params)
+
     # 保存文档
     doc.save(output_path)
     return output_path
+
+
+def export_energy_basin_to_bytes(
+    results: Dict[str, Any],
+    project_name: str = "消力池计算",
+    input_params: dict = None
+) -> bytes:
+    """
+    导出消力池计算结果为Word文档字节数据（不落盘，供Web下载）
+
+    Args:
+        results: 计算结果字典
+        project_name: 工程名称
+        input_params: 输入参数字典
+
+    Returns:
+        bytes: .docx 文件内容
+    """
+    buf = io.BytesIO()
+    _build_energy_basin_doc(results, project_name, input_params).save(buf)
+    return buf.getvalue()
+
+
+# 批量汇总表默认列：(键, 表头)
+BATCH_COLUMNS = [
+    ('q', "q (m³/s/m)"),
+    ('T0', "T₀ (m)"),
+    ('hs', "h′s (m)"),
+    ('hc', "hc (m)"),
+    ('hc_double_prime', "h″c (m)"),
+    ('d', "d (m)"),
+    ('Lj', "Lj (m)"),
+    ('Lsj', "Lsj (m)"),
+    ('Frc', "Frc"),
+]
+
+# 超过该行数时默认改用流式写出（docx_stream）
+STREAMING_ROWS = 500
+
+
+def export_batch_table_to_word(
+    table: Dict[str, Any],
+    output_path: str,
+    project_name: str = "消力池计算",
+    columns: list = None,
+    streaming: bool = None,
+) -> str:
+    """
+    导出批量计算结果汇总表到Word文档
+
+    Args:
+        table: {字段名: 数组}，如 batch_upload.compute_table 的输出
+        output_path: 输出文件路径
+        project_name: 工程名称
+        columns: [(键, 表头), ...]，缺省为 BATCH_COLUMNS（有 name 列时置于首列）
+        streaming: True 用 docx_stream 流式写出，False 用 python-docx，None 按行数自动选择
+
+    Returns:
+        str: 实际保存的文件路径
+    """
+    output_path = _ensure_docx_suffix(output_path)
+    if columns is None:
+        columns = ([('name', "工况")] if 'name' in table else []) + BATCH_COLUMNS
+    columns = [(k, h) for k, h in columns if k in table]
+    n = len(table[columns[0][0]]) if columns else 0
+    if streaming is None:
+        streaming = n > STREAMING_ROWS
+
+    def rows():
+        cols = [table[k] for k, _ in columns]
+        numeric = [getattr(getattr(c, 'dtype', None), 'kind', 'O') in ('f', 'i', 'u') for c in cols]
+        for i in range(n):
+            yield [_fmt(c[i]) if num else _xml_text(c[i]) for c, num in zip(cols, numeric)]
+
+    headers = [h for _, h in columns]
+    basis = "规范附录B.1 - 消力池计算"
+    timestamp = f"计算时间：{datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}"
+    footer = "注：本报告由消力池计算器自动生成"
+
+    if streaming:
+        from docx_stream import StreamingDocx
+        with StreamingDocx(output_path) as doc:
+            doc.title("消力池批量计算报告")
+            doc.title(f"（{project_name}）")
+            doc.paragraph()
+            doc.section("一、计算依据")
+            doc.paragraph(basis)
+            doc.paragraph()
+            doc.section(f"二、计算结果汇总（共 {n} 个工况）")
+            doc.begin_table(headers)
+            doc.add_rows(rows())
+            doc.end_table()
+            doc.paragraph()
+            doc.paragraph(timestamp)
+            doc.paragraph()
+            doc.note(footer)
+        return output_path
+
+    doc, _, _, _, _, Pt = _build_doc_base()
+    _add_centered_title(doc, "消力池批量计算报告")
+    _add_centered_title(doc, f"（{project_name}）")
+    doc.add_paragraph()
+    _add_section_title(doc, "一、计算依据")
+    doc.add_paragraph(basis)
+    doc.add_paragraph()
+    _add_section_title(doc, f"二、计算结果汇总（共 {n} 个工况）")
+    t = doc.add_table(rows=1, cols=len(headers))
+    t.style = 'Table Grid'
+    for cell, h in zip(t.rows[0].cells, headers):
+        cell.text = h
+    for values in rows():
+        for cell, v in zip(t.add_row().cells, values):
+            cell.text = v
+    doc.add_paragraph()
+    doc.add_paragraph(timestamp)
+    doc.add_paragraph()
+    p = doc.add_paragraph()
+    run = p.add_run(footer)
+    run.font.size = Pt(NOTE_SIZE_PT)
+    run.italic = True
+    doc.save(output_path)
+    return output_path
+
+
+def export_batch_table_to_bytes(
+    table: Dict[str, Any],
+    project_name: str = "消力池计算",
+    columns: list = None,
+    streaming: bool = None,
+) -> bytes:
+    """
+    导出批量计算结果汇总表为Word文档字节数据（供Web下载，可在报告队列中执行）
+
+    Args:
+        参数同 export_batch_table_to_word（无 output_path）
+
+    Returns:
+        bytes: .docx 文件内容
+    """
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_batch_table_to_word(table, os.path.join(tmp, "batch.docx"), project_name, columns, streaming)
+        with open(path, "rb") as f:
+            return f.read()
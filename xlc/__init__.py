@@ -0,0 +1 @@
+"""消力池计算桌面版（tkinter）与静态网页，桌面版在仓库根目录以 python -m xlc.energy_basin 运行。"""
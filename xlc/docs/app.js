@@ -17,31 +17,6 @@
     g: 9.81,
   };
 
-  function cbrt(x) {
-    return Math.sign(x) * Math.pow(Math.abs(x), 1 / 3);
-  }
-
-  // Solve x^3 + a x^2 + b x + d = 0; return real roots
-  function solveCubic(a, b, d) {
-    const p = b - (a * a) / 3;
-    const q = (2 * Math.pow(a, 3)) / 27 - (a * b) / 3 + d;
-    const disc = Math.pow(q / 2, 2) + Math.pow(p / 3, 3);
-    if (disc >= 0) {
-      const sqrt = Math.sqrt(disc);
-      const u = cbrt(-q / 2 + sqrt);
-      const v = cbrt(-q / 2 - sqrt);
-      return [u + v - a / 3];
-    }
-    const r = Math.sqrt(-p / 3);
-    const phi = Math.acos(-q / (2 * Math.pow(r, 3)));
-    const roots = [];
-    for (let k = 0; k < 3; k++) {
-      const t = 2 * r * Math.cos((phi + (2 * Math.PI * k) / 3) / 1);
-      roots.push(t - a / 3);
-    }
-    return roots;
-  }
-
   function compute() {
     const val = (id) => parseFloat($(id).value);
     const sigma0 = val("sigma0");
@@ -63,34 +38,19 @@
       return "σ0/α/q/b1/b2/T0/p/hs/g 需大于 0";
     }
 
-    // h_c from h_c^3 - T0*h_c^2 + α*q^2/(2*g*p^2) = 0
-    const coeffC = (alpha * q * q) / (2 * g * p * p);
-    const roots = solveCubic(-T0, 0, coeffC);
-    const positives = roots.filter((r) => r > 0);
-    const hc = positives.length ? Math.max(...positives) : Math.max(...roots);
-
-    // h_c'' from B.1.1-2
-    const shrink = Math.pow(b1 / b2, 0.25);
-    const sqrtTerm = Math.sqrt(1 + (8 * alpha * q * q) / (g * Math.pow(hc, 3)));
-    const hc2 = (hc / 2) * (sqrtTerm - 1) * shrink;
-
-    // ΔZ from B.1.1-4
-    const deltaZ = (alpha * q * q) / (2 * g * p * p * hs * hs) - (alpha * q * q) / (2 * g * hc2 * hc2);
-
-    // d from B.1.1-1
-    const d = sigma0 * hc2 - hs - deltaZ;
-
-    // Lj and Lsj from B.1.2
-    const Lj = 6.9 * (hc2 - hc);
-    const Lsj = Ls + beta * Lj;
+    // 公式由 formulas.py 导出到 formulas.js，与 Web 版、桌面版、批量计算一致
+    const r = window.XLCFormulas.evaluate({ sigma0, alpha, q, b1, b2, T0, p, hs, Ls, beta, g });
+    if (!Number.isFinite(r.hc)) {
+      return "无法求解收缩水深 h_c，请检查输入参数";
+    }
 
     return [
-      `h_c = ${fmt(hc)} m`,
-      `h_c'' = ${fmt(hc2)} m`,
-      `ΔZ = ${fmt(deltaZ)} m`,
-      `d (消力池深度) = ${fmt(d)} m`,
-      `L_j (水跃长度) = ${fmt(Lj)} m`,
-      `L_sj (消力池长度) = ${fmt(Lsj)} m`,
+      `h_c = ${fmt(r.hc)} m`,
+      `h_c'' = ${fmt(r.hc_double_prime)} m`,
+      `ΔZ = ${fmt(r.delta_Z)} m`,
+      `d (消力池深度) = ${fmt(r.d)} m`,
+      `L_j (水跃长度) = ${fmt(r.Lj)} m`,
+      `L_sj (消力池长度) = ${fmt(r.Lsj)} m`,
     ].join("\n");
   }
 
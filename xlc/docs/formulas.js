@@ -0,0 +1,78 @@
+// 由 formulas.py 自动生成（公式集：default），请勿手工修改
+// 重新生成：python formulas.py --js xlc/docs/formulas.js
+window.XLCFormulas = (function () {
+  function solveHc(T0, alpha, q, g) {
+    const K = (alpha * q * q) / (2 * g);
+    if (!(T0 > 0 && K > 0)) return NaN;
+    const arg = 1 - (27 * K) / (2 * Math.pow(T0, 3));
+    if (arg < -1) return NaN;
+    const phi = Math.acos(Math.min(arg, 1));
+    let hc = (T0 / 3) * (1 + 2 * Math.cos((phi + 4 * Math.PI) / 3));
+    for (let i = 0; i < 2; i++) {
+      const df = 3 * hc * hc - 2 * T0 * hc;
+      if (df !== 0) hc -= (Math.pow(hc, 3) - T0 * hc * hc + K) / df;
+    }
+    return hc > 0 && hc < T0 ? hc : NaN;
+  }
+
+  function evaluate(v) {
+    const T0 = v.T0;
+    const alpha = v.alpha;
+    const q = v.q;
+    const g = v.g ?? 9.81;
+    const b1 = v.b1;
+    const b2 = v.b2;
+    const sigma0 = v.sigma0;
+    const p = v.p;
+    const hs = v.hs;
+    const Ls = v.Ls;
+    const beta = v.beta;
+    const k1 = v.k1 ?? 0.175;
+    const delta_H = v.delta_H;
+    const gamma_b = v.gamma_b;
+    const k2 = v.k2 ?? 1.2;
+    const U = v.U;
+    const sign = v.sign ?? 1.0;
+    const Pm = v.Pm;
+    const gamma = v.gamma;
+    const hd = v.hd;
+    const qs = v.qs;
+    const Ks = v.Ks;
+    const hm = v.hm;
+    const v0 = v.v0;
+    const k_scour = v.k_scour ?? 1.1;
+    const qm = v.qm;
+    const hm_up = v.hm_up;
+    const v0_up = v.v0_up;
+    const k_scour_up = v.k_scour_up ?? 0.8;
+    const qm_up = v.qm_up;
+    const hc = solveHc(T0, alpha, q, g);
+    const vc = (q / hc);
+    const Frc = (vc / Math.sqrt((g * hc)));
+    const hc_double_prime = (((hc / 2.0) * (Math.sqrt((1.0 + (((8.0 * alpha) * Math.pow(q, 2)) / (g * Math.pow(hc, 3))))) - 1.0)) * Math.pow((b1 / b2), 0.25));
+    const hc_prime = (hc_double_prime / sigma0);
+    const hc_prime_adj = hc_double_prime;
+    const phi = ((p > 0) ? p : 1.0);
+    const delta_Z = (((alpha * Math.pow(q, 2)) / (((2.0 * g) * Math.pow(phi, 2)) * Math.pow(hs, 2))) - ((alpha * Math.pow(q, 2)) / ((2.0 * g) * Math.pow(hc_double_prime, 2))));
+    const d = (((sigma0 * hc_double_prime) - hs) - delta_Z);
+    const delta_E = (Math.pow((hc_double_prime - hc), 3) / ((4.0 * hc) * hc_double_prime));
+    const Lj = (6.9 * (hc_double_prime - hc));
+    const Lsj = (Ls + (beta * Lj));
+    const t_impact = (k1 * Math.sqrt((q * Math.sqrt(delta_H))));
+    const t_float = ((k2 * ((U - (gamma * hd)) + (sign * Pm))) / gamma_b);
+    const t_design = Math.max(t_impact, t_float);
+    const t_final = Math.max(t_design, 0.5);
+    const check = Math.sqrt((qs * Math.sqrt(delta_H)));
+    const Lp = (Ks * check);
+    const dm = (((k_scour * qm) / v0) - hm);
+    const dm_prime = (((k_scour_up * qm_up) / v0_up) - hm_up);
+    return { hc, vc, Frc, hc_double_prime, hc_prime, hc_prime_adj, phi, delta_Z, d, delta_E, Lj, Lsj, t_impact, t_float, t_design, t_final, check, Lp, dm, dm_prime };
+  }
+
+  return {
+    inputs: ["T0", "alpha", "q", "g", "b1", "b2", "sigma0", "p", "hs", "Ls", "beta", "k1", "delta_H", "gamma_b", "k2", "U", "sign", "Pm", "gamma", "hd", "qs", "Ks", "hm", "v0", "k_scour", "qm", "hm_up", "v0_up", "k_scour_up", "qm_up"],
+    defaults: { g: 9.81, k1: 0.175, k2: 1.2, sign: 1.0, k_scour: 1.1, k_scour_up: 0.8 },
+    outputs: ["hc", "vc", "Frc", "hc_double_prime", "hc_prime", "hc_prime_adj", "phi", "delta_Z", "d", "delta_E", "Lj", "Lsj", "t_impact", "t_float", "t_design", "t_final", "check", "Lp", "dm", "dm_prime"],
+    evaluate,
+  };
+})();
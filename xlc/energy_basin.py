@@ -1,43 +1,180 @@
 """消力池计算 GUI（tkinter 版，无外部依赖）。
 
-公式来源：附录 B.1，计算 h_c、h_c''、ΔZ、d、L_j、L_sj。
+公式来源：附录 B.1，计算 h_c、h_c''、ΔZ、d、L_j、L_sj，公式取自上级目录的 formulas 注册表（标准库后端）。
 改用 tkinter，避免 PyQt6 安装在 32 位 Python 3.13 上缺轮子的问题。
+参数扫描与批量文件在后台线程中计算，结果经队列由 after() 轮询回主线程，界面不冻结。
+
+在仓库根目录运行：python -m xlc.energy_basin
 """
 
+import csv
 import math
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox, ttk
+
+try:
+    from formulas import evaluate
+except ImportError as exc:
+    raise ImportError("未找到公式注册表 formulas：请在仓库根目录以 python -m xlc.energy_basin 运行，"
+                      "或将仓库根目录加入 PYTHONPATH") from exc
+import energy_basin as _core   # 仓库根目录的核心数学模块（cbrt、solve_cubic）
+
+
+KEYS = ("sigma0", "alpha", "q", "b1", "b2", "T0", "p", "hs", "Ls", "beta", "g")
+POSITIVE_KEYS = ("sigma0", "alpha", "q", "b1", "b2", "T0", "p", "hs", "g")
+RESULT_KEYS = ("hc", "hc2", "delta_z", "d", "Lj", "Lsj")
+_OUTPUTS = ("hc", "hc_double_prime", "delta_Z", "d", "Lj", "Lsj")   # 对应的注册表输出名
+
+PROGRESS_EVERY = 2000   # 后台任务每计算多少行上报一次进度
+POLL_MS = 100           # 主线程轮询结果队列的间隔
+DEBOUNCE_MS = 300       # 输入停止多久后自动重算
 
 
 def cbrt(x: float) -> float:
-    """Cubic root that preserves sign."""
-    return math.copysign(abs(x) ** (1.0 / 3.0), x)
+    """Cubic root that preserves sign (see energy_basin.cbrt)."""
+    return _core.cbrt(x)
 
 
 def solve_cubic(a: float, b: float, c: float, d: float):
-    """Solve x^3 + a x^2 + b x + d = 0; return real roots."""
-    p = b - (a * a) / 3.0
-    q = (2 * a ** 3) / 27.0 - (a * b) / 3.0 + d
-    disc = (q / 2.0) ** 2 + (p / 3.0) ** 3
-    if disc >= 0:
-        sqrt_disc = math.sqrt(disc)
-        u = cbrt(-q / 2.0 + sqrt_disc)
-        v = cbrt(-q / 2.0 - sqrt_disc)
-        return [u + v - a / 3.0]
-    r = math.sqrt(-p / 3.0)
-    phi = math.acos(-q / (2.0 * r ** 3))
-    roots = []
-    for k in range(3):
-        t = 2.0 * r * math.cos((phi + 2.0 * math.pi * k) / 3.0)
-        roots.append(t - a / 3.0)
-    return roots
+    """Solve x^3 + a x^2 + b x + d = 0; return real roots (see energy_basin.solve_cubic)."""
+    return _core.solve_cubic(a, b, c, d)
+
+
+def compute_basin(v: dict) -> dict:
+    """Compute one case of the B.1 chain; raise ValueError on invalid input."""
+    if any(v[k] <= 0 for k in POSITIVE_KEYS):
+        raise ValueError("所有输入需大于 0")
+    res = evaluate(v, outputs=_OUTPUTS, backend="scalar")
+    if math.isnan(res["hc"]):
+        raise ValueError("无法求解收缩水深 h_c")
+    return {key: res[src] for key, src in zip(RESULT_KEYS, _OUTPUTS)}
+
+
+def format_result(res: dict) -> str:
+    lines = [
+        f"h_c = {res['hc']:.4f} m",
+        f"h_c'' = {res['hc2']:.4f} m",
+        f"ΔZ = {res['delta_z']:.4f} m",
+        f"d (消力池深度) = {res['d']:.4f} m",
+        f"L_j (水跃长度) = {res['Lj']:.4f} m",
+        f"L_sj (消力池长度) = {res['Lsj']:.4f} m",
+    ]
+    return "\n".join(lines)
+
+
+class _Summary:
+    """Running min/max of d and L_sj plus row counts for a background job."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.failed = 0
+        self.d = [math.inf, -math.inf]
+        self.Lsj = [math.inf, -math.inf]
+
+    def add(self, res) -> None:
+        self.rows += 1
+        if res is None:
+            self.failed += 1
+            return
+        for key in ("d", "Lsj"):
+            bounds = getattr(self, key)
+            bounds[0] = min(bounds[0], res[key])
+            bounds[1] = max(bounds[1], res[key])
+
+    def text(self, title: str) -> str:
+        lines = [title, f"计算行数：{self.rows}，失败：{self.failed}"]
+        if self.rows > self.failed:
+            lines.append(f"d 范围：{self.d[0]:.4f} ~ {self.d[1]:.4f} m")
+            lines.append(f"L_sj 范围：{self.Lsj[0]:.4f} ~ {self.Lsj[1]:.4f} m")
+        return "\n".join(lines)
+
+
+def _safe_compute(v: dict):
+    try:
+        return compute_basin(v)
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return None
+
+
+def _write_row(writer, v: dict, res) -> None:
+    writer.writerow([v[k] for k in KEYS] + ([res[k] for k in RESULT_KEYS] if res else [""] * len(RESULT_KEYS)))
+
+
+def run_sweep(base: dict, key: str, values: list, out_path, cancel: threading.Event, results: queue.Queue) -> None:
+    """Worker: sweep one parameter over values, optionally writing a CSV."""
+    summary = _Summary()
+    total = len(values)
+    out = open(out_path, "w", newline="", encoding="utf-8-sig") if out_path else None
+    try:
+        writer = csv.writer(out) if out else None
+        if writer:
+            writer.writerow(list(KEYS) + list(RESULT_KEYS))
+        case = dict(base)
+        for i, value in enumerate(values, 1):
+            if cancel.is_set():
+                results.put(("cancelled", summary.text("参数扫描已取消")))
+                return
+            case[key] = value
+            res = _safe_compute(case)
+            summary.add(res)
+            if writer:
+                _write_row(writer, case, res)
+            if i % PROGRESS_EVERY == 0:
+                results.put(("progress", i, total))
+        results.put(("progress", total, total))
+        results.put(("done", summary.text(f"参数扫描完成（{key}）")))
+    except Exception as exc:  # noqa: BLE001
+        results.put(("error", f"参数扫描失败: {exc}"))
+    finally:
+        if out:
+            out.close()
+
+
+def run_batch_file(base: dict, in_path: str, out_path: str, cancel: threading.Event, results: queue.Queue) -> None:
+    """Worker: compute every row of a CSV (missing columns use base), write results CSV."""
+    summary = _Summary()
+    try:
+        # 先数出数据行数作为进度分母；不能对正在被 DictReader 迭代的文件调用 tell()
+        with open(in_path, newline="", encoding="utf-8-sig") as src:
+            total = max(sum(1 for _ in csv.reader(src)) - 1, 1)
+        with open(in_path, newline="", encoding="utf-8-sig") as src, \
+                open(out_path, "w", newline="", encoding="utf-8-sig") as out:
+            reader = csv.DictReader(src)
+            writer = csv.writer(out)
+            writer.writerow(list(KEYS) + list(RESULT_KEYS))
+            for i, row in enumerate(reader, 1):
+                if cancel.is_set():
+                    results.put(("cancelled", summary.text("批量计算已取消")))
+                    return
+                case = dict(base)
+                try:
+                    for k in KEYS:
+                        text = (row.get(k) or "").strip()
+                        if text:
+                            case[k] = float(text)
+                except ValueError:
+                    # 无法解析的行原样写出，结果留空
+                    summary.add(None)
+                    writer.writerow([row.get(k) or case[k] for k in KEYS] + [""] * len(RESULT_KEYS))
+                    continue
+                res = _safe_compute(case)
+                summary.add(res)
+                _write_row(writer, case, res)
+                if i % PROGRESS_EVERY == 0:
+                    results.put(("progress", i, total))
+        results.put(("progress", total, total))
+        results.put(("done", summary.text(f"批量计算完成，结果已保存：{out_path}")))
+    except Exception as exc:  # noqa: BLE001
+        results.put(("error", f"批量计算失败: {exc}"))
 
 
 class BasinApp(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title("消力池计算 (tkinter)")
-        self.geometry("440x640")
+        self.geometry("480x820")
 
         self.defaults = {
             "sigma0": "1.05",  # 跳跃淹没系数 1.05~1.10
@@ -53,6 +190,10 @@ class BasinApp(tk.Tk):
             "g": "9.81",       # 重力加速度 m/s^2
         }
         self.entries: dict[str, tk.Entry] = {}
+        self._results: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._debounce_id: str | None = None
         self._build_form()
 
     def _build_form(self) -> None:
@@ -78,17 +219,46 @@ class BasinApp(tk.Tk):
             entry = tk.Entry(frame)
             entry.grid(row=idx, column=1, sticky="ew", pady=4)
             entry.insert(0, self.defaults[key])
+            entry.bind("<KeyRelease>", self._schedule_live_calculate)
             self.entries[key] = entry
         frame.columnconfigure(1, weight=1)
+        row = len(fields)
 
         btn_frame = tk.Frame(frame)
-        btn_frame.grid(row=len(fields), column=0, columnspan=2, pady=8, sticky="ew")
+        btn_frame.grid(row=row, column=0, columnspan=2, pady=8, sticky="ew")
         tk.Button(btn_frame, text="计算", command=self.calculate).pack(side=tk.LEFT, padx=4)
         tk.Button(btn_frame, text="重置", command=self.reset_defaults).pack(side=tk.LEFT, padx=4)
+        self.live_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(btn_frame, text="输入时自动计算", variable=self.live_var).pack(side=tk.LEFT, padx=4)
+
+        sweep_frame = tk.LabelFrame(frame, text="参数扫描 / 批量文件")
+        sweep_frame.grid(row=row + 1, column=0, columnspan=2, pady=4, sticky="ew")
+        self.sweep_key = tk.StringVar(value="q")
+        tk.OptionMenu(sweep_frame, self.sweep_key, *KEYS).grid(row=0, column=0, padx=4, pady=4)
+        self.sweep_entries: dict[str, tk.Entry] = {}
+        for col, (label, key, default) in enumerate(
+            [("起", "start", "1.0"), ("止", "stop", "20.0"), ("点数", "steps", "100000")], start=1
+        ):
+            tk.Label(sweep_frame, text=label).grid(row=0, column=2 * col - 1, padx=2)
+            entry = tk.Entry(sweep_frame, width=8)
+            entry.insert(0, default)
+            entry.grid(row=0, column=2 * col, padx=2)
+            self.sweep_entries[key] = entry
+        self.sweep_btn = tk.Button(sweep_frame, text="扫描", command=self.start_sweep)
+        self.sweep_btn.grid(row=1, column=0, padx=4, pady=4, sticky="w")
+        self.file_btn = tk.Button(sweep_frame, text="批量文件…", command=self.start_batch_file)
+        self.file_btn.grid(row=1, column=1, columnspan=3, padx=4, pady=4, sticky="w")
+        self.cancel_btn = tk.Button(sweep_frame, text="取消", command=self.cancel_job, state=tk.DISABLED)
+        self.cancel_btn.grid(row=1, column=4, columnspan=3, padx=4, pady=4, sticky="e")
+
+        self.progress = ttk.Progressbar(frame, mode="determinate", maximum=1.0)
+        self.progress.grid(row=row + 2, column=0, columnspan=2, sticky="ew", pady=(4, 0))
+        self.status = tk.Label(frame, text="", anchor="w")
+        self.status.grid(row=row + 3, column=0, columnspan=2, sticky="ew")
 
         self.output = tk.Text(frame, height=12, wrap="word", state=tk.DISABLED, bg="#0f172a", fg="#e2e8f0")
-        self.output.grid(row=len(fields) + 1, column=0, columnspan=2, sticky="nsew")
-        frame.rowconfigure(len(fields) + 1, weight=1)
+        self.output.grid(row=row + 4, column=0, columnspan=2, sticky="nsew")
+        frame.rowconfigure(row + 4, weight=1)
 
     def reset_defaults(self) -> None:
         for key, entry in self.entries.items():
@@ -108,19 +278,12 @@ class BasinApp(tk.Tk):
             raise ValueError(f"{key} 为空")
         return float(text)
 
+    def _values(self) -> dict:
+        return {key: self._val(key) for key in KEYS}
+
     def calculate(self) -> None:
         try:
-            sigma0 = self._val("sigma0")
-            alpha = self._val("alpha")
-            q = self._val("q")
-            b1 = self._val("b1")
-            b2 = self._val("b2")
-            T0 = self._val("T0")
-            p = self._val("p")
-            hs = self._val("hs")
-            Ls = self._val("Ls")
-            beta = self._val("beta")
-            g = self._val("g")
+            values = self._values()
         except ValueError as exc:
             messagebox.showerror("输入错误", str(exc))
             return
@@ -128,39 +291,117 @@ class BasinApp(tk.Tk):
             messagebox.showerror("输入错误", f"无法解析输入: {exc}")
             return
 
-        if any(x <= 0 for x in [sigma0, alpha, q, b1, b2, T0, p, hs, g]):
-            messagebox.showerror("输入错误", "所有输入需大于 0")
+        try:
+            res = compute_basin(values)
+        except ValueError as exc:
+            messagebox.showerror("输入错误", str(exc))
             return
+        self._set_output(format_result(res))
 
-        # Solve h_c from h_c^3 - T0*h_c^2 + α*q^2/(2*g*p^2) = 0
-        roots = solve_cubic(a=-T0, b=0.0, c=alpha * q * q / (2.0 * g * p * p), d=0.0)
-        positives = [r for r in roots if r > 0]
-        hc = max(positives) if positives else max(roots)
-
-        # h_c'' from B.1.1-2
-        shrink_factor = (b1 / b2) ** 0.25
-        sqrt_term = math.sqrt(1.0 + 8.0 * alpha * q * q / (g * hc ** 3))
-        hc2 = (hc / 2.0) * (sqrt_term - 1.0) * shrink_factor
-
-        # ΔZ from B.1.1-4
-        delta_z = alpha * q * q / (2.0 * g * p * p * hs ** 2) - alpha * q * q / (2.0 * g * hc2 ** 2)
-
-        # Pool depth d from B.1.1-1
-        d = sigma0 * hc2 - hs - delta_z
-
-        # Water jump length Lj (B.1.2-2) and pool length Lsj (B.1.2-1)
-        Lj = 6.9 * (hc2 - hc)
-        Lsj = Ls + beta * Lj
-
-        lines = [
-            f"h_c = {hc:.4f} m",
-            f"h_c'' = {hc2:.4f} m",
-            f"ΔZ = {delta_z:.4f} m",
-            f"d (消力池深度) = {d:.4f} m",
-            f"L_j (水跃长度) = {Lj:.4f} m",
-            f"L_sj (消力池长度) = {Lsj:.4f} m",
-        ]
-        self._set_output("\n".join(lines))
+    # --- debounced live recalculation -------------------------------------------------
+
+    def _schedule_live_calculate(self, _event=None) -> None:
+        if not self.live_var.get():
+            return
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+        self._debounce_id = self.after(DEBOUNCE_MS, self._live_calculate)
+
+    def _live_calculate(self) -> None:
+        """Recalculate silently while typing; incomplete input just shows a hint."""
+        self._debounce_id = None
+        if self._worker is not None:
+            return
+        try:
+            res = compute_basin(self._values())
+        except (ValueError, ZeroDivisionError, OverflowError) as exc:
+            self._set_output(f"（等待有效输入：{exc}）")
+            return
+        self._set_output(format_result(res))
+
+    # --- background jobs --------------------------------------------------------------
+
+    def start_sweep(self) -> None:
+        try:
+            base = self._values()
+            start = float(self.sweep_entries["start"].get())
+            stop = float(self.sweep_entries["stop"].get())
+            steps = int(self.sweep_entries["steps"].get())
+            if steps < 2:
+                raise ValueError("点数需不小于 2")
+        except ValueError as exc:
+            messagebox.showerror("输入错误", str(exc))
+            return
+        key = self.sweep_key.get()
+        values = [start + (stop - start) * i / (steps - 1) for i in range(steps)]
+        out_path = filedialog.asksaveasfilename(
+            title="保存扫描结果（可取消，仅显示汇总）", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")],
+        )
+        self._start_job(run_sweep, base, key, values, out_path or None)
+
+    def start_batch_file(self) -> None:
+        try:
+            base = self._values()
+        except ValueError as exc:
+            messagebox.showerror("输入错误", str(exc))
+            return
+        in_path = filedialog.askopenfilename(title="选择批量工况 CSV", filetypes=[("CSV", "*.csv")])
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(title="保存计算结果", defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")])
+        if not out_path:
+            return
+        self._start_job(run_batch_file, base, in_path, out_path)
+
+    def _start_job(self, target, *args) -> None:
+        if self._worker is not None:
+            messagebox.showinfo("提示", "已有后台任务在运行")
+            return
+        self._cancel.clear()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=target, args=(*args, self._cancel, self._results), daemon=True)
+        self._set_busy(True)
+        self.progress["value"] = 0.0
+        self.status.configure(text="后台计算中…")
+        self._worker.start()
+        self.after(POLL_MS, self._poll_results)
+
+    def cancel_job(self) -> None:
+        self._cancel.set()
+        self.status.configure(text="正在取消…")
+
+    def _set_busy(self, busy: bool) -> None:
+        self.sweep_btn.configure(state=tk.DISABLED if busy else tk.NORMAL)
+        self.file_btn.configure(state=tk.DISABLED if busy else tk.NORMAL)
+        self.cancel_btn.configure(state=tk.NORMAL if busy else tk.DISABLED)
+
+    def _poll_results(self) -> None:
+        finished = False
+        try:
+            while True:
+                msg = self._results.get_nowait()
+                if msg[0] == "progress":
+                    _, done, total = msg
+                    self.progress["value"] = done / total if total else 1.0
+                    self.status.configure(text=f"后台计算中… {self.progress['value']:.0%}")
+                else:
+                    finished = True
+                    kind, text = msg
+                    self.status.configure(text={"done": "完成", "cancelled": "已取消", "error": "失败"}[kind])
+                    if kind == "error":
+                        messagebox.showerror("计算错误", text)
+                    else:
+                        self._set_output(text)
+        except queue.Empty:
+            pass
+
+        if finished or (self._worker is not None and not self._worker.is_alive() and self._results.empty()):
+            self._worker = None
+            self._set_busy(False)
+        else:
+            self.after(POLL_MS, self._poll_results)
 
 
 def main() -> None: